@@ -0,0 +1,996 @@
+import bisect
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+from array import array
+from collections import OrderedDict
+import persistencia
+
+"""Almacenes de la agenda en disco: interfaz común, motor SQLite y archivo de registros (mmap)"""
+
+
+class AlmacenAgenda:
+    """
+    Interfaz de un almacén de la agenda en disco.
+
+    Sin almacén (el caso por defecto), servicios guarda la agenda en memoria
+    (DATOS_AGENDA y sus índices) y la persiste en JSON. Con un almacén activo
+    (servicios.configurar_almacen), servicios valida igual que siempre pero
+    delega en él la lectura, la escritura y las consultas, que se resuelven
+    en disco sin cargar toda la agenda.
+
+    Los ítems se intercambian como tuplas en el orden de ItemAgenda.CAMPOS:
+    (id, dni, nombre, asignatura, tipo, desc, nota).
+    Las asignaturas y tipos que recibe ya vienen en mayúsculas; los DNI se
+    comparan sin distinguir mayúsculas y se devuelven en mayúsculas en los agregados.
+    Los cambios no son definitivos hasta llamar a guardar().
+    Cada almacén tiene un atributo 'ruta' con el archivo que usa.
+    """
+
+    ruta = None
+
+    # =================================================================
+    # 1. ESCRITURA
+    # =================================================================
+
+    def validar_fila(self, fila: tuple) -> str | None:
+        """
+        Comprueba restricciones propias del almacén (p. ej. anchos máximos)
+        antes de una alta. Por defecto no hay ninguna.
+
+        :return: El motivo del rechazo, o None si la fila se puede insertar.
+        """
+        return None
+
+    def proximo_id(self) -> int:
+        """Devuelve el siguiente ID libre guardado en el almacén."""
+        raise NotImplementedError
+
+    def insertar(self, filas: list[tuple], proximo_id: int):
+        """
+        Inserta ítems nuevos (en un solo lote).
+
+        :param filas: Tuplas (id, dni, nombre, asignatura, tipo, desc, nota).
+        :param proximo_id: Siguiente ID libre tras la inserción.
+        """
+        raise NotImplementedError
+
+    def eliminar(self, item_id: int) -> bool:
+        """Elimina un ítem. Devuelve False si el ID no existe."""
+        raise NotImplementedError
+
+    def eliminar_asignatura(self, asignatura: str) -> int:
+        """Elimina todos los ítems de una asignatura y devuelve cuántos eran."""
+        raise NotImplementedError
+
+    def editar_nota(self, item_id: int, nota: float | None) -> bool:
+        """Cambia la nota de un ítem. Devuelve False si el ID no existe."""
+        raise NotImplementedError
+
+    def guardar(self) -> bool:
+        """Hace definitivos los cambios pendientes. Devuelve False si falla."""
+        raise NotImplementedError
+
+    def cerrar(self):
+        """Cierra el almacén descartando los cambios no guardados."""
+        raise NotImplementedError
+
+    # =================================================================
+    # 2. CONSULTAS
+    # =================================================================
+
+    def obtener(self, item_id: int) -> tuple | None:
+        """Devuelve la fila de un ítem o None si no existe."""
+        raise NotImplementedError
+
+    def contar(self) -> int:
+        """Devuelve el número de ítems."""
+        raise NotImplementedError
+
+    def filtrar(self, dni: str | None = None, asignatura: str | None = None, tipo: str | None = None):
+        """
+        Recorre los ítems que cumplen TODOS los filtros indicados (None = sin
+        filtro), en orden de ID.
+
+        :return: Iterador de filas.
+        """
+        raise NotImplementedError
+
+    def nombre_por_dni(self, dni: str) -> str | None:
+        """Devuelve el nombre del último ítem registrado con ese DNI, o None."""
+        raise NotImplementedError
+
+    def agregados_asignatura(self) -> dict:
+        """Devuelve {asignatura: (suma, cuenta)} de las notas (solo las que tienen alguna)."""
+        raise NotImplementedError
+
+    def agregados_alumno(self) -> dict:
+        """Devuelve {dni: (suma, cuenta)} de las notas (solo los alumnos con alguna)."""
+        raise NotImplementedError
+
+    def agregado_alumno_asignatura(self, dni: str, asignatura: str) -> tuple | None:
+        """Devuelve (suma, cuenta) de las notas de un alumno en una asignatura, o None."""
+        raise NotImplementedError
+
+    def conteo_por_asignatura_y_tipo(self) -> dict:
+        """Devuelve {(asignatura, tipo): número de ítems}."""
+        raise NotImplementedError
+
+    def verificar(self) -> list[str]:
+        """Comprueba la integridad del almacén. Devuelve la lista de problemas (vacía si todo va bien)."""
+        raise NotImplementedError
+
+
+# =================================================================
+# Motor SQLite (biblioteca estándar)
+# =================================================================
+
+_ESQUEMA_SQLITE = '''
+CREATE TABLE IF NOT EXISTS items (
+    id          INTEGER PRIMARY KEY,
+    dni         TEXT NOT NULL COLLATE NOCASE,
+    nombre      TEXT NOT NULL,
+    asignatura  TEXT NOT NULL,
+    tipo        TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    nota        REAL
+);
+CREATE INDEX IF NOT EXISTS idx_items_dni ON items(dni, asignatura, nota);
+CREATE INDEX IF NOT EXISTS idx_items_asignatura ON items(asignatura, nota);
+CREATE INDEX IF NOT EXISTS idx_items_tipo ON items(tipo);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+'''
+
+# Los índices por DNI y por asignatura incluyen la nota: las medias y los
+# rankings se calculan recorriendo solo el índice, sin leer las filas.
+
+# Columnas en el orden de ItemAgenda.CAMPOS ('desc' es palabra reservada en SQL)
+_COLUMNAS_ITEM = 'id, dni, nombre, asignatura, tipo, descripcion, nota'
+
+
+def _conectar(ruta: str) -> sqlite3.Connection:
+    """Abre una conexión con el esquema creado, en modo WAL."""
+    # La conexión se puede usar desde otro hilo (guardado automático): servicios
+    # ya se encarga de que no la usen dos hilos a la vez
+    conexion = sqlite3.connect(ruta, check_same_thread=False)
+    # WAL: los lectores no se bloquean mientras se escribe, y cada commit solo
+    # añade páginas al final del registro en lugar de reescribir la base
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute('PRAGMA synchronous=NORMAL')
+    conexion.executescript(_ESQUEMA_SQLITE)
+    return conexion
+
+
+def crear_base_sqlite(ruta: str, filas, proximo_id: int) -> bool:
+    """
+    Crea (o sustituye) una base SQLite con los ítems indicados. Se construye
+    en un archivo temporal que reemplaza a 'ruta' solo cuando está completo.
+
+    :param ruta: Ruta de la base de datos.
+    :param filas: Iterable de tuplas (id, dni, nombre, asignatura, tipo, desc, nota).
+    :param proximo_id: Siguiente ID libre.
+    :return: True si se creó con éxito, False en caso de error.
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, ruta_temporal = tempfile.mkstemp(prefix='.' + os.path.basename(ruta) + '.',
+                                                 suffix='.tmp', dir=directorio)
+    os.close(descriptor)
+    try:
+        conexion = _conectar(ruta_temporal)
+        try:
+            with conexion:
+                conexion.executemany(f'INSERT INTO items ({_COLUMNAS_ITEM}) VALUES (?, ?, ?, ?, ?, ?, ?)', filas)
+                conexion.execute("INSERT OR REPLACE INTO meta VALUES ('proximo_id', ?)", (proximo_id,))
+        finally:
+            # Al cerrar la última conexión, SQLite vuelca el WAL en la base y lo borra
+            conexion.close()
+        # Un WAL antiguo junto a 'ruta' no pertenece a la base nueva
+        # (el llamador debe haber cerrado antes cualquier conexión a 'ruta')
+        for sufijo in ('-wal', '-shm'):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+        os.replace(ruta_temporal, ruta)
+        return True
+    except (sqlite3.Error, OSError) as e:
+        print(f" Error al crear la base de datos SQLite: {e}")
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(ruta_temporal + sufijo):
+                os.remove(ruta_temporal + sufijo)
+        return False
+
+
+def abrir_almacen_sqlite(ruta: str):
+    """
+    Abre una base de datos SQLite como almacén.
+
+    :param ruta: Ruta de la base de datos.
+    :return: El AlmacenSQLite, o None si el archivo no es una base de datos válida.
+    """
+    try:
+        return AlmacenSQLite(ruta)
+    except sqlite3.Error as e:
+        print(f" Error: No se pudo abrir la base de datos SQLite '{ruta}'. {e}")
+        return None
+
+
+class AlmacenSQLite(AlmacenAgenda):
+    """
+    Almacén en una base de datos SQLite (modo WAL, índices por DNI, asignatura
+    y tipo). Los filtros y las medias se resuelven con consultas SQL, así que
+    la agenda no tiene que caber en memoria.
+
+    Los cambios se acumulan en una transacción abierta que se confirma al
+    guardar (un solo commit por lote de cambios) y se descarta al cerrar sin
+    guardar, igual que los cambios en memoria del almacén por defecto.
+    """
+
+    def __init__(self, ruta: str):
+        """
+        :param ruta: Ruta de la base de datos (se crea si no existe).
+        :raises sqlite3.Error: Si el archivo no es una base de datos válida.
+        """
+        self.ruta = ruta
+        self._conexion = _conectar(ruta)
+
+    # =================================================================
+    # 1. ESCRITURA
+    # =================================================================
+
+    def proximo_id(self) -> int:
+        fila = self._conexion.execute("SELECT valor FROM meta WHERE clave = 'proximo_id'").fetchone()
+        if fila is not None:
+            return fila[0]
+        # Base sin metadatos: el siguiente al mayor ID
+        return self._conexion.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM items').fetchone()[0]
+
+    def insertar(self, filas: list[tuple], proximo_id: int):
+        self._conexion.executemany(f'INSERT INTO items ({_COLUMNAS_ITEM}) VALUES (?, ?, ?, ?, ?, ?, ?)', filas)
+        self._conexion.execute("INSERT OR REPLACE INTO meta VALUES ('proximo_id', ?)", (proximo_id,))
+
+    def eliminar(self, item_id: int) -> bool:
+        return self._conexion.execute('DELETE FROM items WHERE id = ?', (item_id,)).rowcount > 0
+
+    def eliminar_asignatura(self, asignatura: str) -> int:
+        return self._conexion.execute('DELETE FROM items WHERE asignatura = ?', (asignatura,)).rowcount
+
+    def editar_nota(self, item_id: int, nota: float | None) -> bool:
+        return self._conexion.execute('UPDATE items SET nota = ? WHERE id = ?', (nota, item_id)).rowcount > 0
+
+    def guardar(self) -> bool:
+        try:
+            self._conexion.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f" Error al guardar en la base de datos SQLite: {e}")
+            return False
+
+    def cerrar(self):
+        # close() no confirma la transacción abierta: los cambios sin guardar se descartan
+        self._conexion.close()
+
+    # =================================================================
+    # 2. CONSULTAS
+    # =================================================================
+
+    def obtener(self, item_id: int) -> tuple | None:
+        return self._conexion.execute(f'SELECT {_COLUMNAS_ITEM} FROM items WHERE id = ?', (item_id,)).fetchone()
+
+    def contar(self) -> int:
+        return self._conexion.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def filtrar(self, dni: str | None = None, asignatura: str | None = None, tipo: str | None = None):
+        condiciones = []
+        parametros = []
+        for columna, valor in (('dni', dni), ('asignatura', asignatura), ('tipo', tipo)):
+            if valor is not None:
+                condiciones.append(f'{columna} = ?')
+                parametros.append(valor)
+
+        consulta = f'SELECT {_COLUMNAS_ITEM} FROM items'
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        # El cursor devuelve las filas por bloques, sin leer todo el resultado de una vez
+        return self._conexion.execute(consulta + ' ORDER BY id', parametros)
+
+    def nombre_por_dni(self, dni: str) -> str | None:
+        fila = self._conexion.execute('SELECT nombre FROM items WHERE dni = ? ORDER BY id DESC LIMIT 1',
+                                      (dni,)).fetchone()
+        return fila[0] if fila is not None else None
+
+    def agregados_asignatura(self) -> dict:
+        consulta = ('SELECT asignatura, SUM(nota), COUNT(nota) FROM items '
+                    'WHERE nota IS NOT NULL GROUP BY asignatura')
+        return {asignatura: (suma, cuenta) for asignatura, suma, cuenta in self._conexion.execute(consulta)}
+
+    def agregados_alumno(self) -> dict:
+        # La columna dni es COLLATE NOCASE: se agrupa sin distinguir mayúsculas
+        consulta = 'SELECT UPPER(dni), SUM(nota), COUNT(nota) FROM items WHERE nota IS NOT NULL GROUP BY dni'
+        return {dni: (suma, cuenta) for dni, suma, cuenta in self._conexion.execute(consulta)}
+
+    def agregado_alumno_asignatura(self, dni: str, asignatura: str) -> tuple | None:
+        consulta = ('SELECT SUM(nota), COUNT(nota) FROM items '
+                    'WHERE dni = ? AND asignatura = ? AND nota IS NOT NULL')
+        suma, cuenta = self._conexion.execute(consulta, (dni, asignatura)).fetchone()
+        return (suma, cuenta) if cuenta else None
+
+    def conteo_por_asignatura_y_tipo(self) -> dict:
+        consulta = 'SELECT asignatura, tipo, COUNT(*) FROM items GROUP BY asignatura, tipo'
+        return {(asignatura, tipo): numero for asignatura, tipo, numero in self._conexion.execute(consulta)}
+
+    def verificar(self) -> list[str]:
+        resultado = [fila[0] for fila in self._conexion.execute('PRAGMA quick_check')]
+        return [] if resultado == ['ok'] else resultado
+
+
+# =================================================================
+# Archivo de registros de ancho fijo proyectado en memoria (mmap)
+# =================================================================
+#
+# Estructura del archivo (little-endian):
+#   1. Cabecera de TAMANO_CABECERA_REGISTROS bytes: firma, versión, tamaño de
+#      registro, proximo_id, número de registros, número de ítems vivos y una
+#      marca aleatoria que identifica el archivo.
+#   2. Registros de ancho fijo, en orden de ID. Los textos se guardan en UTF-8
+#      rellenos con ceros. Un ítem eliminado conserva su registro con el ID en
+#      negativo (así los IDs siguen ordenados).
+#   El archivo crece por bloques: puede haber hueco libre detrás del último registro.
+#
+# Índice de desplazamientos (<ruta>.idx): la marca del archivo y el ID de cada
+# registro (array de int64). Como los IDs están ordenados, la posición de un ID
+# se encuentra con una búsqueda binaria en memoria y el acceso al registro toca
+# una sola página del archivo.
+#
+# Índice de claves (<ruta>.claves): la marca, el número de registros que cubre y,
+# para el DNI (en mayúsculas) y la asignatura, la lista de posiciones de los
+# registros de cada valor (array de uint32, en orden). Incluye los registros
+# eliminados: el DNI y la asignatura de una posición no cambian nunca, así que
+# solo hay que reescribirlo cuando hay altas.
+#
+# Las ediciones y bajas no se escriben en el archivo hasta guardar (ver
+# AlmacenRegistros). Mientras guardar() las vuelca, la cabecera lleva
+# NUM_VIVOS_SIN_CONFIRMAR en lugar del número de ítems vivos: si el programa
+# se corta a mitad, al abrir se vuelven a contar.
+
+VERSION_REGISTROS = 1
+TAMANO_CABECERA_REGISTROS = 64
+
+# firma, versión, tamaño de registro, proximo_id, num_registros, num_vivos, marca
+_CABECERA_REGISTROS = struct.Struct('<4sHHqqqq')
+# Desplazamiento de num_vivos dentro de la cabecera
+_POSICION_NUM_VIVOS = struct.calcsize('<4sHHqq')
+# num_vivos mientras se vuelcan los cambios al guardar (hay que recontarlos al abrir)
+NUM_VIVOS_SIN_CONFIRMAR = -1
+# id, dni, nombre, asignatura, tipo, desc, nota (NaN = sin nota)
+_REGISTRO_FIJO = struct.Struct('<q16s64s16s8s96sd')
+
+# Ancho máximo en bytes (UTF-8) de cada texto, en el orden de la fila
+ANCHOS_REGISTRO = {'dni': 16, 'nombre': 64, 'asignatura': 16, 'tipo': 8, 'desc': 96}
+
+# Desplazamiento de la nota dentro del registro
+_POSICION_NOTA = _REGISTRO_FIJO.size - 8
+
+# Registros que se añaden al archivo cada vez que se queda sin hueco (como mínimo)
+REGISTROS_POR_AMPLIACION = 1024
+
+# Registros que se leen de una vez al recorrer el archivo
+REGISTROS_POR_BLOQUE_MMAP = 4096
+
+# Campos con índice de claves y su posición en la fila
+CAMPOS_CLAVE = {'dni': 1, 'asignatura': 3}
+
+# Filas decodificadas que se mantienen en la caché LRU de cada almacén
+TAMANO_CACHE_REGISTROS = 4096
+
+
+def _empaquetar_registro(fila: tuple) -> bytes:
+    """Convierte una fila (id, dni, nombre, asignatura, tipo, desc, nota) en un registro fijo."""
+    item_id, dni, nombre, asignatura, tipo, desc, nota = fila
+    return _REGISTRO_FIJO.pack(item_id, dni.encode('utf-8'), nombre.encode('utf-8'),
+                               asignatura.encode('utf-8'), tipo.encode('utf-8'), desc.encode('utf-8'),
+                               math.nan if nota is None else nota)
+
+
+def _desempaquetar_registro(campos: tuple) -> tuple:
+    """Convierte los campos de un registro fijo en una fila (sin comprobar si está vivo)."""
+    item_id, dni, nombre, asignatura, tipo, desc, nota = campos
+    return (item_id,
+            dni.rstrip(b'\0').decode('utf-8'),
+            nombre.rstrip(b'\0').decode('utf-8'),
+            asignatura.rstrip(b'\0').decode('utf-8'),
+            tipo.rstrip(b'\0').decode('utf-8'),
+            desc.rstrip(b'\0').decode('utf-8'),
+            # NaN != NaN: así se distingue "sin nota"
+            nota if nota == nota else None)
+
+
+def _escribir_indice_registros(ruta_indice: str, marca: int, ids):
+    """Escribe (sustituyendo) el índice de desplazamientos de un archivo de registros."""
+    with open(ruta_indice, 'wb') as f:
+        f.write(struct.pack('<q', marca))
+        array('q', ids).tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _clave_indice(campo: str, valor: str) -> str:
+    """Normaliza un valor para el índice de claves (el DNI no distingue mayúsculas)."""
+    return valor.upper() if campo == 'dni' else valor
+
+
+def _anadir_a_claves(claves: dict, fila: tuple, posicion: int):
+    """Añade la posición de una fila a las listas de sus claves."""
+    for campo, indice in CAMPOS_CLAVE.items():
+        clave = _clave_indice(campo, fila[indice])
+        posiciones = claves[campo].get(clave)
+        if posiciones is None:
+            posiciones = claves[campo][clave] = array('I')
+        posiciones.append(posicion)
+
+
+def _escribir_claves_registros(ruta_claves: str, marca: int, num_registros: int, claves: dict):
+    """Escribe (sustituyendo) el índice de claves de un archivo de registros."""
+    with open(ruta_claves, 'wb') as f:
+        f.write(struct.pack('<qq', marca, num_registros))
+        for campo in CAMPOS_CLAVE:
+            f.write(struct.pack('<I', len(claves[campo])))
+            for clave, posiciones in claves[campo].items():
+                clave_bytes = clave.encode('utf-8')
+                f.write(struct.pack('<HI', len(clave_bytes), len(posiciones)))
+                f.write(clave_bytes)
+                posiciones.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _leer_claves_registros(ruta_claves: str, marca: int, num_registros: int) -> dict | None:
+    """
+    Lee el índice de claves de un archivo de registros.
+
+    :param ruta_claves: Ruta del índice.
+    :param marca: Marca del archivo de registros (el índice debe ser del mismo archivo).
+    :param num_registros: Registros guardados; se descartan las posiciones de altas no guardadas.
+    :return: {campo: {clave: array de posiciones}}, o None si falta, está dañado o no corresponde.
+    """
+    try:
+        with open(ruta_claves, 'rb') as f:
+            contenido = f.read()
+        marca_indice, registros_indice = struct.unpack_from('<qq', contenido, 0)
+        if marca_indice != marca or registros_indice < num_registros:
+            return None
+
+        claves = {}
+        desplazamiento = 16
+        for campo in CAMPOS_CLAVE:
+            (num_claves,) = struct.unpack_from('<I', contenido, desplazamiento)
+            desplazamiento += 4
+            claves[campo] = {}
+            for _ in range(num_claves):
+                longitud, num_posiciones = struct.unpack_from('<HI', contenido, desplazamiento)
+                desplazamiento += 6
+                clave = contenido[desplazamiento:desplazamiento + longitud].decode('utf-8')
+                desplazamiento += longitud
+                posiciones = array('I')
+                posiciones.frombytes(contenido[desplazamiento:desplazamiento + 4 * num_posiciones])
+                desplazamiento += 4 * num_posiciones
+                if len(posiciones) != num_posiciones:
+                    return None
+                if registros_indice > num_registros:
+                    # Puede tener posiciones de altas que no llegaron a guardarse
+                    del posiciones[bisect.bisect_left(posiciones, num_registros):]
+                if posiciones:
+                    claves[campo][clave] = posiciones
+        return claves
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def crear_archivo_registros(ruta: str, filas, proximo_id: int) -> bool:
+    """
+    Crea (o sustituye) un archivo de registros de ancho fijo con los ítems
+    indicados, en un temporal que reemplaza a 'ruta' solo cuando está completo.
+
+    :param ruta: Ruta del archivo.
+    :param filas: Iterable de tuplas en orden de ID (id, dni, nombre, asignatura, tipo, desc, nota).
+    :param proximo_id: Siguiente ID libre.
+    :return: True si se creó con éxito, False en caso de error (p. ej. un texto demasiado largo).
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, ruta_temporal = tempfile.mkstemp(prefix='.' + os.path.basename(ruta) + '.',
+                                                 suffix='.tmp', dir=directorio)
+    marca = struct.unpack('<q', os.urandom(8))[0]
+    ids = array('q')
+    claves = {campo: {} for campo in CAMPOS_CLAVE}
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(bytes(TAMANO_CABECERA_REGISTROS))
+            for fila in filas:
+                motivo = validar_fila_registro(fila)
+                if motivo is not None:
+                    raise ValueError(f"Ítem {fila[0]}: {motivo}")
+                f.write(_empaquetar_registro(fila))
+                _anadir_a_claves(claves, fila, len(ids))
+                ids.append(fila[0])
+            f.seek(0)
+            f.write(_CABECERA_REGISTROS.pack(persistencia.MAGIA_REGISTROS, VERSION_REGISTROS,
+                                             _REGISTRO_FIJO.size, proximo_id, len(ids), len(ids), marca))
+            f.flush()
+            os.fsync(f.fileno())
+        # Los índices van primero: si se quedan a medias, su marca no coincide y se reconstruyen
+        _escribir_indice_registros(ruta + '.idx', marca, ids)
+        _escribir_claves_registros(ruta + '.claves', marca, len(ids), claves)
+        os.replace(ruta_temporal, ruta)
+        return True
+    except (ValueError, OSError) as e:
+        print(f" Error al crear el archivo de registros: {e}")
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        return False
+
+
+def validar_fila_registro(fila: tuple) -> str | None:
+    """
+    Comprueba que los textos de una fila caben en los anchos fijos del registro.
+
+    :return: El motivo del error, o None si la fila cabe.
+    """
+    for (campo, ancho), valor in zip(ANCHOS_REGISTRO.items(), fila[1:6]):
+        if len(valor.encode('utf-8')) > ancho:
+            return f"El campo '{campo}' supera los {ancho} bytes del formato de registros."
+    return None
+
+
+def borrar_archivos_auxiliares(ruta: str):
+    """
+    Borra los archivos que acompañan a un almacén (índice de registros, WAL de
+    SQLite) cuando 'ruta' deja de ser un almacén. El almacén debe estar cerrado.
+    """
+    for sufijo in ('.idx', '.claves', '-wal', '-shm'):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+
+def abrir_almacen_registros(ruta: str):
+    """
+    Abre un archivo de registros de ancho fijo como almacén.
+
+    :param ruta: Ruta del archivo.
+    :return: El AlmacenRegistros, o None si el archivo no es válido.
+    """
+    try:
+        return AlmacenRegistros(ruta)
+    except (ValueError, OSError) as e:
+        print(f" Error: No se pudo abrir el archivo de registros '{ruta}'. {e}")
+        return None
+
+
+class AlmacenRegistros(AlmacenAgenda):
+    """
+    Almacén en un archivo de registros de ancho fijo abierto con mmap.
+
+    Abrir el almacén solo lee la cabecera y los índices (desplazamientos y
+    claves): ningún registro se carga hasta que se consulta. Buscar un ítem
+    por ID o cambiar su nota toca una sola página del archivo (búsqueda
+    binaria en el índice de desplazamientos y acceso directo al registro); los
+    filtros por DNI o asignatura leen solo las posiciones de su índice de
+    claves. Las filas decodificadas se guardan en una caché LRU acotada
+    (TAMANO_CACHE_REGISTROS). Las altas se añaden al final; las bajas solo
+    cambian el signo del ID. El resto de consultas recorren el archivo por bloques.
+
+    Las ediciones y bajas de registros ya guardados no tocan el archivo: el
+    registro modificado se guarda en memoria (_pendientes) y las lecturas lo
+    toman de ahí; guardar() los vuelca al archivo. Las altas se escriben
+    detrás del último registro, pero no cuentan hasta que guardar() actualiza
+    la cabecera. Así, un corte del programa sin guardar deja el archivo tal
+    como estaba en el último guardado.
+    """
+
+    def __init__(self, ruta: str):
+        """
+        :param ruta: Ruta de un archivo de registros existente.
+        :raises ValueError: Si el archivo no es válido o su versión no está soportada.
+        :raises OSError: Si no se pudo abrir.
+        """
+        self.ruta = ruta
+        # Registros guardados con cambios sin guardar: {posición: bytearray del registro}
+        self._pendientes = {}
+        # Caché LRU de filas decodificadas: {posición: fila}
+        self._cache = OrderedDict()
+        self._archivo = open(ruta, 'r+b')
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0)
+            firma, version, tamano_registro, self._proximo_id, self._num_registros, self._num_vivos, self._marca = \
+                _CABECERA_REGISTROS.unpack_from(self._mapa, 0)
+        except (ValueError, OSError, struct.error):
+            self._archivo.close()
+            raise ValueError("El archivo no tiene el formato de registros de la agenda")
+        if firma != persistencia.MAGIA_REGISTROS or tamano_registro != _REGISTRO_FIJO.size:
+            self.cerrar()
+            raise ValueError("El archivo no tiene el formato de registros de la agenda")
+        if version > VERSION_REGISTROS:
+            self.cerrar()
+            raise ValueError(f"Versión {version} del formato de registros no soportada (máximo {VERSION_REGISTROS})")
+
+        if self._num_vivos == NUM_VIVOS_SIN_CONFIRMAR:
+            # Un guardado se cortó mientras volcaba los cambios: se recuentan los vivos
+            self._num_vivos = sum(1 for _ in self._recorrer())
+            struct.pack_into('<q', self._mapa, _POSICION_NUM_VIVOS, self._num_vivos)
+            self._mapa.flush()
+
+        self._ids = self._cargar_indice()
+        self._claves = self._cargar_claves()
+        # Estado guardado (para descartar al cerrar sin guardar)
+        self._registros_guardados = self._num_registros
+        self._vivos_guardados = self._num_vivos
+        self._proximo_id_guardado = self._proximo_id
+
+    # =================================================================
+    # 1. ACCESO A LOS REGISTROS
+    # =================================================================
+
+    def _cargar_indice(self) -> array:
+        """Lee el índice de desplazamientos, o lo reconstruye si no corresponde al archivo."""
+        ruta_indice = self.ruta + '.idx'
+        ids = array('q')
+        try:
+            with open(ruta_indice, 'rb') as f:
+                marca = struct.unpack('<q', f.read(8))[0]
+                ids.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            marca = None
+
+        if marca == self._marca and len(ids) >= self._num_registros:
+            # Puede tener IDs de altas que no llegaron a guardarse
+            del ids[self._num_registros:]
+            return ids
+
+        # Reconstrucción: un recorrido por los IDs de todos los registros
+        ids = array('q', (abs(struct.unpack_from('<q', self._mapa, self._desplazamiento(posicion))[0])
+                          for posicion in range(self._num_registros)))
+        _escribir_indice_registros(ruta_indice, self._marca, ids)
+        return ids
+
+    def _cargar_claves(self) -> dict:
+        """Lee el índice de claves, o lo reconstruye si no corresponde al archivo."""
+        ruta_claves = self.ruta + '.claves'
+        claves = _leer_claves_registros(ruta_claves, self._marca, self._num_registros)
+        if claves is not None:
+            return claves
+
+        # Reconstrucción: un recorrido por todos los registros (también los eliminados)
+        claves = {campo: {} for campo in CAMPOS_CLAVE}
+        for inicio_bloque in range(0, self._num_registros, REGISTROS_POR_BLOQUE_MMAP):
+            fin_bloque = min(inicio_bloque + REGISTROS_POR_BLOQUE_MMAP, self._num_registros)
+            bloque = self._mapa[self._desplazamiento(inicio_bloque):self._desplazamiento(fin_bloque)]
+            for posicion, campos in enumerate(_REGISTRO_FIJO.iter_unpack(bloque), inicio_bloque):
+                _anadir_a_claves(claves, _desempaquetar_registro(campos), posicion)
+        _escribir_claves_registros(ruta_claves, self._marca, self._num_registros, claves)
+        return claves
+
+    @staticmethod
+    def _desplazamiento(posicion: int) -> int:
+        """Devuelve el byte donde empieza el registro de una posición."""
+        return TAMANO_CABECERA_REGISTROS + posicion * _REGISTRO_FIJO.size
+
+    def _posicion(self, item_id: int) -> int | None:
+        """Devuelve la posición del registro VIVO con ese ID, o None."""
+        posicion = bisect.bisect_left(self._ids, item_id)
+        if posicion < len(self._ids) and self._ids[posicion] == item_id:
+            if self._id_registro(posicion) == item_id:
+                return posicion
+        return None
+
+    def _id_registro(self, posicion: int) -> int:
+        """Devuelve el ID del registro de una posición (negativo si está eliminado)."""
+        registro = self._pendientes.get(posicion)
+        if registro is not None:
+            return struct.unpack_from('<q', registro, 0)[0]
+        return struct.unpack_from('<q', self._mapa, self._desplazamiento(posicion))[0]
+
+    def _leer_registro(self, posicion: int) -> tuple:
+        """Devuelve los campos sin decodificar de una posición, con sus cambios sin guardar."""
+        registro = self._pendientes.get(posicion)
+        if registro is not None:
+            return _REGISTRO_FIJO.unpack(registro)
+        return _REGISTRO_FIJO.unpack_from(self._mapa, self._desplazamiento(posicion))
+
+    def _leer_bloque(self, inicio_bloque: int, fin_bloque: int, pendientes: list[int]) -> bytes:
+        """
+        Devuelve los bytes de los registros [inicio_bloque, fin_bloque) con sus
+        cambios sin guardar aplicados.
+
+        :param pendientes: Posiciones de _pendientes ordenadas (sorted), para localizar las del bloque.
+        """
+        bloque = self._mapa[self._desplazamiento(inicio_bloque):self._desplazamiento(fin_bloque)]
+        primera = bisect.bisect_left(pendientes, inicio_bloque)
+        ultima = bisect.bisect_left(pendientes, fin_bloque)
+        if primera < ultima:
+            bloque = bytearray(bloque)
+            for posicion in pendientes[primera:ultima]:
+                inicio = (posicion - inicio_bloque) * _REGISTRO_FIJO.size
+                bloque[inicio:inicio + _REGISTRO_FIJO.size] = self._pendientes[posicion]
+        return bloque
+
+    def _fila(self, posicion: int) -> tuple:
+        """
+        Devuelve la fila decodificada de una posición (viva o no), pasando por
+        la caché LRU: solo se lee del archivo si no está en la caché.
+        """
+        fila = self._cache.get(posicion)
+        if fila is not None:
+            self._cache.move_to_end(posicion)
+            return fila
+        fila = _desempaquetar_registro(self._leer_registro(posicion))
+        self._cache[posicion] = fila
+        if len(self._cache) > TAMANO_CACHE_REGISTROS:
+            self._cache.popitem(last=False)
+        return fila
+
+    def _posiciones_candidatas(self, dni: str | None, asignatura: str | None):
+        """
+        Elige la lista de posiciones más corta del índice de claves para los filtros dados.
+
+        :return: Array de posiciones en orden de ID, o None si no hay filtro con índice.
+        """
+        listas = []
+        if dni is not None:
+            listas.append(self._claves['dni'].get(_clave_indice('dni', dni), ()))
+        if asignatura is not None:
+            listas.append(self._claves['asignatura'].get(asignatura, ()))
+        return min(listas, key=len) if listas else None
+
+    def _modificar(self, posicion: int, formato: str, desplazamiento: int, valor):
+        """
+        Cambia un campo de un registro. Si el registro ya estaba guardado, el
+        cambio se hace sobre su copia en _pendientes (el archivo no se toca hasta
+        guardar); si es un alta sin guardar, directamente en el archivo.
+
+        :param formato: Formato de struct del campo.
+        :param desplazamiento: Desplazamiento del campo dentro del registro.
+        """
+        self._cache.pop(posicion, None)
+        if posicion >= self._registros_guardados:
+            struct.pack_into(formato, self._mapa, self._desplazamiento(posicion) + desplazamiento, valor)
+            return
+        registro = self._pendientes.get(posicion)
+        if registro is None:
+            inicio = self._desplazamiento(posicion)
+            registro = self._pendientes[posicion] = bytearray(self._mapa[inicio:inicio + _REGISTRO_FIJO.size])
+        struct.pack_into(formato, registro, desplazamiento, valor)
+
+    def _ampliar(self, registros_necesarios: int):
+        """Agranda el archivo (y la proyección) para que quepan más registros."""
+        capacidad = (len(self._mapa) - TAMANO_CABECERA_REGISTROS) // _REGISTRO_FIJO.size
+        if registros_necesarios <= capacidad:
+            return
+        nueva_capacidad = max(registros_necesarios, 2 * capacidad, REGISTROS_POR_AMPLIACION)
+        self._mapa.close()
+        self._archivo.truncate(self._desplazamiento(nueva_capacidad))
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0)
+
+    def _recorrer(self):
+        """
+        Recorre los registros vivos por bloques, en orden de ID, sin
+        decodificar los textos: los filtros comparan los bytes directamente.
+
+        :return: Generador de tuplas de campos sin decodificar.
+        """
+        pendientes = sorted(self._pendientes)
+        for inicio_bloque in range(0, self._num_registros, REGISTROS_POR_BLOQUE_MMAP):
+            fin_bloque = min(inicio_bloque + REGISTROS_POR_BLOQUE_MMAP, self._num_registros)
+            for campos in _REGISTRO_FIJO.iter_unpack(self._leer_bloque(inicio_bloque, fin_bloque, pendientes)):
+                if campos[0] > 0:
+                    yield campos
+
+    def _filtrar_campos(self, dni: str | None, asignatura: str | None, tipo: str | None):
+        """Recorre todos los registros vivos que cumplen los filtros, sin decodificar."""
+        # Los textos del registro van rellenos con ceros hasta su ancho
+        dni_f = dni.upper().encode('utf-8').ljust(ANCHOS_REGISTRO['dni'], b'\0') if dni is not None else None
+        asig_f = asignatura.encode('utf-8').ljust(ANCHOS_REGISTRO['asignatura'], b'\0') if asignatura is not None else None
+        tipo_f = tipo.encode('utf-8').ljust(ANCHOS_REGISTRO['tipo'], b'\0') if tipo is not None else None
+
+        for campos in self._recorrer():
+            if ((dni_f is None or campos[1].upper() == dni_f)
+                    and (asig_f is None or campos[3] == asig_f)
+                    and (tipo_f is None or campos[4] == tipo_f)):
+                yield campos
+
+    # =================================================================
+    # 2. ESCRITURA
+    # =================================================================
+
+    def validar_fila(self, fila: tuple) -> str | None:
+        return validar_fila_registro(fila)
+
+    def proximo_id(self) -> int:
+        return self._proximo_id
+
+    def insertar(self, filas: list[tuple], proximo_id: int):
+        self._ampliar(self._num_registros + len(filas))
+        for fila in filas:
+            inicio = self._desplazamiento(self._num_registros)
+            self._mapa[inicio:inicio + _REGISTRO_FIJO.size] = _empaquetar_registro(fila)
+            _anadir_a_claves(self._claves, fila, self._num_registros)
+            self._ids.append(fila[0])
+            self._num_registros += 1
+        self._num_vivos += len(filas)
+        self._proximo_id = proximo_id
+
+    def eliminar(self, item_id: int) -> bool:
+        posicion = self._posicion(item_id)
+        if posicion is None:
+            return False
+        self._modificar(posicion, '<q', 0, -item_id)
+        self._num_vivos -= 1
+        return True
+
+    def eliminar_asignatura(self, asignatura: str) -> int:
+        ids_asignatura = [fila[0] for fila in self.filtrar(asignatura=asignatura)]
+        for item_id in ids_asignatura:
+            self.eliminar(item_id)
+        return len(ids_asignatura)
+
+    def editar_nota(self, item_id: int, nota: float | None) -> bool:
+        posicion = self._posicion(item_id)
+        if posicion is None:
+            return False
+        self._modificar(posicion, '<d', _POSICION_NOTA, math.nan if nota is None else nota)
+        return True
+
+    def guardar(self) -> bool:
+        try:
+            # 1. Ediciones y bajas al archivo; mientras se vuelcan, la cabecera
+            # indica que el número de vivos no es de fiar
+            if self._pendientes:
+                struct.pack_into('<q', self._mapa, _POSICION_NUM_VIVOS, NUM_VIVOS_SIN_CONFIRMAR)
+                self._mapa.flush()
+                for posicion, registro in self._pendientes.items():
+                    inicio = self._desplazamiento(posicion)
+                    self._mapa[inicio:inicio + _REGISTRO_FIJO.size] = registro
+            # 2. Registros a disco
+            self._mapa.flush()
+            # 3. Índices: solo cambian con las altas nuevas (al de desplazamientos se le añaden sus IDs)
+            if self._num_registros > self._registros_guardados:
+                with open(self.ruta + '.idx', 'ab') as f:
+                    self._ids[self._registros_guardados:].tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                _escribir_claves_registros(self.ruta + '.claves', self._marca, self._num_registros, self._claves)
+            # 4. Cabecera: a partir de aquí las altas cuentan
+            _CABECERA_REGISTROS.pack_into(self._mapa, 0, persistencia.MAGIA_REGISTROS, VERSION_REGISTROS,
+                                          _REGISTRO_FIJO.size, self._proximo_id, self._num_registros,
+                                          self._num_vivos, self._marca)
+            self._mapa.flush()
+        except OSError as e:
+            print(f" Error al guardar el archivo de registros: {e}")
+            return False
+
+        self._registros_guardados = self._num_registros
+        self._vivos_guardados = self._num_vivos
+        self._proximo_id_guardado = self._proximo_id
+        self._pendientes.clear()
+        return True
+
+    def cerrar(self):
+        if not self._mapa.closed:
+            # Lo no guardado se descarta: las ediciones y bajas nunca llegaron al
+            # archivo y las altas quedan detrás de los registros de la cabecera
+            self._pendientes.clear()
+            self._cache.clear()
+            self._mapa.flush()
+            self._mapa.close()
+        self._archivo.close()
+
+    # =================================================================
+    # 3. CONSULTAS
+    # =================================================================
+
+    def obtener(self, item_id: int) -> tuple | None:
+        posicion = self._posicion(item_id)
+        if posicion is None:
+            return None
+        return self._fila(posicion)
+
+    def contar(self) -> int:
+        return self._num_vivos
+
+    def filtrar(self, dni: str | None = None, asignatura: str | None = None, tipo: str | None = None):
+        posiciones = self._posiciones_candidatas(dni, asignatura)
+        if posiciones is None:
+            for campos in self._filtrar_campos(dni, asignatura, tipo):
+                yield _desempaquetar_registro(campos)
+            return
+
+        # Solo se leen las posiciones del índice; se comprueba el resto de filtros y que siga vivo
+        dni_clave = _clave_indice('dni', dni) if dni is not None else None
+        for posicion in posiciones:
+            fila = self._fila(posicion)
+            if (fila[0] > 0
+                    and (dni_clave is None or fila[1].upper() == dni_clave)
+                    and (asignatura is None or fila[3] == asignatura)
+                    and (tipo is None or fila[4] == tipo)):
+                yield fila
+
+    def nombre_por_dni(self, dni: str) -> str | None:
+        # El último ítem vivo del alumno es el primero empezando por el final
+        for posicion in reversed(self._claves['dni'].get(_clave_indice('dni', dni), ())):
+            fila = self._fila(posicion)
+            if fila[0] > 0:
+                return fila[2]
+        return None
+
+    def _agregados(self, campos_clave: tuple, registros) -> dict:
+        """
+        Suma y cuenta las notas (no NaN) agrupando por los campos indicados.
+
+        :param campos_clave: Posiciones de los campos que forman la clave.
+        :param registros: Registros sin decodificar a recorrer.
+        :return: {clave decodificada: [suma, cuenta]} (la clave es un texto si hay un solo campo).
+        """
+        agregados = {}
+        for campos in registros:
+            nota = campos[6]
+            if nota == nota:
+                acumulado = agregados.setdefault(tuple(campos[i] for i in campos_clave), [0.0, 0])
+                acumulado[0] += nota
+                acumulado[1] += 1
+
+        resultado = {}
+        for clave, acumulado in agregados.items():
+            clave = tuple(campo.rstrip(b'\0').decode('utf-8') for campo in clave)
+            resultado[clave[0] if len(clave) == 1 else clave] = acumulado
+        return resultado
+
+    def agregados_asignatura(self) -> dict:
+        return self._agregados((3,), self._recorrer())
+
+    def agregados_alumno(self) -> dict:
+        agregados = {}
+        # Se agrupa por los bytes del DNI tal cual; aquí se juntan mayúsculas y minúsculas
+        for dni, (suma, cuenta) in self._agregados((1,), self._recorrer()).items():
+            acumulado = agregados.setdefault(dni.upper(), [0.0, 0])
+            acumulado[0] += suma
+            acumulado[1] += cuenta
+        return agregados
+
+    def agregado_alumno_asignatura(self, dni: str, asignatura: str) -> tuple | None:
+        notas = [fila[6] for fila in self.filtrar(dni, asignatura) if fila[6] is not None]
+        return (sum(notas), len(notas)) if notas else None
+
+    def conteo_por_asignatura_y_tipo(self) -> dict:
+        conteos = {}
+        for campos in self._recorrer():
+            clave = (campos[3], campos[4])
+            conteos[clave] = conteos.get(clave, 0) + 1
+        return {(asignatura.rstrip(b'\0').decode('utf-8'), tipo.rstrip(b'\0').decode('utf-8')): numero
+                for (asignatura, tipo), numero in conteos.items()}
+
+    def verificar(self) -> list[str]:
+        errores = []
+        if len(self._ids) != self._num_registros:
+            errores.append(f"El índice tiene {len(self._ids)} IDs para {self._num_registros} registros.")
+        vivos = 0
+        anterior = 0
+        for posicion in range(self._num_registros):
+            item_id = self._id_registro(posicion)
+            if abs(item_id) <= anterior:
+                errores.append(f"Los IDs no están ordenados en la posición {posicion}.")
+            if posicion < len(self._ids) and self._ids[posicion] != abs(item_id):
+                errores.append(f"El índice no coincide con el registro de la posición {posicion}.")
+            anterior = abs(item_id)
+            vivos += item_id > 0
+        if vivos != self._num_vivos:
+            errores.append(f"La cabecera indica {self._num_vivos} ítems vivos y hay {vivos}.")
+
+        claves = {campo: {} for campo in CAMPOS_CLAVE}
+        for posicion in range(self._num_registros):
+            _anadir_a_claves(claves, _desempaquetar_registro(self._leer_registro(posicion)), posicion)
+        for campo in CAMPOS_CLAVE:
+            if claves[campo] != self._claves[campo]:
+                errores.append(f"El índice de claves por '{campo}' no coincide con los registros.")
+        return errores
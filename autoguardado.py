@@ -0,0 +1,100 @@
+import threading
+import colores
+import servicios
+
+"""Guardado automático en segundo plano: un hilo que guarda la agenda tras un rato sin cambios"""
+
+# =================================================================
+# 1. ESTADO DEL GUARDADO AUTOMÁTICO
+# =================================================================
+
+# Segundos sin cambios que se esperan antes de guardar (cada cambio nuevo
+# reinicia la espera, así una racha de altas se guarda de una sola vez)
+ESPERA_INACTIVIDAD = 2.0
+
+# Hilo del guardado automático (None si está desactivado)
+_HILO = None
+
+# Se activa con cada cambio de la agenda (servicios avisa con _avisar_cambio)
+_AVISO = threading.Event()
+
+# Se activa para pedir al hilo que termine
+_PARAR = threading.Event()
+
+
+# =================================================================
+# 2. HILO DE GUARDADO
+# =================================================================
+
+def _avisar_cambio():
+    """Aviso de servicios tras cada cambio: solo despierta al hilo (no bloquea)."""
+    _AVISO.set()
+
+def _bucle_guardado(espera: float):
+    """
+    Cuerpo del hilo: espera un cambio, deja pasar 'espera' segundos sin
+    cambios nuevos y guarda con servicios.guardar_datos_logica, que escribe en
+    disco sin retener el cerrojo de la agenda (el menú no se queda esperando).
+
+    :param espera: Segundos de inactividad antes de guardar.
+    """
+    while not _PARAR.is_set():
+        _AVISO.wait()
+
+        # Espera de inactividad: mientras sigan llegando avisos, se vuelve a empezar
+        continuar_esperando = True
+        while continuar_esperando and not _PARAR.is_set():
+            _AVISO.clear()
+            continuar_esperando = _AVISO.wait(espera)
+
+        # Al parar no se guarda: de eso se encarga quien detiene el hilo
+        if not _PARAR.is_set() and servicios.hay_cambios_sin_guardar():
+            if not servicios.guardar_datos_logica():
+                print(f"{colores.C_ROJO}\n Error en el guardado automático. Revisa la consola para errores.{colores.C_FIN}")
+
+
+# =================================================================
+# 3. ACTIVAR / DESACTIVAR
+# =================================================================
+
+def autoguardado_activo() -> bool:
+    """Indica si el guardado automático está en marcha."""
+    return _HILO is not None
+
+def iniciar_autoguardado(espera: float = ESPERA_INACTIVIDAD):
+    """
+    Pone en marcha el guardado automático (si no lo estaba ya).
+
+    :param espera: Segundos sin cambios antes de guardar.
+    """
+    global _HILO
+
+    if _HILO is not None:
+        return
+
+    _PARAR.clear()
+    _AVISO.clear()
+    # Hilo demonio: si el programa termina de golpe, no impide que se cierre
+    _HILO = threading.Thread(target=_bucle_guardado, args=(espera,), name='autoguardado', daemon=True)
+    _HILO.start()
+    servicios.configurar_aviso_cambios(_avisar_cambio)
+
+    # Si ya había cambios sin guardar, se guardan tras la primera espera
+    if servicios.hay_cambios_sin_guardar():
+        _AVISO.set()
+
+def detener_autoguardado():
+    """
+    Detiene el guardado automático y espera a que termine el guardado en curso,
+    si lo hay. Los cambios que queden pendientes no se guardan aquí.
+    """
+    global _HILO
+
+    if _HILO is None:
+        return
+
+    servicios.configurar_aviso_cambios(None)
+    _PARAR.set()
+    _AVISO.set()
+    _HILO.join()
+    _HILO = None
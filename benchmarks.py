@@ -0,0 +1,902 @@
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+import columnas
+import estadisticas
+import persistencia
+import servicios
+import servidor
+import utilidades
+
+"""Mediciones de rendimiento de la Agenda Académica (memoria, tiempos de carga, etc.)
+
+Uso: python benchmarks.py <medicion> [num_items]
+"""
+
+# =================================================================
+# 1. DATOS SINTÉTICOS
+# =================================================================
+
+def _numero_en_letras(numero: int) -> str:
+    """Escribe un número en base 26 con letras (0 -> 'A', 27 -> 'AB'): los nombres no admiten cifras."""
+    letras = chr(ord('A') + numero % 26)
+    while numero >= 26:
+        numero = numero // 26 - 1
+        letras = chr(ord('A') + numero % 26) + letras
+    return letras
+
+def generar_agenda_sintetica(num_items: int, num_alumnos: int = 1000, semilla: int = 1) -> list[dict]:
+    """
+    Genera una lista de ítems con el mismo formato que el archivo JSON.
+
+    :param num_items: Número de ítems a generar.
+    :param num_alumnos: Número de alumnos distintos (DNIs) entre los que se reparten.
+    :param semilla: Semilla aleatoria para que las mediciones sean repetibles.
+    :return: Lista de diccionarios (ítems).
+    """
+    aleatorio = random.Random(semilla)
+    alumnos = [(f"{numero:08d}A", f"ALUMNO {_numero_en_letras(numero)}") for numero in range(num_alumnos)]
+
+    items = []
+    for item_id in range(1, num_items + 1):
+        dni, nombre = aleatorio.choice(alumnos)
+        items.append({
+            'id': item_id,
+            'dni': dni,
+            'nombre': nombre,
+            'asignatura': aleatorio.choice(servicios.ASIGNATURAS_PERMITIDAS),
+            'tipo': aleatorio.choice(servicios.TIPOS_VALIDOS),
+            'desc': f"PEC {aleatorio.randint(1, 4)}",
+            'nota': aleatorio.choice([None, round(aleatorio.uniform(0, 10), 2)])
+        })
+    return items
+
+
+def cargar_agenda_sintetica(num_items: int) -> str:
+    """
+    Escribe una agenda sintética en un archivo temporal y la carga en 'servicios'
+    por el camino normal (persistencia + cargar_datos_logica).
+
+    :param num_items: Número de ítems de la agenda.
+    :return: La ruta del archivo temporal (el llamador debe borrarlo).
+    """
+    descriptor, ruta = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+        json.dump({'datos_agenda': generar_agenda_sintetica(num_items), 'proximo_id': num_items + 1}, f)
+
+    persistencia.NOMBRE_ARCHIVO_DATOS = ruta
+    servicios.cargar_datos_logica()
+    return ruta
+
+
+# =================================================================
+# 2. MEDICIONES
+# =================================================================
+
+def _tamano_profundo(raiz) -> int:
+    """
+    Suma sys.getsizeof de todos los objetos alcanzables desde 'raiz', contando
+    cada objeto una sola vez (las cadenas compartidas no se cuentan dos veces).
+    Recorre listas, tuplas, diccionarios y objetos con __slots__.
+    """
+    vistos = set()
+    pendientes = [raiz]
+    total = 0
+
+    while pendientes:
+        objeto = pendientes.pop()
+        if id(objeto) in vistos:
+            continue
+        vistos.add(id(objeto))
+        total += sys.getsizeof(objeto)
+
+        if isinstance(objeto, dict):
+            pendientes.extend(objeto.keys())
+            pendientes.extend(objeto.values())
+        elif isinstance(objeto, (list, tuple)):
+            pendientes.extend(objeto)
+        elif hasattr(type(objeto), '__slots__'):
+            pendientes.extend(getattr(objeto, campo) for campo in type(objeto).__slots__)
+
+    return total
+
+
+def medir_memoria_por_item(num_items: int = 100_000):
+    """
+    Compara los bytes por ítem de la lista de diccionarios que produce json.load
+    (la representación anterior de DATOS_AGENDA) con los registros ItemAgenda.
+    """
+    items_dict = generar_agenda_sintetica(num_items)
+    # Pasamos por JSON para que cada ítem tenga sus propias copias de las cadenas,
+    # igual que al cargar el archivo
+    items_dict = json.loads(json.dumps(items_dict))
+
+    ruta = cargar_agenda_sintetica(num_items)
+    try:
+        bytes_dict = _tamano_profundo(items_dict)
+        bytes_registro = _tamano_profundo(servicios.listar_todos_los_items())
+    finally:
+        os.remove(ruta)
+
+    print(f"Ítems: {num_items}")
+    print(f"  dict (json.load):  {bytes_dict / num_items:8.1f} bytes/ítem")
+    print(f"  ItemAgenda:        {bytes_registro / num_items:8.1f} bytes/ítem")
+    print(f"  Ahorro:            {100 * (1 - bytes_registro / bytes_dict):8.1f} %")
+
+
+def _cronometrar(funcion, repeticiones: int = 5) -> float:
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones de 'funcion'."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+
+def medir_estadisticas_columnares(num_items: int = 500_000):
+    """
+    Compara obtener_estadistica_agregada_asignaturas recorriendo los registros
+    con la misma estadística sobre el almacén columnar.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    try:
+        t_registros = _cronometrar(servicios.obtener_estadistica_agregada_asignaturas)
+        servicios.configurar_almacen_columnar(True)
+        t_columnas = _cronometrar(servicios.obtener_estadistica_agregada_asignaturas)
+        servicios.configurar_almacen_columnar(False)
+    finally:
+        os.remove(ruta)
+
+    motor = 'NumPy' if columnas.np is not None else 'array'
+    print(f"Ítems: {num_items}")
+    print(f"  Registros:            {t_registros * 1000:8.1f} ms")
+    print(f"  Columnas ({motor}):   {t_columnas * 1000:8.1f} ms")
+
+
+def _comprobar_validacion_importacion():
+    """Importa un JSONL con registros erróneos conocidos y comprueba el informe de errores."""
+    lineas = [
+        {'dni': '12345678Z', 'nombre': 'ANA', 'asignatura': 'PYTHON', 'tipo': 'TAREA', 'desc': 'ok', 'nota': 7.5},
+        {'dni': '12345678Z', 'nombre': 'ANA', 'asignatura': 'PYTHON', 'tipo': 'TAREA', 'desc': 'bool', 'nota': True},
+        {'dni': '1234', 'nombre': 'ANA', 'asignatura': 'PYTHON', 'tipo': 'TAREA', 'desc': 'dni', 'nota': None},
+    ]
+    descriptor, ruta_jsonl = tempfile.mkstemp(suffix='.jsonl')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(linea) + '\n' for linea in lineas)
+        f.write('{"dni": \n')
+
+    ruta = cargar_agenda_sintetica(0)
+    try:
+        informe = servicios.alta_items_bulk(persistencia.leer_registros_jsonl(ruta_jsonl))
+    finally:
+        os.remove(ruta)
+        os.remove(ruta_jsonl)
+
+    posiciones = [error['posicion'] for error in informe['errores']]
+    if informe['insertados'] != 1 or posiciones != [2, 3, 4]:
+        raise RuntimeError(f"La validación de la importación no rechaza lo esperado: {informe}")
+    print(f"Validación de la importación: OK ({len(posiciones)} registros erróneos rechazados)")
+
+
+def medir_importacion(num_items: int = 50_000):
+    """
+    Compara dar de alta una agenda ítem a ítem (alta_item_logica) con la
+    importación en bloque de un CSV (alta_items_bulk + leer_registros_csv).
+    Antes comprueba que la validación de la importación rechaza los registros
+    erróneos de un JSONL (nota booleana, DNI no válido, línea que no es JSON).
+
+    :raises RuntimeError: Si la validación deja pasar algún registro erróneo.
+    """
+    _comprobar_validacion_importacion()
+    items = generar_agenda_sintetica(num_items)
+
+    descriptor, ruta_csv = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=['dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota'], extrasaction='ignore')
+        escritor.writeheader()
+        escritor.writerows(items)
+
+    ruta = cargar_agenda_sintetica(0)
+    try:
+        inicio = time.perf_counter()
+        for item in items:
+            servicios.alta_item_logica(item['dni'], item['nombre'], item['asignatura'],
+                                       item['tipo'], item['desc'], item['nota'])
+        t_uno_a_uno = time.perf_counter() - inicio
+
+        servicios.cargar_datos_logica()
+        inicio = time.perf_counter()
+        servicios.alta_items_bulk(items)
+        t_bloque = time.perf_counter() - inicio
+
+        servicios.cargar_datos_logica()
+        inicio = time.perf_counter()
+        informe = servicios.alta_items_bulk(persistencia.leer_registros_csv(ruta_csv))
+        t_bloque_csv = time.perf_counter() - inicio
+    finally:
+        os.remove(ruta)
+        os.remove(ruta_csv)
+
+    print(f"Ítems: {num_items} (importados en bloque: {informe['insertados']}, errores: {len(informe['errores'])})")
+    print(f"  alta_item_logica x N (en memoria): {t_uno_a_uno * 1000:8.1f} ms")
+    print(f"  alta_items_bulk (en memoria):      {t_bloque * 1000:8.1f} ms")
+    print(f"  alta_items_bulk (CSV en disco):    {t_bloque_csv * 1000:8.1f} ms")
+
+
+def _pico_memoria(funcion) -> tuple[float, int]:
+    """Ejecuta 'funcion' y devuelve (segundos, pico de memoria en bytes según tracemalloc)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion()
+    transcurrido = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return transcurrido, pico
+
+
+def medir_carga(num_items: int = 200_000):
+    """
+    Compara la carga anterior (json.load del archivo completo) con la carga en
+    streaming de cargar_datos_logica (registros + índices), en JSON y JSONL.
+    Los tiempos se miden con tracemalloc activo, así que son orientativos.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    ruta_jsonl = ruta[:-len('.json')] + '.jsonl'
+    try:
+        # Camino anterior: árbol JSON completo en memoria (que pasaba a ser la agenda)
+        t_completa, pico_completa = _pico_memoria(persistencia.cargar_datos_desde_json)
+        t_json, pico_json = _pico_memoria(servicios.cargar_datos_logica)
+
+        persistencia.NOMBRE_ARCHIVO_DATOS = ruta_jsonl
+        servicios.guardar_datos_logica()
+        t_jsonl, pico_jsonl = _pico_memoria(servicios.cargar_datos_logica)
+    finally:
+        os.remove(ruta)
+        if os.path.exists(ruta_jsonl):
+            os.remove(ruta_jsonl)
+
+    print(f"Ítems: {num_items}")
+    print(f"  json.load completo:   {t_completa:6.2f} s  pico {pico_completa / 2**20:8.1f} MiB")
+    print(f"  streaming JSON:       {t_json:6.2f} s  pico {pico_json / 2**20:8.1f} MiB")
+    print(f"  streaming JSONL:      {t_jsonl:6.2f} s  pico {pico_jsonl / 2**20:8.1f} MiB")
+
+
+def medir_guardado(num_items: int = 200_000, num_cambios: int = 10):
+    """
+    Compara guardar una agenda completa (instantánea) con guardar solo unos
+    pocos cambios en el diario.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    try:
+        def guardar_completa():
+            # Sin archivo de datos, guardar_datos_logica escribe una instantánea
+            os.remove(ruta)
+            servicios.guardar_datos_logica()
+
+        t_instantanea = _cronometrar(guardar_completa, repeticiones=3)
+
+        def guardar_cambios():
+            for item in servicios.listar_todos_los_items()[:num_cambios]:
+                servicios.editar_puntuacion_logica(item.id, 5.0)
+            servicios.guardar_datos_logica()
+
+        t_diario = _cronometrar(guardar_cambios)
+    finally:
+        os.remove(ruta)
+        persistencia.borrar_diario()
+
+    print(f"Ítems: {num_items}")
+    print(f"  Instantánea completa:        {t_instantanea * 1000:8.1f} ms")
+    print(f"  Diario ({num_cambios} cambios):         {t_diario * 1000:8.1f} ms")
+
+
+def medir_formatos(num_items: int = 200_000):
+    """
+    Compara el guardado (instantánea completa), la carga y el tamaño en disco
+    de los tres formatos del archivo de datos: JSON, JSON Lines y binario.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    base = ruta[:-len('.json')]
+    resultados = []
+    try:
+        for formato, ruta_formato in ((persistencia.FORMATO_ARCHIVO_JSON, ruta),
+                                      (persistencia.FORMATO_ARCHIVO_JSONL, base + '.jsonl'),
+                                      (persistencia.FORMATO_ARCHIVO_BINARIO, base + persistencia.EXTENSION_BINARIO)):
+            persistencia.NOMBRE_ARCHIVO_DATOS = ruta_formato
+            t_guardado = _cronometrar(lambda: servicios.convertir_formato_datos(formato), repeticiones=3)
+            t_carga = _cronometrar(servicios.cargar_datos_logica, repeticiones=3)
+            # Solo la lectura del archivo, sin crear registros ni índices
+            t_lectura = _cronometrar(lambda: sum(1 for _ in persistencia.iterar_datos_agenda({})), repeticiones=3)
+            resultados.append((formato, t_guardado, t_carga, t_lectura, os.path.getsize(ruta_formato)))
+        
+        # Conversión de archivo a archivo (sin pasar por la agenda en memoria)
+        t_conversion = _cronometrar(lambda: persistencia.convertir_archivo_datos(
+            ruta, base + persistencia.EXTENSION_BINARIO, persistencia.FORMATO_ARCHIVO_BINARIO), repeticiones=1)
+    finally:
+        for extension in ('.json', '.jsonl', persistencia.EXTENSION_BINARIO):
+            if os.path.exists(base + extension):
+                os.remove(base + extension)
+
+    print(f"Ítems: {num_items}")
+    for formato, t_guardado, t_carga, t_lectura, tamano in resultados:
+        print(f"  {formato:8s} guardar {t_guardado * 1000:8.1f} ms  cargar {t_carga * 1000:8.1f} ms "
+              f"(lectura {t_lectura * 1000:7.1f} ms)  tamaño {tamano / 2**20:7.1f} MiB")
+    print(f"  Conversión JSON -> binario: {t_conversion * 1000:8.1f} ms")
+
+
+def medir_almacenes(num_items: int = 200_000):
+    """
+    Compara la agenda en memoria (JSON) con los almacenes en disco (SQLite y
+    registros de ancho fijo): tiempo de apertura/carga y de consultas habituales.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    base = ruta[:-len('.json')]
+    nuevos = generar_agenda_sintetica(10_000, semilla=2)
+    aleatorio = random.Random(3)
+    ids_aleatorios = [aleatorio.randint(1, num_items) for _ in range(1000)]
+
+    def buscar_ids():
+        for item_id in ids_aleatorios:
+            servicios.buscar_por_id(item_id)
+
+    def editar_notas():
+        for item_id in ids_aleatorios:
+            servicios.editar_puntuacion_logica(item_id, 5.0)
+
+    consultas = {
+        'buscar por ID (x1000)':    buscar_ids,
+        'editar nota (x1000)':      editar_notas,
+        'filtrar por DNI':          lambda: servicios.filtrar_items_logica('00000007A', None, None),
+        'filtrar DNI + asignatura': lambda: servicios.filtrar_items_logica('00000007A', 'PYTHON', None),
+        'media alumno/asignatura':  lambda: servicios.calcular_media_alumno_asignatura('00000007A', 'PYTHON'),
+        'ranking asignaturas':      servicios.obtener_ranking_asignaturas,
+        'top 5 alumnos':            lambda: servicios.obtener_ranking_alumnos(5),
+        'alta en bloque (10k)':     lambda: servicios.alta_items_bulk(nuevos),
+    }
+    motores = (('memoria', ruta, None),
+               ('sqlite', base + '.sqlite', persistencia.FORMATO_ARCHIVO_SQLITE),
+               ('registros', base + persistencia.EXTENSION_REGISTROS, persistencia.FORMATO_ARCHIVO_REGISTROS))
+    resultados = {}
+    try:
+        for motor, ruta_motor, formato in motores:
+            persistencia.NOMBRE_ARCHIVO_DATOS = ruta_motor
+            if formato is not None:
+                servicios.convertir_formato_datos(formato)
+            tiempos = {'abrir / cargar': _cronometrar(servicios.cargar_datos_logica, repeticiones=3)}
+            for nombre, consulta in consultas.items():
+                tiempos[nombre] = _cronometrar(consulta, repeticiones=3)
+            tiempos['guardar'] = _cronometrar(servicios.guardar_datos_logica, repeticiones=1)
+            resultados[motor] = tiempos
+        servicios.configurar_almacen(None)
+    finally:
+        for _, ruta_motor, _ in motores:
+            for sufijo in ('', '.idx', '.claves', '-wal', '-shm'):
+                if os.path.exists(ruta_motor + sufijo):
+                    os.remove(ruta_motor + sufijo)
+
+    print(f"Ítems: {num_items}")
+    print(f"  {'':26s}" + ''.join(f"{motor:>13s}" for motor, _, _ in motores))
+    for nombre in resultados['memoria']:
+        print(f"  {nombre:26s}" + ''.join(f"{resultados[motor][nombre] * 1000:10.1f} ms" for motor, _, _ in motores))
+
+
+def medir_arranque(num_items: int = 200_000):
+    """
+    Mide el tiempo hasta el primer menú (cargar_datos_logica al arrancar) con
+    la agenda en memoria (JSON y binario) y en modo diferido (registros), y lo
+    que tarda la primera consulta por ID y por DNI justo después de abrir.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    base = ruta[:-len('.json')]
+    formatos = ((persistencia.FORMATO_ARCHIVO_JSON, ruta),
+                (persistencia.FORMATO_ARCHIVO_BINARIO, base + persistencia.EXTENSION_BINARIO),
+                (persistencia.FORMATO_ARCHIVO_REGISTROS, base + persistencia.EXTENSION_REGISTROS))
+    resultados = []
+    try:
+        for formato, ruta_formato in formatos:
+            persistencia.NOMBRE_ARCHIVO_DATOS = ruta_formato
+            servicios.convertir_formato_datos(formato)
+            t_arranque = _cronometrar(servicios.cargar_datos_logica, repeticiones=3)
+            # Primeras consultas tras abrir (en modo diferido, con la caché vacía)
+            servicios.cargar_datos_logica()
+            t_id = _cronometrar(lambda: servicios.buscar_por_id(num_items // 2), repeticiones=1)
+            t_dni = _cronometrar(lambda: servicios.filtrar_items_logica('00000007A', None, None), repeticiones=1)
+            resultados.append((formato, t_arranque, t_id, t_dni))
+        servicios.configurar_almacen(None)
+    finally:
+        for _, ruta_formato in formatos:
+            for sufijo in ('', '.idx', '.claves'):
+                if os.path.exists(ruta_formato + sufijo):
+                    os.remove(ruta_formato + sufijo)
+
+    print(f"Ítems: {num_items}")
+    for formato, t_arranque, t_id, t_dni in resultados:
+        print(f"  {formato:9s} primer menú {t_arranque * 1000:8.1f} ms  "
+              f"primera búsqueda por ID {t_id * 1000:7.2f} ms  por DNI {t_dni * 1000:7.2f} ms")
+
+
+def medir_concurrencia(num_items: int = 20_000, num_hilos: int = 8, operaciones_por_hilo: int = 2000):
+    """
+    Prueba de estrés del cerrojo de lectura/escritura de 'servicios': varios
+    hilos mezclan altas, ediciones, bajas y consultas sobre la misma agenda.
+    Al terminar comprueba que no hubo excepciones, que los IDs no se repiten,
+    que el número de ítems cuadra con las altas y bajas hechas y que los
+    índices y agregados siguen coherentes (verificar_consistencia).
+
+    :raises RuntimeError: Si alguna comprobación falla (el programa termina con error).
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    dnis = [f"{numero:08d}A" for numero in range(1000)]
+    contadores = {'altas': 0, 'bajas': 0}
+    cerrojo_contadores = threading.Lock()
+    excepciones = []
+
+    def trabajar(semilla: int):
+        aleatorio = random.Random(semilla)
+        altas = bajas = 0
+        try:
+            for _ in range(operaciones_por_hilo):
+                operacion = aleatorio.random()
+                dni = aleatorio.choice(dnis)
+                asignatura = aleatorio.choice(servicios.ASIGNATURAS_PERMITIDAS)
+                item_id = aleatorio.randint(1, num_items + num_hilos * operaciones_por_hilo)
+                if operacion < 0.25:
+                    altas += servicios.alta_item_logica(dni, f"ALUMNO {dni[:8].lstrip('0') or 0}", asignatura,
+                                                        'TAREA', 'ESTRES', round(aleatorio.uniform(0, 10), 2))
+                elif operacion < 0.40:
+                    servicios.editar_puntuacion_logica(item_id, round(aleatorio.uniform(0, 10), 2))
+                elif operacion < 0.50:
+                    bajas += servicios.eliminar_item_logica(item_id)
+                elif operacion < 0.65:
+                    servicios.filtrar_items_logica(dni, None, None)
+                elif operacion < 0.80:
+                    servicios.calcular_media_alumno_asignatura(dni, asignatura)
+                elif operacion < 0.90:
+                    servicios.buscar_por_id(item_id)
+                else:
+                    servicios.obtener_ranking_alumnos(5)
+        except Exception as e:
+            excepciones.append(repr(e))
+        with cerrojo_contadores:
+            contadores['altas'] += altas
+            contadores['bajas'] += bajas
+
+    try:
+        hilos = [threading.Thread(target=trabajar, args=(semilla,)) for semilla in range(num_hilos)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        transcurrido = time.perf_counter() - inicio
+
+        ids = [item.id for item in servicios.listar_todos_los_items()]
+        esperados = num_items + contadores['altas'] - contadores['bajas']
+        errores = servicios.verificar_consistencia()
+    finally:
+        os.remove(ruta)
+
+    operaciones = num_hilos * operaciones_por_hilo
+    print(f"Ítems iniciales: {num_items}  hilos: {num_hilos}  operaciones: {operaciones}")
+    print(f"  Tiempo: {transcurrido:.2f} s ({operaciones / transcurrido:,.0f} operaciones/s)")
+    print(f"  Altas: {contadores['altas']}  bajas: {contadores['bajas']}  ítems: {len(ids)} (esperados {esperados})")
+    print(f"  Excepciones en los hilos: {len(excepciones)}  {excepciones[:3]}")
+    print(f"  IDs repetidos: {len(ids) - len(set(ids))}")
+    print(f"  Consistencia: {'OK' if not errores else errores[:5]}")
+    correcto = not excepciones and len(ids) == len(set(ids)) == esperados and not errores
+    print(f"  Resultado: {'OK' if correcto else 'FALLO'}")
+    if not correcto:
+        raise RuntimeError("La prueba de concurrencia ha detectado errores (ver el resumen anterior).")
+
+
+def _arrancar_servidor_local() -> tuple[dict, threading.Thread]:
+    """
+    Arranca el servidor HTTP en un hilo con su propio bucle de asyncio, en
+    un puerto libre de la máquina local.
+
+    :return: ({'bucle', 'servidor', 'puerto'}, hilo); para pararlo, ver medir_servidor.
+    """
+    estado = {}
+    listo = threading.Event()
+
+    def ejecutar():
+        bucle = asyncio.new_event_loop()
+        estado['bucle'] = bucle
+        estado['servidor'] = bucle.run_until_complete(servidor.crear_servidor(servidor.HOST_SERVIDOR, 0))
+        estado['puerto'] = estado['servidor'].sockets[0].getsockname()[1]
+        listo.set()
+        bucle.run_forever()
+        estado['servidor'].close()
+        bucle.run_until_complete(estado['servidor'].wait_closed())
+        bucle.close()
+
+    hilo = threading.Thread(target=ejecutar, daemon=True)
+    hilo.start()
+    listo.wait()
+    return estado, hilo
+
+
+async def _cliente_http(puerto: int, peticiones: list) -> int:
+    """
+    Envía las peticiones una tras otra por una sola conexión keep-alive.
+
+    :param peticiones: Lista de (metodo, ruta, cuerpo o None).
+    :return: Número de respuestas con error (código 500 o más, o inesperado).
+    """
+    lector, escritor = await asyncio.open_connection(servidor.HOST_SERVIDOR, puerto)
+    errores = 0
+    for metodo, ruta, cuerpo in peticiones:
+        datos = b'' if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+        escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n".encode('latin-1') + datos)
+        await escritor.drain()
+
+        estado = int((await lector.readline()).split()[1])
+        longitud = 0
+        linea = await lector.readline()
+        while linea != b'\r\n':
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            if nombre.lower() == 'content-length':
+                longitud = int(valor)
+            linea = await lector.readline()
+        await lector.readexactly(longitud)
+        errores += estado >= 500
+    escritor.close()
+    await escritor.wait_closed()
+    return errores
+
+
+def medir_servidor(num_items: int = 20_000, num_conexiones: int = 8, peticiones_por_conexion: int = 1000):
+    """
+    Prueba de carga de la API HTTP (servidor.py) contra una instancia local:
+    varias conexiones keep-alive a la vez, con peticiones sueltas y en lote.
+    Informa de las peticiones por segundo de cada escenario.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    aleatorio = random.Random(4)
+    tamano_lote = 50
+
+    def peticiones_por_id():
+        return [('GET', f"/items/{aleatorio.randint(1, num_items)}", None) for _ in range(peticiones_por_conexion)]
+
+    def peticiones_mixtas():
+        peticiones = []
+        for _ in range(peticiones_por_conexion):
+            dni = f"{aleatorio.randrange(1000):08d}A"
+            peticiones.append(aleatorio.choice([
+                ('GET', f"/items/{aleatorio.randint(1, num_items)}", None),
+                ('GET', f"/items?dni={dni}", None),
+                ('GET', f"/informes/media?dni={dni}&asignatura=PYTHON", None),
+                ('PATCH', f"/items/{aleatorio.randint(1, num_items)}", {'nota': 5.0}),
+            ]))
+        return peticiones
+
+    def peticiones_en_lote():
+        return [('POST', '/lote', [{'metodo': 'GET', 'ruta': f"/items/{aleatorio.randint(1, num_items)}"}
+                                   for _ in range(tamano_lote)])
+                for _ in range(peticiones_por_conexion // tamano_lote)]
+
+    escenarios = (('GET /items/<id>', peticiones_por_id, 1),
+                  ('mixto (consultas + ediciones)', peticiones_mixtas, 1),
+                  (f"POST /lote ({tamano_lote} por lote)", peticiones_en_lote, tamano_lote))
+
+    estado, hilo = _arrancar_servidor_local()
+    resultados = []
+    try:
+        for nombre, generar, peticiones_por_envio in escenarios:
+            cargas = [generar() for _ in range(num_conexiones)]
+
+            async def lanzar():
+                return await asyncio.gather(*(_cliente_http(estado['puerto'], carga) for carga in cargas))
+
+            inicio = time.perf_counter()
+            errores = sum(asyncio.run(lanzar()))
+            transcurrido = time.perf_counter() - inicio
+            total = sum(len(carga) for carga in cargas) * peticiones_por_envio
+            resultados.append((nombre, total, transcurrido, errores))
+    finally:
+        estado['bucle'].call_soon_threadsafe(estado['bucle'].stop)
+        hilo.join()
+        os.remove(ruta)
+
+    print(f"Ítems: {num_items}  conexiones keep-alive: {num_conexiones}")
+    for nombre, total, transcurrido, errores in resultados:
+        print(f"  {nombre:32s} {total:7d} peticiones en {transcurrido:6.2f} s "
+              f"-> {total / transcurrido:9,.0f} peticiones/s  (errores: {errores})")
+
+
+def _imprimir_tabla_fila_a_fila(datos: list[dict], encabezados: list[str]):
+    """Copia del imprimir_tabla anterior (str() dos veces por celda, concatenación y un print por fila), como referencia."""
+    anchos = {h: len(h) for h in encabezados}
+    for fila in datos:
+        for h in encabezados:
+            anchos[h] = max(anchos[h], len(str(fila.get(h, ''))))
+    separador = "+" + "".join("-" * (anchos[h] + 2) + "+" for h in encabezados)
+    print(separador)
+    linea_cabecera = "|"
+    for h in encabezados:
+        linea_cabecera += h.center(anchos[h] + 2) + "|"
+    print(linea_cabecera)
+    print(separador)
+    for fila in datos:
+        linea_datos = "|"
+        for h in encabezados:
+            linea_datos += " " + str(fila.get(h, '')).ljust(anchos[h]) + " |"
+        print(linea_datos[:-1] + "|")
+    print(separador)
+
+
+def medir_tabla(num_items: int = 500_000):
+    """
+    Compara imprimir el listado completo con el renderizado anterior (fila a
+    fila) y con utilidades.imprimir_tabla_paginada (muestra + bloques), con la
+    salida a os.devnull. También mide lo que tarda en salir la primera página
+    construyendo antes la lista (listar_todos_los_items) y recorriendo por
+    bloques (iterar_items_por_bloques), en memoria y con el almacén SQLite.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    ruta_sqlite = ruta[:-len('.json')] + '.sqlite'
+    encabezados = ['id', 'dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota']
+    primera_pagina = {}
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as nulo, redirect_stdout(nulo):
+            items = servicios.listar_todos_los_items()
+            t_antigua = _cronometrar(lambda: _imprimir_tabla_fila_a_fila(items, encabezados), repeticiones=3)
+            t_nueva = _cronometrar(lambda: utilidades.imprimir_tabla_paginada(items, encabezados, paginar=False),
+                                   repeticiones=3)
+            del items
+            # Primera página (el usuario pulsa 'q' en la pausa): el renderizado
+            # anterior tenía que recorrer la lista entera antes de escribir nada
+            pedir_pagina = utilidades._pedir_siguiente_pagina
+            utilidades._pedir_siguiente_pagina = lambda: False
+            try:
+                for motor in ('memoria', 'sqlite'):
+                    if motor == 'sqlite':
+                        persistencia.NOMBRE_ARCHIVO_DATOS = ruta_sqlite
+                        servicios.convertir_formato_datos(persistencia.FORMATO_ARCHIVO_SQLITE)
+                    primera_pagina[motor] = (
+                        _cronometrar(lambda: utilidades.imprimir_tabla_paginada(
+                            servicios.listar_todos_los_items(), encabezados, paginar=True), repeticiones=3),
+                        _cronometrar(lambda: utilidades.imprimir_tabla_paginada(
+                            servicios.iterar_items_por_bloques(), encabezados, paginar=True)))
+                servicios.configurar_almacen(None)
+            finally:
+                utilidades._pedir_siguiente_pagina = pedir_pagina
+    finally:
+        os.remove(ruta)
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(ruta_sqlite + sufijo):
+                os.remove(ruta_sqlite + sufijo)
+
+    print(f"Ítems: {num_items}")
+    print(f"  Fila a fila (anterior):   {t_antigua * 1000:8.1f} ms")
+    print(f"  Muestra + bloques:        {t_nueva * 1000:8.1f} ms  (x{t_antigua / t_nueva:.1f})")
+    for motor, (t_lista, t_bloques) in primera_pagina.items():
+        print(f"  Primera página ({motor}): con la lista {t_lista * 1000:8.1f} ms, por bloques {t_bloques * 1000:6.2f} ms")
+
+
+def medir_exportacion(num_items: int = 1_000_000):
+    """
+    Mide la exportación en streaming (servicios.exportar_items_logica) del
+    listado completo y de un filtrado, a CSV y a JSONL: tiempo, filas/s,
+    tamaño del archivo y pico de memoria (en una segunda pasada con
+    tracemalloc, que la ralentiza).
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    base = ruta[:-len('.json')]
+    asignatura = sorted(servicios.ASIGNATURAS_ACTIVAS)[0]
+    casos = (('listado', {}), (f'asignatura={asignatura}', {'asignatura': asignatura}))
+    resultados = []
+    try:
+        for formato in (persistencia.FORMATO_EXPORTACION_CSV, persistencia.FORMATO_EXPORTACION_JSONL):
+            destino = f"{base}-exportado.{formato}"
+            for nombre, filtros in casos:
+                exportar = lambda: servicios.exportar_items_logica(destino, formato, **filtros)
+                inicio = time.perf_counter()
+                filas = exportar()
+                transcurrido = time.perf_counter() - inicio
+                tamano = os.path.getsize(destino)
+                _, pico = _pico_memoria(exportar)
+                resultados.append((formato, nombre, filas, transcurrido, tamano, pico))
+            os.remove(destino)
+    finally:
+        os.remove(ruta)
+
+    print(f"Ítems: {num_items}")
+    for formato, nombre, filas, transcurrido, tamano, pico in resultados:
+        print(f"  {formato:5s} {nombre:28s} {filas:8d} filas en {transcurrido:6.2f} s "
+              f"-> {filas / transcurrido:10,.0f} filas/s  {tamano / 2**20 / transcurrido:6.1f} MiB/s  "
+              f"pico {pico / 2**20:6.1f} MiB")
+
+
+def medir_estadisticas_notas(num_items: int = 1_000_000):
+    """
+    Mide servicios.obtener_estadisticas_notas (por asignatura y por alumno)
+    con el cálculo de respaldo (statistics/array) y con NumPy, recorriendo los
+    registros y sobre las columnas del almacén columnar.
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    resultados = []
+    motor_numpy = estadisticas.np
+    try:
+        for por in ('asignatura', 'alumno'):
+            estadisticas.np = None
+            t_estandar = _cronometrar(lambda: servicios.obtener_estadisticas_notas(por), repeticiones=1)
+            estadisticas.np = motor_numpy
+            t_numpy = t_columnas = None
+            if motor_numpy is not None:
+                t_numpy = _cronometrar(lambda: servicios.obtener_estadisticas_notas(por), repeticiones=3)
+                servicios.configurar_almacen_columnar(True)
+                t_columnas = _cronometrar(lambda: servicios.obtener_estadisticas_notas(por), repeticiones=3)
+                servicios.configurar_almacen_columnar(False)
+            resultados.append((por, t_estandar, t_numpy, t_columnas))
+    finally:
+        estadisticas.np = motor_numpy
+        os.remove(ruta)
+
+    print(f"Ítems: {num_items}")
+    for por, t_estandar, t_numpy, t_columnas in resultados:
+        linea = f"  por {por:10s} statistics/array {t_estandar * 1000:8.1f} ms"
+        if t_numpy is not None:
+            linea += f"  NumPy {t_numpy * 1000:8.1f} ms  NumPy + columnas {t_columnas * 1000:8.1f} ms"
+        print(linea)
+
+
+def medir_informe_paralelo(num_items: int = 2_000_000, procesos: int = 4):
+    """
+    Compara el informe global (conteo, medias y rankings) calculado en un solo
+    proceso y repartido entre 'procesos' procesos con memoria compartida,
+    recorriendo los registros y con el almacén columnar, con el informe del
+    menú (obtener_estadistica_agregada_asignaturas, obtener_mejor_peor_asignatura
+    y los dos rankings, que leen los agregados mantenidos al vuelo).
+    Comprueba que el reparto no cambia el resultado y muestra cuánto se
+    apartan las medias exactas de las de los agregados. Con menos CPUs que
+    procesos solo se mide el coste del reparto.
+    """
+    def informe_agregados():
+        estadistica = servicios.obtener_estadistica_agregada_asignaturas()
+        servicios.obtener_mejor_peor_asignatura()
+        return estadistica, servicios.obtener_ranking_asignaturas(), servicios.obtener_ranking_alumnos()
+
+    ruta = cargar_agenda_sintetica(num_items)
+    try:
+        t_agregados = _cronometrar(informe_agregados, repeticiones=3)
+        t_serie = _cronometrar(lambda: servicios.generar_informe_global(1), repeticiones=3)
+        t_paralelo = _cronometrar(lambda: servicios.generar_informe_global(procesos), repeticiones=3)
+        estadistica, ranking_asignaturas, ranking_alumnos = informe_agregados()
+        en_serie = servicios.generar_informe_global(1)
+        en_paralelo = servicios.generar_informe_global(procesos)
+        # Con el almacén columnar no hay que construir las columnas recorriendo los ítems
+        servicios.configurar_almacen_columnar(True)
+        t_serie_columnas = _cronometrar(lambda: servicios.generar_informe_global(1), repeticiones=3)
+        t_paralelo_columnas = _cronometrar(lambda: servicios.generar_informe_global(procesos), repeticiones=3)
+        servicios.configurar_almacen_columnar(False)
+    finally:
+        os.remove(ruta)
+
+    del en_serie['procesos']
+    usados = en_paralelo.pop('procesos')
+    # Diferencia máxima entre las medias exactas y las de los agregados
+    medias_agregados = {clave: media for clave, media in ranking_asignaturas}
+    medias_agregados.update((dni, media) for dni, _, media in ranking_alumnos)
+    diferencia = max(abs(media - medias_agregados[clave])
+                     for clave, media in en_serie['ranking_asignaturas'] + en_serie['ranking_alumnos'])
+    print(f"Ítems: {num_items}  CPUs: {os.cpu_count()}")
+    print(f"  {'agregados mantenidos (menú)':28s} {t_agregados * 1000:9.1f} ms")
+    print(f"  {'':28s} {'registros':>12s} {'columnas':>12s}")
+    print(f"  {'recuento, 1 proceso':28s} {t_serie * 1000:9.1f} ms {t_serie_columnas * 1000:9.1f} ms")
+    print(f"  {f'recuento, {usados} proceso(s)':28s} {t_paralelo * 1000:9.1f} ms {t_paralelo_columnas * 1000:9.1f} ms")
+    print(f"  1 proceso y {usados} proceso(s) idénticos: {en_serie == en_paralelo}")
+    por_asignatura = lambda filas: sorted(filas, key=lambda fila: fila['Asignatura'])
+    conteos_iguales = por_asignatura(en_serie['estadistica']) == por_asignatura(estadistica)
+    print(f"  Conteos iguales a los del menú: {conteos_iguales}")
+    print(f"  Diferencia máxima de medias con los agregados: {diferencia:.3g}")
+
+
+def medir_cache_consultas(num_items: int = 100_000, num_consultas: int = 2000, cambio_cada: int = 0):
+    """
+    Repite una mezcla de consultas (filtros por DNI y asignatura, medias,
+    estadística agregada) elegidas al azar entre un conjunto pequeño, con la
+    caché de consultas activa y desactivada, en memoria y con el almacén de
+    registros. Con 'cambio_cada' > 0 se edita una nota cada tantas consultas
+    (cada edición invalida la caché).
+    """
+    ruta = cargar_agenda_sintetica(num_items)
+    base = ruta[:-len('.json')]
+    generador = random.Random(7)
+    dnis = [f"{numero:08d}A" for numero in range(1, 41)]
+    asignaturas = sorted(servicios.ASIGNATURAS_ACTIVAS)
+    consultas = []
+    for _ in range(num_consultas):
+        tipo_consulta = generador.randrange(4)
+        if tipo_consulta == 0:
+            consultas.append((servicios.filtrar_items_logica, (generador.choice(dnis), generador.choice(asignaturas), None)))
+        elif tipo_consulta == 1:
+            consultas.append((servicios.calcular_media_alumno_asignatura, (generador.choice(dnis), generador.choice(asignaturas))))
+        elif tipo_consulta == 2:
+            consultas.append((servicios.calcular_media_general_asignatura, (generador.choice(asignaturas),)))
+        else:
+            consultas.append((servicios.obtener_estadistica_agregada_asignaturas, ()))
+
+    def ejecutar():
+        for numero, (consulta, argumentos) in enumerate(consultas, start=1):
+            consulta(*argumentos)
+            if cambio_cada and numero % cambio_cada == 0:
+                servicios.editar_puntuacion_logica(generador.randrange(1, num_items + 1), 5.0)
+
+    capacidad = servicios.TAMANO_CACHE_CONSULTAS
+    resultados = []
+    ruta_registros = base + persistencia.EXTENSION_REGISTROS
+    try:
+        for motor in ('memoria', 'registros'):
+            if motor == 'registros':
+                persistencia.NOMBRE_ARCHIVO_DATOS = ruta_registros
+                servicios.convertir_formato_datos(persistencia.FORMATO_ARCHIVO_REGISTROS)
+                servicios.cargar_datos_logica()
+            servicios.TAMANO_CACHE_CONSULTAS = 0
+            t_sin_cache = _cronometrar(ejecutar, repeticiones=1)
+            servicios.TAMANO_CACHE_CONSULTAS = capacidad
+            servicios.vaciar_cache_consultas()
+            t_con_cache = _cronometrar(ejecutar, repeticiones=1)
+            resultados.append((motor, t_sin_cache, t_con_cache, servicios.obtener_estadisticas_cache()))
+        servicios.configurar_almacen(None)
+    finally:
+        servicios.TAMANO_CACHE_CONSULTAS = capacidad
+        os.remove(ruta)
+        for sufijo in ('', '.idx', '.claves'):
+            if os.path.exists(ruta_registros + sufijo):
+                os.remove(ruta_registros + sufijo)
+
+    print(f"Ítems: {num_items}  consultas: {num_consultas}  edición cada: {cambio_cada or '-'}")
+    for motor, t_sin_cache, t_con_cache, contadores in resultados:
+        print(f"  {motor:9s} sin caché {t_sin_cache * 1000:8.1f} ms  con caché {t_con_cache * 1000:8.1f} ms  "
+              f"aciertos {contadores['aciertos']} / fallos {contadores['fallos']} "
+              f"({contadores['tasa_aciertos'] * 100:.1f} %)")
+
+
+# =================================================================
+#                               MAIN
+# =================================================================
+
+MEDICIONES = {
+    'memoria': medir_memoria_por_item,
+    'columnas': medir_estadisticas_columnares,
+    'importacion': medir_importacion,
+    'carga': medir_carga,
+    'guardado': medir_guardado,
+    'formatos': medir_formatos,
+    'almacenes': medir_almacenes,
+    'arranque': medir_arranque,
+    'concurrencia': medir_concurrencia,
+    'servidor': medir_servidor,
+    'tabla': medir_tabla,
+    'exportacion': medir_exportacion,
+    'notas': medir_estadisticas_notas,
+    'paralelo': medir_informe_paralelo,
+    'cache': medir_cache_consultas,
+}
+
+def main():
+    """Ejecuta la medición indicada en la línea de comandos."""
+    if len(sys.argv) < 2 or sys.argv[1] not in MEDICIONES:
+        print(f"Uso: python benchmarks.py <{'|'.join(MEDICIONES)}> [num_items]")
+        return
+
+    medicion = MEDICIONES[sys.argv[1]]
+    if len(sys.argv) > 2:
+        medicion(int(sys.argv[2]))
+    else:
+        medicion()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import threading
+from contextlib import contextmanager
+
+"""Cerrojo de lectura/escritura: varios lectores a la vez o un solo escritor"""
+
+
+class CerrojoLecturaEscritura:
+    """
+    Cerrojo que deja entrar a la vez a cualquier número de lectores, o a un
+    único escritor sin ningún lector.
+
+    - Prioridad de escritura: si hay un escritor esperando, los lectores
+      nuevos esperan detrás de él (una racha de consultas no lo deja sin turno).
+    - Reentrante: un hilo que ya lee puede volver a leer, y un hilo que
+      escribe puede volver a leer o a escribir, sin bloquearse a sí mismo.
+    - Un hilo que solo lee NO puede pasar a escribir (se bloquearía esperando
+      a que terminen los lectores, entre ellos él mismo): se lanza RuntimeError.
+
+    Uso:
+        with cerrojo.lectura(): ...
+        with cerrojo.escritura(): ...
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        # Lecturas en curso (de todos los hilos, contando las reentradas)
+        self._lectores = 0
+        # Identificador del hilo que escribe, o None
+        self._escritor = None
+        self._escritores_esperando = 0
+        # Lecturas que retiene el hilo actual (para las reentradas)
+        self._local = threading.local()
+
+    @contextmanager
+    def lectura(self):
+        """Retiene el cerrojo para leer mientras dura el bloque 'with'."""
+        # El escritor ya excluye a todos los demás: puede leer sin más
+        if self._escritor == threading.get_ident():
+            yield
+            return
+
+        lecturas_hilo = getattr(self._local, 'lecturas', 0)
+        with self._condicion:
+            # En una reentrada no se espera al escritor en cola (él nos espera a nosotros)
+            if lecturas_hilo == 0:
+                while self._escritor is not None or self._escritores_esperando:
+                    self._condicion.wait()
+            self._lectores += 1
+        self._local.lecturas = lecturas_hilo + 1
+
+        try:
+            yield
+        finally:
+            self._local.lecturas = lecturas_hilo
+            with self._condicion:
+                self._lectores -= 1
+                if self._lectores == 0:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        """
+        Retiene el cerrojo para escribir (en exclusiva) mientras dura el bloque 'with'.
+
+        :raises RuntimeError: Si el hilo retiene el cerrojo solo para leer.
+        """
+        yo = threading.get_ident()
+        if self._escritor == yo:
+            yield
+            return
+        if getattr(self._local, 'lecturas', 0):
+            raise RuntimeError("Un hilo que está leyendo no puede pasar a escribir.")
+
+        with self._condicion:
+            self._escritores_esperando += 1
+            while self._escritor is not None or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escritor = yo
+
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escritor = None
+                self._condicion.notify_all()
@@ -15,4 +15,15 @@ PREFIJOS = {
     "ERROR": f"{C_ROJO}{C_FIN}",
     "INFO": f"{C_AMARILLO}{C_FIN}",
     "ALERTA": f"{C_ROJO}{C_FIN}"
-}
\ No newline at end of file
+}
+
+def desactivar_colores():
+    """
+    Deja vacías todas las constantes de color (para salidas que no son una
+    terminal, como el modo por lotes). Los módulos leen colores.C_* en cada
+    print, así que el cambio afecta a todo el programa.
+    """
+    global C_FIN, C_NEGRO, C_ROJO, C_VERDE, C_AMARILLO, C_MORADO, C_MAGENTA, C_CYAN, C_BLANCO
+    C_FIN = C_NEGRO = C_ROJO = C_VERDE = C_AMARILLO = C_MORADO = C_MAGENTA = C_CYAN = C_BLANCO = ''
+    for clave in PREFIJOS:
+        PREFIJOS[clave] = ''
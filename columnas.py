@@ -0,0 +1,155 @@
+from array import array
+import math
+
+# NumPy es opcional: si está instalado, los cálculos se hacen sobre los mismos
+# buffers sin copiarlos; si no, con bucles sobre los arrays de la librería estándar.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Almacén columnar en memoria: una columna contigua por campo, paralela a DATOS_AGENDA"""
+
+# Código de asignatura reservado para las posiciones borradas (lápidas)
+CODIGO_HUECO = 255
+
+
+class AlmacenColumnar:
+    """
+    Guarda los campos numéricos de los ítems en arrays contiguos, uno por campo
+    (columnas), con la MISMA posición que el ítem tiene en DATOS_AGENDA.
+
+    - ids:          array('q')  id del ítem (0 en las lápidas)
+    - notas:        array('d')  nota (NaN = sin nota)
+    - asignaturas:  array('B')  código en ASIGNATURAS_PERMITIDAS (CODIGO_HUECO en las lápidas)
+    - tipos:        array('B')  código en TIPOS_VALIDOS
+    - alumnos:      array('I')  código del alumno en la tabla 'dnis'
+    """
+
+    def __init__(self):
+        self.ids = array('q')
+        self.notas = array('d')
+        self.asignaturas = array('B')
+        self.tipos = array('B')
+        self.alumnos = array('I')
+
+        # Tabla de alumnos: código -> DNI en mayúsculas, y su inversa
+        self.dnis = []
+        self._codigos_dni = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # =================================================================
+    # 1. MANTENIMIENTO (llamado desde servicios en cada alta, baja y edición)
+    # =================================================================
+
+    def codigo_alumno(self, dni: str) -> int | None:
+        """
+        Devuelve el código de un alumno o None si nunca ha tenido ítems.
+
+        :param dni: DNI del alumno (case-insensitive).
+        """
+        return self._codigos_dni.get(dni.strip().upper())
+
+    def anadir(self, item):
+        """
+        Añade un ítem al final de las columnas.
+
+        :param item: Registro ItemAgenda recién añadido al final de DATOS_AGENDA.
+        """
+        dni_upper = item.dni.upper()
+        codigo = self._codigos_dni.get(dni_upper)
+        if codigo is None:
+            codigo = len(self.dnis)
+            self._codigos_dni[dni_upper] = codigo
+            self.dnis.append(dni_upper)
+
+        self.ids.append(item.id)
+        self.notas.append(math.nan if item.nota is None else item.nota)
+        self.asignaturas.append(item.cod_asignatura)
+        self.tipos.append(item.cod_tipo)
+        self.alumnos.append(codigo)
+
+    def marcar_hueco(self, posicion: int):
+        """
+        Marca una posición como lápida (ítem eliminado) sin desplazar las columnas.
+
+        :param posicion: Posición del ítem en DATOS_AGENDA.
+        """
+        self.ids[posicion] = 0
+        self.notas[posicion] = math.nan
+        self.asignaturas[posicion] = CODIGO_HUECO
+
+    def editar_nota(self, posicion: int, nota: float | None):
+        """
+        Cambia la nota de una posición.
+
+        :param posicion: Posición del ítem en DATOS_AGENDA.
+        :param nota: Nueva nota (None = sin nota).
+        """
+        self.notas[posicion] = math.nan if nota is None else nota
+
+    def compactar(self):
+        """
+        Elimina las lápidas, igual que la compactación de DATOS_AGENDA
+        (se conserva el orden, así que las posiciones siguen alineadas).
+        """
+        vivos = [posicion for posicion, codigo in enumerate(self.asignaturas) if codigo != CODIGO_HUECO]
+
+        self.ids = array('q', (self.ids[p] for p in vivos))
+        self.notas = array('d', (self.notas[p] for p in vivos))
+        self.asignaturas = array('B', (self.asignaturas[p] for p in vivos))
+        self.tipos = array('B', (self.tipos[p] for p in vivos))
+        self.alumnos = array('I', (self.alumnos[p] for p in vivos))
+
+    def vaciar(self):
+        """Deja el almacén vacío (antes de una reconstrucción completa)."""
+        self.__init__()
+
+    # =================================================================
+    # 2. CONSULTAS ANALÍTICAS (bucles sobre buffers contiguos o NumPy)
+    # =================================================================
+
+    def conteo_por_asignatura_y_tipo(self, num_asignaturas: int, num_tipos: int) -> list[list[int]]:
+        """
+        Cuenta los ítems vivos de cada (asignatura, tipo) en una sola pasada.
+
+        :return: Matriz conteos[codigo_asignatura][codigo_tipo].
+        """
+        if np is not None and len(self):
+            asignaturas = np.frombuffer(self.asignaturas, dtype=np.uint8)
+            tipos = np.frombuffer(self.tipos, dtype=np.uint8)
+            vivos = asignaturas != CODIGO_HUECO
+            celdas = asignaturas[vivos].astype(np.int64) * num_tipos + tipos[vivos]
+            planos = np.bincount(celdas, minlength=num_asignaturas * num_tipos).tolist()
+            return [planos[a * num_tipos:(a + 1) * num_tipos] for a in range(num_asignaturas)]
+
+        conteos = [[0] * num_tipos for _ in range(num_asignaturas)]
+        for codigo_asig, codigo_tipo in zip(self.asignaturas, self.tipos):
+            if codigo_asig != CODIGO_HUECO:
+                conteos[codigo_asig][codigo_tipo] += 1
+        return conteos
+
+    def sumas_por_asignatura(self, num_asignaturas: int) -> tuple[list[float], list[int]]:
+        """
+        Suma y cuenta las notas (no NaN) de cada asignatura en una sola pasada.
+
+        :return: Tupla (sumas, cuentas), indexadas por código de asignatura.
+        """
+        if np is not None and len(self):
+            asignaturas = np.frombuffer(self.asignaturas, dtype=np.uint8)
+            notas = np.frombuffer(self.notas, dtype=np.float64)
+            con_nota = ~np.isnan(notas)
+            sumas = np.bincount(asignaturas[con_nota], weights=notas[con_nota], minlength=num_asignaturas)
+            cuentas = np.bincount(asignaturas[con_nota], minlength=num_asignaturas)
+            return sumas[:num_asignaturas].tolist(), cuentas[:num_asignaturas].tolist()
+
+        sumas = [0.0] * num_asignaturas
+        cuentas = [0] * num_asignaturas
+        for codigo_asig, nota in zip(self.asignaturas, self.notas):
+            # NaN != NaN: así se descartan las notas vacías (y las lápidas)
+            if nota == nota:
+                sumas[codigo_asig] += nota
+                cuentas[codigo_asig] += 1
+        return sumas, cuentas
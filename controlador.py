@@ -1,26 +1,34 @@
+import itertools
+import os
 import re
 import utilidades
 import colores
 import persistencia
+import autoguardado
+import estadisticas
 from persistencia import NOMBRE_ARCHIVO_DATOS
 import servicios     # Para el motor de la lógica y estructuras (altas, bajas, buscar_por_dni, etc.)
 from servicios import (
-    ASIGNATURAS_PERMITIDAS, TIPOS_VALIDOS, RANGOS_NOTA, DATOS_AGENDA,
-    buscar_nombre_por_dni, alta_item_logica, listar_todos_los_items,
-    eliminar_item_logica, buscar_items_por_dni, buscar_por_id,
-    editar_puntuacion_logica, filtrar_items_logica,
+    ASIGNATURAS_PERMITIDAS, TIPOS_VALIDOS, RANGOS_NOTA, contar_items,
+    buscar_nombre_por_dni, alta_item_logica,
+    eliminar_item_logica, eliminar_items_asignatura, buscar_items_por_dni, buscar_por_id,
+    editar_puntuacion_logica,
     calcular_media_alumno_asignatura, calcular_media_general_asignatura,
     obtener_mejor_peor_asignatura, obtener_estadistica_agregada_asignaturas,
-    guardar_datos_logica, cargar_datos_logica
+    obtener_ranking_asignaturas, obtener_ranking_alumnos,
+    guardar_datos_logica, cargar_datos_logica, alta_items_bulk, hay_cambios_sin_guardar,
+    PATRON_DNI, PATRON_NOMBRE
 )
 
 # =================================================================
 # 4. ORQUESTACIÓN GESTORA (Llamadas a utilidades.py y a Lógica Pura)
 # =================================================================
 
-# Definimos los patrones de validación aquí para que sean fáciles de modificar
-PATRON_DNI = r"^\d{8}[A-Za-z]$"
-PATRON_NOMBRE = r"^[A-Za-zÁÉÍÓÚáéíóúñÑ ]+$"
+# Número de alumnos que se muestran en el ranking de los informes
+TOP_ALUMNOS_INFORME = 5
+
+# Número máximo de errores que se muestran tras una importación
+MAX_ERRORES_IMPORTACION = 20
 
 def iniciar_carga_automatica():
     """
@@ -30,7 +38,12 @@ def iniciar_carga_automatica():
     # Llama a la lógica pura. Si devuelve True, es que cargó datos.
     if cargar_datos_logica():
         # Usamos la impresión con color para avisar al usuario
-        print(f"{colores.C_AMARILLO}\n Datos cargados automáticamente desde '{NOMBRE_ARCHIVO_DATOS}'.{colores.C_FIN}")
+        if servicios.es_carga_diferida():
+            # Almacén en disco: solo se han leído la cabecera y los índices
+            print(f"{colores.C_AMARILLO}\n Agenda abierta en modo diferido desde '{NOMBRE_ARCHIVO_DATOS}' "
+                  f"({contar_items()} ítems, se leen del disco al consultarlos).{colores.C_FIN}")
+        else:
+            print(f"{colores.C_AMARILLO}\n Datos cargados automáticamente desde '{NOMBRE_ARCHIVO_DATOS}'.{colores.C_FIN}")
         
     # Si devuelve False, significa que el archivo no existe o hubo un error, 
     # y el programa simplemente arranca con la agenda vacía, que es lo que queremos.
@@ -149,19 +162,44 @@ def gestionar_listado():
     """
     Orquesta la obtención y la impresión del listado completo.
     """
-    # 1. Obtener la lista de datos de la lógica pura
-    datos = listar_todos_los_items()
+    # 1. Recorrido por bloques de la lógica pura (no se construye la lista entera)
+    datos = servicios.iterar_items_por_bloques()
     
     # 2. Definir los encabezados de la tabla y su orden
     encabezados = ['id', 'dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota']
 
     print(f"{colores.C_MORADO}\n--- LISTADO COMPLETO DE ÍTEMS ---{colores.C_FIN}")
 
-    # 3. Llamar a la utilidad para imprimir con formato tabular legible
-    utilidades.imprimir_tabla(datos, encabezados)
+    # 3. Imprimir por páginas (o por bloques si la salida no es una terminal)
+    utilidades.imprimir_tabla_paginada(datos, encabezados)
 
 
 def gestionar_eliminacion():
+    """
+    Función auxiliar (submenú) para elegir entre eliminar un ítem o una asignatura completa.
+    """
+    opcion = -1
+    
+    # Bucle de submenú (controlado por variable, sin break)
+    while opcion != 0:
+        print(f"{colores.C_MORADO}\n--- ELIMINAR ÍTEMS ---{colores.C_FIN}")
+        print("1. Eliminar un ítem por ID")
+        print("2. Eliminar todos los ítems de una asignatura")
+        print("0. Volver al menú principal")
+
+        opcion = utilidades.pedir_entero_obligatorio(f"Selecciona una opción: {colores.C_FIN}")
+
+        if opcion == 1:
+            _gestionar_eliminacion_item()
+        elif opcion == 2:
+            _gestionar_eliminacion_asignatura()
+        elif opcion == 0:
+            print(f"{colores.C_AMARILLO}Volviendo al menú principal...{colores.C_FIN}")
+        else:
+            print(f"{colores.C_ROJO}Opción no válida.{colores.C_FIN}")
+
+
+def _gestionar_eliminacion_item():
     """
     Orquesta la eliminación de un ítem por ID.
     """
@@ -181,6 +219,29 @@ def gestionar_eliminacion():
         print(f"{colores.C_AMARILLO}Eliminación cancelada.{colores.C_FIN}")
 
 
+def _gestionar_eliminacion_asignatura():
+    """
+    Orquesta la eliminación de todos los ítems de una asignatura (con confirmación).
+    """
+    print(f"{colores.C_MORADO}\n--- ELIMINAR ASIGNATURA COMPLETA ---{colores.C_FIN}")
+    
+    asignatura = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Asignatura a vaciar (ENTER para cancelar): {colores.C_FIN}")
+    
+    if asignatura is not None:
+        confirmacion = utilidades.pedir_cadena_no_vacia(f"{colores.C_AMARILLO}ATENCIÓN: Se eliminarán TODOS los ítems de '{asignatura.upper()}'. ¿Continuar? (S/N): {colores.C_FIN}")
+        
+        if confirmacion is not None and confirmacion.upper() == 'S':
+            eliminados = eliminar_items_asignatura(asignatura)
+            if eliminados > 0:
+                print(f"{colores.C_VERDE}\nSe eliminaron {eliminados} ítems de '{asignatura.upper()}'.{colores.C_FIN}")
+            else:
+                print(f"{colores.C_ROJO}Error: No hay ítems registrados en la asignatura '{asignatura}'.{colores.C_FIN}")
+        else:
+            print(f"{colores.C_AMARILLO}Eliminación cancelada.{colores.C_FIN}")
+    else:
+        print(f"{colores.C_AMARILLO}Eliminación cancelada.{colores.C_FIN}")
+
+
 def gestionar_editar_puntuacion():
     """
     Orquesta la edición de la puntuación.
@@ -247,18 +308,53 @@ def gestionar_filtrado_busqueda():
     filtro_asig = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Filtrar por Asignatura: {colores.C_FIN}")
     filtro_tipo = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Filtrar por Tipo (Tarea/Examen): {colores.C_FIN}")
 
-    # 2. Llamar a la Lógica Pura con los filtros
-    resultados = filtrar_items_logica(filtro_dni, filtro_asig, filtro_tipo)
+    # 2. Llamar a la Lógica Pura con los filtros (recorrido por bloques, sin lista entera)
+    resultados = servicios.iterar_items_por_bloques(filtro_dni, filtro_asig, filtro_tipo)
+    primero = next(resultados, None)
 
-    # 3. Imprimir los resultados
-    if resultados:
-        print(f"{colores.C_MORADO}\nResultados encontrados ({len(resultados)}):{colores.C_FIN}")
+    # 3. Imprimir los resultados según llegan; el total se conoce al terminar
+    if primero is not None:
+        print(f"{colores.C_MORADO}\nResultados encontrados:{colores.C_FIN}")
         encabezados = ['id', 'dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota']
-        utilidades.imprimir_tabla(resultados, encabezados)
+        impresas = utilidades.imprimir_tabla_paginada(itertools.chain([primero], resultados), encabezados)
+        print(f"{colores.C_MORADO}Ítems mostrados: {impresas}{colores.C_FIN}")
     else:
         print(f"{colores.C_ROJO}\nNo se encontraron ítems que coincidan con esos criterios de búsqueda.{colores.C_FIN}")
 
 
+def _mostrar_estadisticas_notas(por: str):
+    """
+    Muestra el resumen estadístico y el histograma de notas por asignatura o por alumno.
+
+    :param por: 'asignatura' o 'alumno'.
+    """
+    informe = servicios.obtener_estadisticas_notas(por)
+    if not informe:
+        print(f"{colores.C_AMARILLO}\nTodavía no hay notas registradas.{colores.C_FIN}")
+        return
+
+    if por == 'asignatura':
+        columna, clave = 'Asignatura', 'asignatura'
+        for fila in informe:
+            fila['asignatura'] = fila['asignatura'].capitalize()
+    else:
+        columna, clave = 'DNI', 'dni'
+
+    print(f"{colores.C_MORADO}\n-- Estadística de notas por {columna} (aprobado: nota >= {estadisticas.NOTA_APROBADO:g}) --{colores.C_FIN}")
+    encabezados = estadisticas.encabezados_resumen(columna)
+    if por == 'alumno':
+        encabezados.insert(1, 'Nombre')
+    filas = estadisticas.tabla_resumen(informe, columna, clave)
+    if por == 'alumno':
+        for fila_tabla, fila in zip(filas, informe):
+            fila_tabla['Nombre'] = fila['nombre']
+    # Por alumno puede haber miles de filas: se pagina
+    utilidades.imprimir_tabla_paginada(filas, encabezados)
+
+    print(f"{colores.C_MORADO}\n-- Histograma de notas por {columna} --{colores.C_FIN}")
+    utilidades.imprimir_tabla_paginada(estadisticas.tabla_histograma(informe, columna, clave, RANGOS_NOTA[1]),
+                                       estadisticas.encabezados_histograma(columna, RANGOS_NOTA[1]))
+
 def _gestionar_informes_medias():
     """Función auxiliar (submenú) para gestionar los cálculos de medias."""
     
@@ -269,6 +365,8 @@ def _gestionar_informes_medias():
         print(f"{colores.C_MORADO}\n--- Submenú de Medias ---")
         print("1. Ver media por Alumno y Asignatura")
         print("2. Ver media General por Asignatura")
+        print("3. Estadística de notas por Asignatura (mediana, desviación, percentiles, aprobados, histograma)")
+        print("4. Estadística de notas por Alumno")
         print(f"0. Volver al menú de Informes{colores.C_FIN}")
 
         opcion_media = utilidades.pedir_entero_obligatorio(f"{colores.C_MORADO}Selecciona un cálculo: {colores.C_FIN}")
@@ -302,6 +400,12 @@ def _gestionar_informes_medias():
             else:
                 print(f"{colores.C_AMARILLO}Operación cancelada.{colores.C_FIN}")
 
+        elif opcion_media == 3:
+            _mostrar_estadisticas_notas('asignatura')
+
+        elif opcion_media == 4:
+            _mostrar_estadisticas_notas('alumno')
+
         elif opcion_media == 0:
             print(f"{colores.C_MORADO}\nVolviendo al menú de Informes...{colores.C_FIN}")
 
@@ -333,6 +437,21 @@ def gestionar_informes():
 
         print(f"{colores.C_VERDE}Mejor Asignatura: {mejor_asig.capitalize()} (Media: {mejor_media:.2f}){colores.C_FIN}")
         print(f"{colores.C_MAGENTA}Peor Asignatura: {peor_asig.capitalize()} (Media: {peor_media:.2f}){colores.C_FIN}")
+        
+        # Ranking completo de asignaturas
+        datos_ranking = [
+            {'Puesto': puesto, 'Asignatura': asig.capitalize(), 'Media': f"{media:.2f}"}
+            for puesto, (asig, media) in enumerate(obtener_ranking_asignaturas(), start=1)
+        ]
+        utilidades.imprimir_tabla(datos_ranking, ['Puesto', 'Asignatura', 'Media'])
+        
+        # 4. Mejores alumnos por media global
+        print(f"{colores.C_MORADO}\n--- Top {TOP_ALUMNOS_INFORME} Alumnos (Según Media Global) ---{colores.C_FIN}")
+        datos_alumnos = [
+            {'Puesto': puesto, 'DNI': dni, 'Nombre': nombre, 'Media': f"{media:.2f}"}
+            for puesto, (dni, nombre, media) in enumerate(obtener_ranking_alumnos(TOP_ALUMNOS_INFORME), start=1)
+        ]
+        utilidades.imprimir_tabla(datos_alumnos, ['Puesto', 'DNI', 'Nombre', 'Media'])
     else:
         print(f"{colores.C_AMARILLO}\nNo hay suficientes datos de notas para calcular un ranking.{colores.C_FIN}")
 
@@ -347,6 +466,11 @@ def gestionar_menu_guardar_cargar():
         print(f"{colores.C_MORADO}\n--- Persistencia de Datos ---{colores.C_FIN}")
         print("1. Guardar datos actuales")
         print("2. Sobreescribir datos del archivo (se perderán los datos en memoria)")
+        print("3. Importar ítems desde un archivo CSV o JSONL")
+        print("4. Cambiar el formato del archivo de datos (JSON / JSONL / binario / SQLite / registros)")
+        estado = "activado" if autoguardado.autoguardado_activo() else "desactivado"
+        print(f"5. Activar/desactivar el guardado automático (ahora: {estado})")
+        print("6. Exportar listado, filtrado o estadística a CSV / JSONL")
         print("0. Volver al menú principal")
 
         opcion = utilidades.pedir_entero_obligatorio(f"Selecciona una opción: {colores.C_FIN}")
@@ -355,6 +479,14 @@ def gestionar_menu_guardar_cargar():
             gestionar_guardar()
         elif opcion == 2:
             gestionar_cargar()
+        elif opcion == 3:
+            gestionar_importacion()
+        elif opcion == 4:
+            gestionar_conversion_formato()
+        elif opcion == 5:
+            gestionar_autoguardado()
+        elif opcion == 6:
+            gestionar_exportacion()
         elif opcion == 0:
             print(f"{colores.C_AMARILLO}Volviendo al menú principal...{colores.C_FIN}")
         else:
@@ -366,13 +498,29 @@ def gestionar_guardar():
     Orquesta el proceso de guardado de datos.
     """
     print(f"{colores.C_MORADO}\n--- GUARDAR DATOS ---{colores.C_FIN}")
-    if DATOS_AGENDA:
+    # Si nada ha cambiado desde el último guardado o carga, no se reescribe el archivo
+    if hay_cambios_sin_guardar():
         if guardar_datos_logica():
             print(f"{colores.C_VERDE} Datos guardados con éxito en '{NOMBRE_ARCHIVO_DATOS}'.{colores.C_FIN}")
         else:
             print(f"{colores.C_ROJO} No se pudieron guardar los datos. Revisa la consola para errores.{colores.C_FIN}")
     else:
-        print(f"{colores.C_AMARILLO} No hay datos para guardar.{colores.C_FIN}")
+        print(f"{colores.C_AMARILLO} No hay cambios sin guardar.{colores.C_FIN}")
+
+        
+def gestionar_autoguardado():
+    """
+    Activa o desactiva el guardado automático en segundo plano: tras cada
+    cambio, y pasados unos segundos sin cambios nuevos, se guarda sin esperar
+    a la opción de guardar ni a la salida.
+    """
+    if autoguardado.autoguardado_activo():
+        autoguardado.detener_autoguardado()
+        print(f"{colores.C_AMARILLO} Guardado automático desactivado.{colores.C_FIN}")
+    else:
+        autoguardado.iniciar_autoguardado()
+        print(f"{colores.C_VERDE} Guardado automático activado: se guarda tras "
+              f"{autoguardado.ESPERA_INACTIVIDAD:g} s sin cambios.{colores.C_FIN}")
 
         
 def gestionar_cargar():
@@ -380,7 +528,7 @@ def gestionar_cargar():
     Orquesta el proceso de carga de datos.
     """
     print(f"{colores.C_MORADO}\n--- SOBREESCRIBIR DATOS ---{colores.C_FIN}")
-    if DATOS_AGENDA:
+    if contar_items() > 0:
         # Advertencia al usuario si va a sobrescribir
         confirmacion = utilidades.pedir_cadena_no_vacia(f"{colores.C_AMARILLO}ATENCIÓN: Al cargar, se perderán los datos actuales en memoria. ¿Continuar? (S/N):  {colores.C_FIN}")
         if confirmacion is None or confirmacion.upper() != 'S':
@@ -391,4 +539,127 @@ def gestionar_cargar():
         print(f"{colores.C_VERDE} Datos cargados con éxito desde '{NOMBRE_ARCHIVO_DATOS}'.{colores.C_FIN}")
     else:
         # Si el archivo no existe, la lógica pura devuelve False
-        print(f"{colores.C_ROJO} No se encontró el archivo '{NOMBRE_ARCHIVO_DATOS}' o la carga falló. Se inicia con datos vacíos.{colores.C_FIN}")
\ No newline at end of file
+        print(f"{colores.C_ROJO} No se encontró el archivo '{NOMBRE_ARCHIVO_DATOS}' o la carga falló. Se inicia con datos vacíos.{colores.C_FIN}")
+
+
+def gestionar_conversion_formato():
+    """
+    Orquesta el cambio de formato del archivo de datos. La agenda en memoria
+    se guarda completa en el formato elegido, que se detecta al cargar.
+    """
+    formatos = {
+        1: persistencia.FORMATO_ARCHIVO_JSON,
+        2: persistencia.FORMATO_ARCHIVO_JSONL,
+        3: persistencia.FORMATO_ARCHIVO_BINARIO,
+        4: persistencia.FORMATO_ARCHIVO_SQLITE,
+        5: persistencia.FORMATO_ARCHIVO_REGISTROS
+    }
+    
+    print(f"{colores.C_MORADO}\n--- CAMBIAR FORMATO DEL ARCHIVO DE DATOS ---{colores.C_FIN}")
+    print(f"Formato actual: {persistencia.detectar_formato()}")
+    print("1. JSON (legible)")
+    print("2. JSON Lines (un ítem por línea)")
+    print("3. Binario (carga y guardado más rápidos)")
+    print("4. SQLite (consultas en disco, sin cargar la agenda en memoria)")
+    print("5. Registros de ancho fijo (apertura diferida: búsquedas y ediciones directas en disco)")
+    opcion = utilidades.pedir_entero_obligatorio("Selecciona el nuevo formato: ")
+    
+    if opcion not in formatos:
+        print(f"{colores.C_ROJO}Opción no válida.{colores.C_FIN}")
+        return
+    
+    if servicios.convertir_formato_datos(formatos[opcion]):
+        print(f"{colores.C_VERDE} Datos guardados en formato {formatos[opcion]} en '{NOMBRE_ARCHIVO_DATOS}'.{colores.C_FIN}")
+    else:
+        print(f"{colores.C_ROJO} No se pudo cambiar el formato. Revisa la consola para errores.{colores.C_FIN}")
+
+
+def gestionar_exportacion():
+    """
+    Orquesta la exportación a un archivo CSV o JSONL del listado completo, de
+    un filtrado o de la estadística agregada por asignatura. Los ítems se
+    escriben en streaming (ver servicios.exportar_items_logica).
+    """
+    print(f"{colores.C_MORADO}\n--- EXPORTAR RESULTADOS ---{colores.C_FIN}")
+    print("1. Listado completo")
+    print("2. Ítems filtrados (DNI / Asignatura / Tipo)")
+    print("3. Estadística agregada por asignatura")
+    que = utilidades.pedir_entero_opcional(f"{colores.C_MORADO}¿Qué quieres exportar? (ENTER para cancelar): {colores.C_FIN}")
+
+    if que not in (1, 2, 3):
+        if que is not None:
+            print(f"{colores.C_ROJO}Opción no válida.{colores.C_FIN}")
+        print(f"{colores.C_AMARILLO}Exportación cancelada.{colores.C_FIN}")
+        return
+
+    # 1. Filtros (solo para la opción 2; un campo vacío no filtra)
+    filtro_dni = filtro_asig = filtro_tipo = None
+    if que == 2:
+        filtro_dni = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Filtrar por DNI: {colores.C_FIN}")
+        filtro_asig = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Filtrar por Asignatura: {colores.C_FIN}")
+        filtro_tipo = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Filtrar por Tipo (Tarea/Examen): {colores.C_FIN}")
+
+    # 2. Archivo de destino: el formato se elige por la extensión
+    ruta = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Ruta del archivo (.csv / .jsonl, ENTER para cancelar): {colores.C_FIN}")
+    if ruta is None:
+        print(f"{colores.C_AMARILLO}Exportación cancelada.{colores.C_FIN}")
+        return
+
+    formato = persistencia.formato_exportacion(ruta)
+    if formato is None:
+        extension = os.path.splitext(ruta)[1].lower()
+        print(f"{colores.C_ROJO}Error: Extensión '{extension}' no soportada. Usa .csv o .jsonl.{colores.C_FIN}")
+        return
+
+    # 3. Exportación
+    if que == 3:
+        exportadas = servicios.exportar_estadistica_asignaturas(ruta, formato)
+    else:
+        exportadas = servicios.exportar_items_logica(ruta, formato, filtro_dni, filtro_asig, filtro_tipo)
+
+    if exportadas is None:
+        print(f"{colores.C_ROJO}No se pudo escribir '{ruta}'. Revisa la consola para errores.{colores.C_FIN}")
+    else:
+        print(f"{colores.C_VERDE}Se exportaron {exportadas} filas a '{ruta}'.{colores.C_FIN}")
+
+
+def gestionar_importacion():
+    """
+    Orquesta la importación masiva de ítems desde un archivo CSV o JSONL.
+    El archivo se lee en streaming y se da de alta en bloque (alta_items_bulk).
+    """
+    print(f"{colores.C_MORADO}\n--- IMPORTAR ÍTEMS ---{colores.C_FIN}")
+    print(f"{colores.C_MORADO}Formato CSV: cabecera dni,nombre,asignatura,tipo,desc,nota. Formato JSONL: un objeto por línea.{colores.C_FIN}")
+    
+    ruta = utilidades.pedir_cadena_no_vacia(f"{colores.C_MORADO}Ruta del archivo (.csv / .jsonl, ENTER para cancelar): {colores.C_FIN}")
+    
+    if ruta is None:
+        print(f"{colores.C_AMARILLO}Importación cancelada.{colores.C_FIN}")
+        return
+    
+    # 1. Elegimos el lector según la extensión
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        registros = persistencia.leer_registros_csv(ruta)
+    elif extension in ('.jsonl', '.ndjson'):
+        registros = persistencia.leer_registros_jsonl(ruta)
+    else:
+        print(f"{colores.C_ROJO}Error: Extensión '{extension}' no soportada. Usa .csv o .jsonl.{colores.C_FIN}")
+        return
+    
+    # 2. Alta en bloque (la lectura del archivo ocurre aquí, fila a fila)
+    try:
+        informe = alta_items_bulk(registros)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"{colores.C_ROJO}Error al leer '{ruta}': {e}{colores.C_FIN}")
+        return
+    
+    # 3. Informe del resultado
+    if informe['insertados'] > 0:
+        print(f"{colores.C_VERDE}\nSe importaron {informe['insertados']} ítems (IDs {informe['primer_id']}-{informe['ultimo_id']}).{colores.C_FIN}")
+    else:
+        print(f"{colores.C_AMARILLO}\nNo se importó ningún ítem.{colores.C_FIN}")
+    
+    if informe['errores']:
+        print(f"{colores.C_ROJO}Se descartaron {len(informe['errores'])} registros con errores (se muestran los {MAX_ERRORES_IMPORTACION} primeros):{colores.C_FIN}")
+        utilidades.imprimir_tabla(informe['errores'][:MAX_ERRORES_IMPORTACION], ['posicion', 'motivo'])
@@ -0,0 +1,226 @@
+from array import array
+import math
+import statistics
+
+# NumPy es opcional: con él, todos los grupos se calculan a la vez con
+# operaciones vectoriales; sin él, se agrupa en una pasada y cada grupo se
+# resume con el módulo 'statistics'. Ambos caminos dan los mismos resultados.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Estadística descriptiva de las notas agrupadas (por asignatura, por alumno...)"""
+
+# =================================================================
+# 1. PARÁMETROS
+# =================================================================
+
+# Nota mínima para aprobar
+NOTA_APROBADO = 5.0
+
+# Percentiles que se calculan, además de la mediana (interpolación lineal entre las notas ordenadas)
+PERCENTILES = (10, 25, 75, 90)
+
+# Intervalos del histograma, de ancho igual entre 0 y la nota máxima:
+# [0, 1), [1, 2), ..., [9, 10] (la nota máxima cuenta en el último)
+NUM_INTERVALOS_HISTOGRAMA = 10
+
+
+# =================================================================
+# 2. CÁLCULO POR GRUPOS
+# =================================================================
+
+def estadisticas_por_grupo(grupos, notas, num_grupos: int, nota_maxima: float = 10.0) -> list[dict | None]:
+    """
+    Calcula, en una sola pasada por lotes, las estadísticas de las notas de
+    cada grupo: número de notas, media, mediana, desviación típica
+    (poblacional), mínima, máxima, percentiles, proporción de aprobados e
+    histograma.
+
+    :param grupos: Secuencia de códigos de grupo (0..num_grupos-1), uno por nota (p. ej. array('I')).
+    :param notas: Secuencia paralela de notas (NaN = sin nota, se descarta), p. ej. array('d').
+    :param num_grupos: Número de grupos; los códigos fuera de rango se descartan.
+    :param nota_maxima: Límite superior de las notas (para los intervalos del histograma).
+    :return: Lista indexada por código de grupo: None si el grupo no tiene notas, o un
+             diccionario {'num_notas', 'media', 'mediana', 'desviacion', 'minima', 'maxima',
+             'percentiles' {'p25': ...}, 'tasa_aprobados', 'histograma' [conteos]}.
+    """
+    if num_grupos == 0:
+        return []
+    if np is not None:
+        return _estadisticas_numpy(grupos, notas, num_grupos, nota_maxima)
+    return _estadisticas_estandar(grupos, notas, num_grupos, nota_maxima)
+
+def _intervalo_histograma(nota: float, nota_maxima: float) -> int:
+    """Intervalo del histograma de una nota (la nota máxima va al último)."""
+    return min(max(int(nota / nota_maxima * NUM_INTERVALOS_HISTOGRAMA), 0), NUM_INTERVALOS_HISTOGRAMA - 1)
+
+def _percentil(ordenadas: list[float], percentil: float) -> float:
+    """
+    Percentil por interpolación lineal (el método por defecto de NumPy).
+
+    :param ordenadas: Notas del grupo ordenadas de menor a mayor (al menos una).
+    :param percentil: Entre 0 y 100.
+    """
+    posicion = (len(ordenadas) - 1) * percentil / 100
+    inferior = math.floor(posicion)
+    superior = min(inferior + 1, len(ordenadas) - 1)
+    return ordenadas[inferior] + (ordenadas[superior] - ordenadas[inferior]) * (posicion - inferior)
+
+def _estadisticas_estandar(grupos, notas, num_grupos: int, nota_maxima: float) -> list[dict | None]:
+    """Cálculo sin NumPy: agrupa las notas en una pasada y resume cada grupo con 'statistics'."""
+    por_grupo = [array('d') for _ in range(num_grupos)]
+    for codigo, nota in zip(grupos, notas):
+        # NaN != NaN: así se descartan las notas vacías
+        if nota == nota and 0 <= codigo < num_grupos:
+            por_grupo[codigo].append(nota)
+
+    resultados = []
+    for valores in por_grupo:
+        if not valores:
+            resultados.append(None)
+            continue
+
+        ordenadas = sorted(valores)
+        media = statistics.fmean(ordenadas)
+        histograma = [0] * NUM_INTERVALOS_HISTOGRAMA
+        for nota in ordenadas:
+            histograma[_intervalo_histograma(nota, nota_maxima)] += 1
+
+        resultados.append({
+            'num_notas': len(ordenadas),
+            'media': media,
+            'mediana': statistics.median(ordenadas),
+            'desviacion': statistics.pstdev(ordenadas, mu=media),
+            'minima': ordenadas[0],
+            'maxima': ordenadas[-1],
+            'percentiles': {f'p{p}': _percentil(ordenadas, p) for p in PERCENTILES},
+            'tasa_aprobados': sum(1 for nota in ordenadas if nota >= NOTA_APROBADO) / len(ordenadas),
+            'histograma': histograma,
+        })
+    return resultados
+
+def _estadisticas_numpy(grupos, notas, num_grupos: int, nota_maxima: float) -> list[dict | None]:
+    """
+    Cálculo con NumPy: se ordenan todas las notas por (grupo, nota) una sola
+    vez y cada estadística sale para todos los grupos a la vez (bincount para
+    sumas y conteos, índices sobre el array ordenado para los percentiles).
+    """
+    codigos = np.asarray(grupos, dtype=np.int64)
+    valores = np.asarray(notas, dtype=np.float64)
+
+    validas = ~np.isnan(valores) & (codigos >= 0) & (codigos < num_grupos)
+    codigos = codigos[validas]
+    valores = valores[validas]
+
+    # 1. Orden por grupo y, dentro de cada grupo, por nota
+    orden = np.lexsort((valores, codigos))
+    codigos = codigos[orden]
+    valores = valores[orden]
+
+    cuentas = np.bincount(codigos, minlength=num_grupos)
+    inicios = np.concatenate(([0], np.cumsum(cuentas)[:-1]))
+    con_notas = cuentas > 0
+    # En los grupos vacíos se usa la posición 0 para no salirse del array (se descartan después)
+    ultimos = np.where(con_notas, inicios + cuentas - 1, 0)
+    inicios = np.where(con_notas, inicios, 0)
+    divisor = np.maximum(cuentas, 1)
+
+    # 2. Media y desviación típica (dos pasadas: evita restar cuadrados grandes)
+    medias = np.bincount(codigos, weights=valores, minlength=num_grupos) / divisor
+    desviaciones = np.sqrt(np.bincount(codigos, weights=(valores - medias[codigos]) ** 2,
+                                       minlength=num_grupos) / divisor)
+    aprobados = np.bincount(codigos, weights=valores >= NOTA_APROBADO, minlength=num_grupos) / divisor
+
+    # 3. Percentiles: posición fraccionaria dentro del tramo ordenado de cada grupo
+    percentiles = {}
+    if len(valores):
+        for p in sorted({50, *PERCENTILES}):
+            posicion = inicios + (cuentas - 1).clip(min=0) * (p / 100)
+            inferior = np.floor(posicion).astype(np.int64)
+            superior = np.minimum(inferior + 1, ultimos)
+            percentiles[p] = (valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior)).tolist()
+
+    # 4. Histograma: una celda por (grupo, intervalo)
+    intervalos = np.clip((valores / nota_maxima * NUM_INTERVALOS_HISTOGRAMA).astype(np.int64),
+                         0, NUM_INTERVALOS_HISTOGRAMA - 1)
+    histogramas = np.bincount(codigos * NUM_INTERVALOS_HISTOGRAMA + intervalos,
+                              minlength=num_grupos * NUM_INTERVALOS_HISTOGRAMA).reshape(num_grupos, -1).tolist()
+
+    cuentas = cuentas.tolist()
+    medias = medias.tolist()
+    desviaciones = desviaciones.tolist()
+    aprobados = aprobados.tolist()
+    minimas = valores[inicios].tolist() if len(valores) else []
+    maximas = valores[ultimos].tolist() if len(valores) else []
+
+    resultados = []
+    for codigo in range(num_grupos):
+        if not cuentas[codigo]:
+            resultados.append(None)
+            continue
+        resultados.append({
+            'num_notas': cuentas[codigo],
+            'media': medias[codigo],
+            'mediana': percentiles[50][codigo],
+            'desviacion': desviaciones[codigo],
+            'minima': minimas[codigo],
+            'maxima': maximas[codigo],
+            'percentiles': {f'p{p}': percentiles[p][codigo] for p in PERCENTILES},
+            'tasa_aprobados': aprobados[codigo],
+            'histograma': histogramas[codigo],
+        })
+    return resultados
+
+
+# =================================================================
+# 3. TABLAS PARA utilidades.imprimir_tabla
+# =================================================================
+
+def encabezados_resumen(columna_grupo: str) -> list[str]:
+    """Columnas de tabla_resumen, empezando por la del grupo."""
+    return [columna_grupo, 'Notas', 'Media', 'Mediana', 'Desv.'] + [f'P{p}' for p in PERCENTILES] + ['Aprobados']
+
+def tabla_resumen(filas: list[dict], columna_grupo: str, clave_grupo: str) -> list[dict]:
+    """
+    Convierte resultados con estadísticas en filas de tabla con los números ya formateados.
+
+    :param filas: Diccionarios con la clave del grupo y las de estadisticas_por_grupo.
+    :param columna_grupo: Título de la columna del grupo (p. ej. 'Asignatura').
+    :param clave_grupo: Clave del grupo en cada fila (p. ej. 'asignatura').
+    :return: Lista de diccionarios con las columnas de encabezados_resumen.
+    """
+    tabla = []
+    for fila in filas:
+        linea = {
+            columna_grupo: fila[clave_grupo],
+            'Notas': fila['num_notas'],
+            'Media': f"{fila['media']:.2f}",
+            'Mediana': f"{fila['mediana']:.2f}",
+            'Desv.': f"{fila['desviacion']:.2f}",
+        }
+        for p in PERCENTILES:
+            linea[f'P{p}'] = f"{fila['percentiles'][f'p{p}']:.2f}"
+        linea['Aprobados'] = f"{fila['tasa_aprobados'] * 100:.1f} %"
+        tabla.append(linea)
+    return tabla
+
+def encabezados_histograma(columna_grupo: str, nota_maxima: float = 10.0) -> list[str]:
+    """Columnas de tabla_histograma: el grupo y un intervalo de notas por columna."""
+    ancho = nota_maxima / NUM_INTERVALOS_HISTOGRAMA
+    return [columna_grupo] + [f'{i * ancho:g}-{(i + 1) * ancho:g}' for i in range(NUM_INTERVALOS_HISTOGRAMA)]
+
+def tabla_histograma(filas: list[dict], columna_grupo: str, clave_grupo: str, nota_maxima: float = 10.0) -> list[dict]:
+    """
+    Convierte los histogramas en filas de tabla (una columna por intervalo de notas).
+
+    :param filas: Diccionarios con la clave del grupo y 'histograma'.
+    :param columna_grupo: Título de la columna del grupo.
+    :param clave_grupo: Clave del grupo en cada fila.
+    :param nota_maxima: Nota máxima (para los títulos de los intervalos).
+    :return: Lista de diccionarios con las columnas de encabezados_histograma.
+    """
+    columnas_intervalos = encabezados_histograma(columna_grupo, nota_maxima)[1:]
+    return [{columna_grupo: fila[clave_grupo], **dict(zip(columnas_intervalos, fila['histograma']))}
+            for fila in filas]
@@ -0,0 +1,272 @@
+from array import array
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from multiprocessing import shared_memory
+from columnas import CODIGO_HUECO
+
+# NumPy es opcional: acelera cada tramo, pero el resultado es el mismo sin él
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Informes de agendas muy grandes repartidos entre varios procesos
+
+Las columnas de la agenda (notas, asignaturas, tipos, alumnos) se copian una
+vez a memoria compartida; cada proceso recorre un tramo de posiciones (rango
+de ids) y devuelve agregados parciales pequeños, que se combinan al final.
+Los procesos no reciben la lista de ítems: solo el nombre de los bloques de
+memoria y los límites de su tramo.
+
+Las sumas de notas son EXACTAS (enteros), así que el resultado no depende de
+cómo se reparta el trabajo: con 1 proceso o con 16 sale idéntico, y cada
+media coincide con math.fsum(notas) / cuenta.
+"""
+
+# =================================================================
+# 1. PARÁMETROS
+# =================================================================
+
+# Columnas que se comparten con los procesos: (nombre, typecode de array)
+COLUMNAS_COMPARTIDAS = (('notas', 'd'), ('asignaturas', 'B'), ('tipos', 'B'), ('alumnos', 'I'))
+
+# Suma exacta: cada nota se suma como el entero nota * 2**BITS_ESCALA. Es
+# exacto para toda nota >= 2**-4 (su último bit vale al menos 2**-56) y menor
+# que 2**7; las que no cumplen eso (casi nunca) se suman con Fraction.
+BITS_ESCALA = 56
+ESCALA = float(2 ** BITS_ESCALA)
+LIMITE_ENTERO = float(2 ** 63)
+
+# Con NumPy, cada entero se parte en tres trozos de 21 bits para sumarlos con
+# bincount (float64) sin perder precisión mientras el tramo tenga < 2**32 filas
+BITS_TROZO = 21
+MASCARA_TROZO = (1 << BITS_TROZO) - 1
+
+# Filas mínimas por tramo: por debajo, repartir cuesta más de lo que ahorra
+FILAS_MINIMAS_POR_TRAMO = 250_000
+
+
+# =================================================================
+# 2. AGREGADOS DE UN TRAMO
+# =================================================================
+# Parcial de un tramo:
+#   {'conteos': [n por asignatura * num_tipos + tipo],
+#    'asignaturas': {codigo: [entero, fraccion, cuenta]},
+#    'alumnos':     {codigo: [entero, fraccion, cuenta]}}
+# donde la suma exacta de las notas es entero / 2**BITS_ESCALA + fraccion.
+
+def _acumular(grupos: dict, codigo: int, entero: int, fraccion, cuenta: int):
+    """Suma un parcial (entero, fraccion, cuenta) al grupo 'codigo'."""
+    acumulado = grupos.get(codigo)
+    if acumulado is None:
+        grupos[codigo] = [entero, fraccion, cuenta]
+    else:
+        acumulado[0] += entero
+        acumulado[1] += fraccion
+        acumulado[2] += cuenta
+
+def _agregar_tramo_estandar(columnas: dict, inicio: int, fin: int, num_tipos: int) -> dict:
+    """Agregados de las posiciones [inicio, fin) con bucles de Python."""
+    conteos = {}
+    por_asignatura = {}
+    por_alumno = {}
+    filas = zip(columnas['asignaturas'][inicio:fin], columnas['tipos'][inicio:fin],
+                columnas['alumnos'][inicio:fin], columnas['notas'][inicio:fin])
+
+    for asignatura, tipo, alumno, nota in filas:
+        if asignatura == CODIGO_HUECO:
+            continue
+        celda = asignatura * num_tipos + tipo
+        conteos[celda] = conteos.get(celda, 0) + 1
+
+        # NaN != NaN: así se descartan las notas vacías
+        if nota != nota:
+            continue
+        escalada = nota * ESCALA
+        if escalada == int(escalada) and escalada < LIMITE_ENTERO:
+            entero, fraccion = int(escalada), 0
+        else:
+            entero, fraccion = 0, Fraction(nota)
+        _acumular(por_asignatura, asignatura, entero, fraccion, 1)
+        _acumular(por_alumno, alumno, entero, fraccion, 1)
+
+    return {'conteos': conteos, 'asignaturas': por_asignatura, 'alumnos': por_alumno}
+
+def _sumas_exactas_numpy(codigos, escaladas, exactas, valores) -> dict:
+    """
+    Suma exacta por grupo con NumPy.
+
+    :param codigos: Código de grupo de cada nota (int64).
+    :param escaladas: Notas multiplicadas por ESCALA.
+    :param exactas: Máscara de las notas cuya versión escalada es un entero exacto.
+    :param valores: Notas originales (para las que no son exactas).
+    :return: {codigo: [entero, fraccion, cuenta]} de los grupos con notas.
+    """
+    grupos = {}
+    if not len(codigos):
+        return grupos
+
+    minimo = int(codigos.max()) + 1
+    cuentas = np.bincount(codigos, minlength=minimo).tolist()
+    codigos_exactos = codigos[exactas]
+    enteros = escaladas[exactas].astype(np.int64)
+    sumas = [0] * minimo
+    for desplazamiento in range(0, 63, BITS_TROZO):
+        trozos = (enteros >> desplazamiento) & MASCARA_TROZO
+        parciales = np.bincount(codigos_exactos, weights=trozos, minlength=minimo).astype(np.int64).tolist()
+        for codigo, parcial in enumerate(parciales):
+            if parcial:
+                sumas[codigo] += parcial << desplazamiento
+
+    for codigo, cuenta in enumerate(cuentas):
+        if cuenta:
+            grupos[codigo] = [sumas[codigo], 0, cuenta]
+    for codigo, nota in zip(codigos[~exactas].tolist(), valores[~exactas].tolist()):
+        grupos[codigo][1] += Fraction(nota)
+    return grupos
+
+def _agregar_tramo_numpy(columnas: dict, inicio: int, fin: int, num_tipos: int) -> dict:
+    """Agregados de las posiciones [inicio, fin) con operaciones vectoriales."""
+    asignaturas = np.frombuffer(columnas['asignaturas'], dtype=np.uint8)[inicio:fin]
+    tipos = np.frombuffer(columnas['tipos'], dtype=np.uint8)[inicio:fin]
+    alumnos = np.frombuffer(columnas['alumnos'], dtype=np.uint32)[inicio:fin]
+    notas = np.frombuffer(columnas['notas'], dtype=np.float64)[inicio:fin]
+
+    vivos = asignaturas != CODIGO_HUECO
+    celdas = asignaturas[vivos].astype(np.int64) * num_tipos + tipos[vivos]
+    conteos = {celda: n for celda, n in enumerate(np.bincount(celdas).tolist()) if n}
+
+    con_nota = vivos & ~np.isnan(notas)
+    valores = notas[con_nota]
+    escaladas = valores * ESCALA
+    # Los trozos de 21 bits exigen enteros no negativos
+    exactas = (escaladas == np.floor(escaladas)) & (escaladas >= 0) & (escaladas < LIMITE_ENTERO)
+
+    return {
+        'conteos': conteos,
+        'asignaturas': _sumas_exactas_numpy(asignaturas[con_nota].astype(np.int64), escaladas, exactas, valores),
+        'alumnos': _sumas_exactas_numpy(alumnos[con_nota].astype(np.int64), escaladas, exactas, valores),
+    }
+
+def _agregar_tramo(columnas: dict, inicio: int, fin: int, num_tipos: int) -> dict:
+    """
+    Agregados parciales de las posiciones [inicio, fin).
+
+    :param columnas: {nombre: buffer} con las columnas de COLUMNAS_COMPARTIDAS.
+    :param num_tipos: Número de tipos de ítem (para las celdas de 'conteos').
+    """
+    if np is not None:
+        return _agregar_tramo_numpy(columnas, inicio, fin, num_tipos)
+    return _agregar_tramo_estandar(columnas, inicio, fin, num_tipos)
+
+def _agregar_tramo_compartido(nombres: dict, num_filas: int, inicio: int, fin: int, num_tipos: int) -> dict:
+    """
+    Cuerpo de cada proceso: se conecta a los bloques de memoria compartida,
+    agrega su tramo y se desconecta (sin borrar los bloques).
+
+    :param nombres: {columna: nombre del bloque de memoria compartida}.
+    :param num_filas: Filas de cada columna (los bloques pueden ser algo mayores).
+    """
+    bloques = {}
+    vistas = {}
+    try:
+        for columna, typecode in COLUMNAS_COMPARTIDAS:
+            bloques[columna] = shared_memory.SharedMemory(name=nombres[columna])
+            # El bloque puede ser mayor que lo pedido (se redondea a páginas): se recorta antes de convertir
+            vistas[columna] = bloques[columna].buf[:num_filas * array(typecode).itemsize].cast(typecode)
+        return _agregar_tramo(vistas, inicio, fin, num_tipos)
+    finally:
+        # Las vistas deben liberarse antes de cerrar el bloque
+        for vista in vistas.values():
+            vista.release()
+        for bloque in bloques.values():
+            bloque.close()
+
+
+# =================================================================
+# 3. REPARTO Y COMBINACIÓN
+# =================================================================
+
+def _tramos(num_filas: int, num_tramos: int) -> list[tuple[int, int]]:
+    """Divide [0, num_filas) en num_tramos rangos contiguos de tamaño parecido."""
+    limites = [num_filas * i // num_tramos for i in range(num_tramos + 1)]
+    return [(limites[i], limites[i + 1]) for i in range(num_tramos)]
+
+def _combinar(parciales: list[dict]) -> dict:
+    """Suma los agregados parciales de todos los tramos."""
+    total = {'conteos': {}, 'asignaturas': {}, 'alumnos': {}}
+    for parcial in parciales:
+        for celda, numero in parcial['conteos'].items():
+            total['conteos'][celda] = total['conteos'].get(celda, 0) + numero
+        for clave in ('asignaturas', 'alumnos'):
+            for codigo, (entero, fraccion, cuenta) in parcial[clave].items():
+                _acumular(total[clave], codigo, entero, fraccion, cuenta)
+    return total
+
+def _medias(grupos: dict) -> dict:
+    """{codigo: media} a partir de las sumas exactas (redondeadas una sola vez, como math.fsum)."""
+    medias = {}
+    for codigo in sorted(grupos):
+        entero, fraccion, cuenta = grupos[codigo]
+        medias[codigo] = float(Fraction(entero, 2 ** BITS_ESCALA) + fraccion) / cuenta
+    return medias
+
+def numero_procesos(num_filas: int, procesos: int | None = None) -> int:
+    """
+    Procesos que merece la pena usar: como mucho uno por CPU y uno por cada
+    FILAS_MINIMAS_POR_TRAMO filas.
+
+    :param procesos: Máximo pedido (None = número de CPUs).
+    """
+    maximo = procesos if procesos is not None else (os.cpu_count() or 1)
+    return max(1, min(maximo, num_filas // FILAS_MINIMAS_POR_TRAMO))
+
+def calcular_agregados(columnas: dict, num_tipos: int, procesos: int | None = None) -> dict:
+    """
+    Calcula los agregados de toda la agenda: conteo por (asignatura, tipo) y
+    media por asignatura y por alumno. Con más de un proceso, las columnas se
+    copian a memoria compartida y cada proceso agrega un tramo.
+
+    :param columnas: {nombre: array} con las columnas de COLUMNAS_COMPARTIDAS, todas de la misma longitud.
+    :param num_tipos: Número de tipos de ítem.
+    :param procesos: Máximo de procesos (None = número de CPUs; 1 = en este mismo proceso).
+    :return: {'conteos': {(cod_asignatura, cod_tipo): n},
+              'medias_asignatura': {cod_asignatura: media},
+              'medias_alumno': {cod_alumno: media}, 'procesos': procesos usados}.
+    """
+    num_filas = len(columnas['notas'])
+    num_procesos = numero_procesos(num_filas, procesos)
+
+    if num_procesos == 1:
+        parciales = [_agregar_tramo(columnas, 0, num_filas, num_tipos)]
+    else:
+        bloques = []
+        try:
+            # 1. Copia de cada columna a un bloque de memoria compartida (una copia de bytes)
+            nombres = {}
+            for columna, _ in COLUMNAS_COMPARTIDAS:
+                datos = memoryview(columnas[columna]).cast('B')
+                bloque = shared_memory.SharedMemory(create=True, size=max(len(datos), 1))
+                bloques.append(bloque)
+                bloque.buf[:len(datos)] = datos
+                nombres[columna] = bloque.name
+
+            # 2. Un tramo por proceso
+            with ProcessPoolExecutor(max_workers=num_procesos) as ejecutor:
+                futuros = [ejecutor.submit(_agregar_tramo_compartido, nombres, num_filas, inicio, fin, num_tipos)
+                           for inicio, fin in _tramos(num_filas, num_procesos)]
+                parciales = [futuro.result() for futuro in futuros]
+        finally:
+            for bloque in bloques:
+                bloque.close()
+                bloque.unlink()
+
+    # 3. Combinación (en orden de tramo; las sumas son exactas, el orden no cambia el resultado)
+    total = _combinar(parciales)
+    return {
+        'conteos': {divmod(celda, num_tipos): numero for celda, numero in sorted(total['conteos'].items())},
+        'medias_asignatura': _medias(total['asignaturas']),
+        'medias_alumno': _medias(total['alumnos']),
+        'procesos': num_procesos,
+    }
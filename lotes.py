@@ -0,0 +1,302 @@
+import json
+import shlex
+import sys
+from contextlib import redirect_stdout
+import colores
+import persistencia
+import servicios
+
+"""Modo por lotes: ejecuta un archivo de órdenes (o la entrada estándar) sin menús ni colores
+
+Uso: python main.py --lotes [archivo]      (sin archivo, o con '-', se lee la entrada estándar)
+
+Una orden por línea (los textos con espacios van entre comillas; '#' inicia un comentario):
+    alta DNI NOMBRE ASIGNATURA TIPO DESC [NOTA]     (NOMBRE '-' = el del alumno ya existente)
+    editar ID NOTA                                  (NOTA '-' = sin nota)
+    eliminar ID
+    eliminar-asignatura ASIGNATURA
+    buscar ID
+    listar
+    filtrar [dni=X] [asignatura=Y] [tipo=Z]
+    media asignatura=Y [dni=X]
+    ranking-asignaturas [LIMITE]
+    ranking-alumnos [LIMITE]
+    estadisticas [asignatura|alumno]                (por defecto, por asignatura)
+    cache                                           (aciertos y fallos de la caché de consultas)
+    exportar RUTA [dni=X] [asignatura=Y] [tipo=Z]   (RUTA .csv o .jsonl; sin filtros, todos los ítems)
+    exportar-estadistica RUTA
+    guardar
+
+Cada orden escribe una línea JSON en la salida estándar:
+    {"linea": 3, "orden": "editar", "ok": true, "resultado": ...}
+    {"linea": 4, "orden": "alta", "ok": false, "error": "..."}
+Los avisos del resto del programa van a la salida de errores. Al terminar se
+guardan los cambios pendientes (como al salir del menú).
+"""
+
+# =================================================================
+# 1. ANÁLISIS DE ARGUMENTOS
+# =================================================================
+
+def _entero(texto: str, campo: str) -> int:
+    """
+    Convierte un argumento en entero no negativo.
+
+    :raises ValueError: Si no lo es.
+    """
+    if not texto.isdigit():
+        raise ValueError(f"'{campo}' debe ser un entero no negativo: '{texto}'.")
+    return int(texto)
+
+def _nota(texto: str) -> float | None:
+    """
+    Convierte un argumento en nota ('-' = sin nota) dentro de RANGOS_NOTA.
+
+    :raises ValueError: Si no es un número o está fuera de rango.
+    """
+    if texto == '-':
+        return None
+    try:
+        nota = float(texto)
+    except ValueError:
+        raise ValueError(f"Nota '{texto}' no numérica.")
+    if not servicios.RANGOS_NOTA[0] <= nota <= servicios.RANGOS_NOTA[1]:
+        raise ValueError(f"Nota {nota} fuera del rango {servicios.RANGOS_NOTA[0]}-{servicios.RANGOS_NOTA[1]}.")
+    return nota
+
+def _claves_valor(argumentos: list[str], permitidas: tuple) -> dict:
+    """
+    Convierte argumentos 'clave=valor' en un diccionario.
+
+    :raises ValueError: Si hay un argumento sin '=' o con una clave no permitida.
+    """
+    claves = {}
+    for argumento in argumentos:
+        clave, separador, valor = argumento.partition('=')
+        if not separador or clave not in permitidas:
+            raise ValueError(f"Argumento '{argumento}' no válido (se espera {'=, '.join(permitidas)}=).")
+        claves[clave] = valor
+    return claves
+
+def _comprobar_numero_argumentos(argumentos: list[str], minimo: int, maximo: int):
+    """:raises ValueError: Si el número de argumentos no está entre minimo y maximo."""
+    if not minimo <= len(argumentos) <= maximo:
+        esperado = str(minimo) if minimo == maximo else f"entre {minimo} y {maximo}"
+        raise ValueError(f"Se esperaban {esperado} argumentos y hay {len(argumentos)}.")
+
+
+# =================================================================
+# 2. ÓRDENES
+# =================================================================
+# Cada orden recibe la lista de argumentos y devuelve el resultado (serializable
+# a JSON). Un error de la orden se indica con ValueError.
+
+def _orden_alta(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 5, 6)
+    dni, nombre, asignatura, tipo, desc = argumentos[:5]
+    if nombre == '-':
+        nombre = servicios.buscar_nombre_por_dni(dni)
+        if nombre is None:
+            raise ValueError(f"No hay ningún alumno con DNI '{dni}' del que tomar el nombre.")
+
+    nota = _nota(argumentos[5]) if len(argumentos) == 6 else None
+
+    # El alta en bloque valida (también DNI y nombre) sin imprimir y devuelve el motivo del rechazo
+    informe = servicios.alta_items_bulk([{'dni': dni, 'nombre': nombre, 'asignatura': asignatura,
+                                          'tipo': tipo, 'desc': desc, 'nota': nota}])
+    if informe['errores']:
+        raise ValueError(informe['errores'][0]['motivo'])
+    return {'id': informe['primer_id']}
+
+def _orden_editar(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 2, 2)
+    item_id = _entero(argumentos[0], 'ID')
+    nota = _nota(argumentos[1])
+    if not servicios.editar_puntuacion_logica(item_id, nota):
+        raise ValueError(f"No existe el ítem {item_id}.")
+    return {'id': item_id, 'nota': nota}
+
+def _orden_eliminar(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 1, 1)
+    item_id = _entero(argumentos[0], 'ID')
+    if not servicios.eliminar_item_logica(item_id):
+        raise ValueError(f"No existe el ítem {item_id}.")
+    return {'eliminado': item_id}
+
+def _orden_eliminar_asignatura(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 1, 1)
+    return {'eliminados': servicios.eliminar_items_asignatura(argumentos[0])}
+
+def _orden_buscar(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 1, 1)
+    item_id = _entero(argumentos[0], 'ID')
+    item, _ = servicios.buscar_por_id(item_id)
+    if item is None:
+        raise ValueError(f"No existe el ítem {item_id}.")
+    return dict(item)
+
+def _orden_listar(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 0)
+    return [dict(item) for item in servicios.listar_todos_los_items()]
+
+def _orden_filtrar(argumentos: list[str]):
+    filtros = _claves_valor(argumentos, ('dni', 'asignatura', 'tipo'))
+    items = servicios.filtrar_items_logica(filtros.get('dni'), filtros.get('asignatura'), filtros.get('tipo'))
+    return [dict(item) for item in items]
+
+def _orden_media(argumentos: list[str]):
+    claves = _claves_valor(argumentos, ('asignatura', 'dni'))
+    if 'asignatura' not in claves:
+        raise ValueError("Falta el argumento asignatura=.")
+    if 'dni' in claves:
+        return servicios.calcular_media_alumno_asignatura(claves['dni'], claves['asignatura'])
+    return servicios.calcular_media_general_asignatura(claves['asignatura'])
+
+def _orden_ranking_asignaturas(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 1)
+    limite = _entero(argumentos[0], 'LIMITE') if argumentos else None
+    return [{'asignatura': asignatura, 'media': media}
+            for asignatura, media in servicios.obtener_ranking_asignaturas(limite)]
+
+def _orden_ranking_alumnos(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 1)
+    limite = _entero(argumentos[0], 'LIMITE') if argumentos else None
+    return [{'dni': dni, 'nombre': nombre, 'media': media}
+            for dni, nombre, media in servicios.obtener_ranking_alumnos(limite)]
+
+def _orden_estadisticas(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 1)
+    return servicios.obtener_estadisticas_notas(argumentos[0] if argumentos else 'asignatura')
+
+def _orden_cache(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 0)
+    return servicios.obtener_estadisticas_cache()
+
+def _formato_exportacion(ruta: str) -> str:
+    """:raises ValueError: Si la extensión de la ruta no es de un formato de exportación."""
+    formato = persistencia.formato_exportacion(ruta)
+    if formato is None:
+        raise ValueError(f"Extensión no soportada en '{ruta}' (usa .csv o .jsonl).")
+    return formato
+
+def _orden_exportar(argumentos: list[str]):
+    if not argumentos:
+        raise ValueError("Falta la ruta del archivo.")
+    ruta = argumentos[0]
+    filtros = _claves_valor(argumentos[1:], ('dni', 'asignatura', 'tipo'))
+    exportados = servicios.exportar_items_logica(ruta, _formato_exportacion(ruta), filtros.get('dni'),
+                                                 filtros.get('asignatura'), filtros.get('tipo'))
+    if exportados is None:
+        raise ValueError(f"No se pudo escribir '{ruta}'.")
+    return {'ruta': ruta, 'filas': exportados}
+
+def _orden_exportar_estadistica(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 1, 1)
+    ruta = argumentos[0]
+    exportadas = servicios.exportar_estadistica_asignaturas(ruta, _formato_exportacion(ruta))
+    if exportadas is None:
+        raise ValueError(f"No se pudo escribir '{ruta}'.")
+    return {'ruta': ruta, 'filas': exportadas}
+
+def _orden_guardar(argumentos: list[str]):
+    _comprobar_numero_argumentos(argumentos, 0, 0)
+    if servicios.hay_cambios_sin_guardar() and not servicios.guardar_datos_logica():
+        raise ValueError("No se pudieron guardar los datos.")
+    return {'guardado': True}
+
+ORDENES = {
+    'alta': _orden_alta,
+    'editar': _orden_editar,
+    'eliminar': _orden_eliminar,
+    'eliminar-asignatura': _orden_eliminar_asignatura,
+    'buscar': _orden_buscar,
+    'listar': _orden_listar,
+    'filtrar': _orden_filtrar,
+    'media': _orden_media,
+    'ranking-asignaturas': _orden_ranking_asignaturas,
+    'ranking-alumnos': _orden_ranking_alumnos,
+    'estadisticas': _orden_estadisticas,
+    'cache': _orden_cache,
+    'exportar': _orden_exportar,
+    'exportar-estadistica': _orden_exportar_estadistica,
+    'guardar': _orden_guardar,
+}
+
+
+# =================================================================
+# 3. EJECUCIÓN
+# =================================================================
+
+def ejecutar_orden(linea: str) -> dict | None:
+    """
+    Ejecuta una línea del archivo de órdenes.
+
+    :param linea: Texto de la línea (sin el salto de línea).
+    :return: {'orden', 'ok', 'resultado' o 'error'}, o None si la línea está vacía o es un comentario.
+    """
+    try:
+        partes = shlex.split(linea, comments=True)
+    except ValueError as e:
+        return {'orden': None, 'ok': False, 'error': f"Línea mal formada: {e}."}
+    if not partes:
+        return None
+
+    orden = partes[0].lower()
+    if orden not in ORDENES:
+        return {'orden': orden, 'ok': False, 'error': f"Orden desconocida. Órdenes: {', '.join(ORDENES)}."}
+    try:
+        return {'orden': orden, 'ok': True, 'resultado': ORDENES[orden](partes[1:])}
+    except ValueError as e:
+        return {'orden': orden, 'ok': False, 'error': str(e)}
+
+def ejecutar_lotes(entrada, salida) -> int:
+    """
+    Ejecuta todas las órdenes de 'entrada' y escribe un resultado JSON por línea
+    en 'salida'. Los print del resto del programa se desvían a la salida de
+    errores para no mezclarse con los resultados.
+
+    :param entrada: Archivo de texto abierto (o sys.stdin).
+    :param salida: Archivo de texto donde escribir los resultados (o sys.stdout).
+    :return: Número de órdenes que fallaron.
+    """
+    fallidas = 0
+    with redirect_stdout(sys.stderr):
+        for numero_linea, linea in enumerate(entrada, start=1):
+            resultado = ejecutar_orden(linea.rstrip('\n'))
+            if resultado is not None:
+                fallidas += not resultado['ok']
+                salida.write(json.dumps({'linea': numero_linea, **resultado}, ensure_ascii=False) + '\n')
+    return fallidas
+
+def main_lotes(argumentos: list[str]) -> int:
+    """
+    Punto de entrada del modo por lotes: carga la agenda, ejecuta las órdenes
+    y guarda los cambios pendientes al terminar.
+
+    :param argumentos: Argumentos tras '--lotes' (ruta del archivo, '-' o nada).
+    :return: Código de salida: 0 si todo fue bien, 1 si falló alguna orden o el guardado.
+    """
+    colores.desactivar_colores()
+    ruta = argumentos[0] if argumentos else '-'
+
+    with redirect_stdout(sys.stderr):
+        servicios.cargar_datos_logica()
+
+    try:
+        if ruta == '-':
+            fallidas = ejecutar_lotes(sys.stdin, sys.stdout)
+        else:
+            with open(ruta, encoding='utf-8') as entrada:
+                fallidas = ejecutar_lotes(entrada, sys.stdout)
+    except OSError as e:
+        print(f"Error: No se pudo leer el archivo de órdenes '{ruta}'. {e}", file=sys.stderr)
+        return 1
+
+    guardado = True
+    if servicios.hay_cambios_sin_guardar():
+        with redirect_stdout(sys.stderr):
+            guardado = servicios.guardar_datos_logica()
+        if not guardado:
+            print("Error: No se pudieron guardar los cambios.", file=sys.stderr)
+
+    return 0 if fallidas == 0 and guardado else 1
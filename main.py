@@ -1,9 +1,12 @@
 
+import sys
 import utilidades
 import servicios
 import colores
 import persistencia
 import controlador
+import autoguardado
+import lotes
 
 # MAIN 
 
@@ -45,6 +48,7 @@ def controlador_menu():
             controlador.gestionar_menu_guardar_cargar()
         elif opcion == 0:
             print(f"{colores.C_MAGENTA}\n¡Gracias por usar la Agenda Académica! Cerrando aplicación.{colores.C_FIN}")
+            autoguardado.detener_autoguardado() # Espera al guardado automático en curso, si lo hay
             controlador.gestionar_guardar()# Final auto-guardado al salir
             opcion_seleccionada = 0 # Asignación 0 para terminar el bucle
         else:
@@ -70,7 +74,12 @@ def mostrar_menu():
 #                               MAIN 
 # =================================================================
 def main():
-    """Función principal de ejecución del programa."""
+    """
+    Función principal de ejecución del programa.
+    Con '--lotes [archivo]' ejecuta un archivo de órdenes sin menús (ver lotes.py).
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == '--lotes':
+        sys.exit(lotes.main_lotes(sys.argv[2:]))
     controlador_menu()
 
 if __name__ == '__main__':
@@ -1,8 +1,70 @@
+import csv
+import itertools
 import json
+import math
 import os #Necesario para verificar si el archivo existe
+import struct
+import tempfile
+from contextlib import contextmanager
 
 NOMBRE_ARCHIVO_DATOS = 'datos_agenda.json'
 
+
+def _sincronizar_directorio(directorio: str):
+    """
+    Fuerza a disco la entrada del directorio (el renombrado). En sistemas que no
+    permiten abrir directorios (Windows) no hace nada.
+    """
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+@contextmanager
+def _abrir_escritura_atomica(ruta: str, binario: bool = False):
+    """
+    Abre para escritura un archivo temporal en el mismo directorio que 'ruta'.
+    Al salir del bloque 'with' sin errores, lo fuerza a disco (fsync) y lo
+    renombra sobre 'ruta'; si hay un error, lo borra y 'ruta' queda intacta.
+    Así un corte a mitad de escritura nunca deja el archivo de datos a medias.
+    
+    :param ruta: Ruta final del archivo.
+    :param binario: True para escribir bytes en lugar de texto UTF-8.
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, ruta_temporal = tempfile.mkstemp(prefix='.' + os.path.basename(ruta) + '.',
+                                                 suffix='.tmp', dir=directorio)
+    try:
+        # mkstemp crea el archivo solo legible por el usuario: conservamos los permisos del original
+        if os.path.exists(ruta):
+            os.chmod(ruta_temporal, os.stat(ruta).st_mode & 0o777)
+        else:
+            os.chmod(ruta_temporal, 0o644)
+        
+        if binario:
+            f = os.fdopen(descriptor, 'wb')
+        else:
+            f = os.fdopen(descriptor, 'w', encoding='utf-8')
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+    
+    _sincronizar_directorio(directorio)
+
+
 def guardar_datos_a_json(datos_a_guardar: dict) -> bool:
     """
     Guarda un diccionario de datos en un archivo JSON en disco.
@@ -10,9 +72,15 @@ def guardar_datos_a_json(datos_a_guardar: dict) -> bool:
     :param datos_a_guardar: Diccionario que contiene las estructuras a persistir.
     :return: True si se guardó con éxito, False en caso de error.
     """
+    return _guardar_json_en(NOMBRE_ARCHIVO_DATOS, datos_a_guardar)
+
+
+def _guardar_json_en(ruta: str, datos_a_guardar: dict) -> bool:
+    """Guarda 'datos_a_guardar' como JSON en 'ruta' (ver guardar_datos_a_json)."""
     try:
-        # Usamos 'w' (write) y 'indent=4' para un formato legible
-        with open(NOMBRE_ARCHIVO_DATOS, 'w', encoding='utf-8') as f:
+        # Usamos 'indent=4' para un formato legible. Se escribe en un temporal
+        # que sustituye al archivo solo cuando está completo en disco
+        with _abrir_escritura_atomica(ruta) as f:
             json.dump(datos_a_guardar, f, indent=4)
         return True
     except IOError as e:
@@ -42,4 +110,636 @@ def cargar_datos_desde_json() -> dict | None:
         return None
     except IOError as e:
         print(f" Error de E/S al leer el archivo: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def leer_registros_csv(ruta: str):
+    """
+    Lee un archivo CSV con cabecera (dni,nombre,asignatura,tipo,desc,nota) y
+    devuelve sus filas una a una, sin cargar el archivo entero en memoria.
+    
+    :param ruta: Ruta del archivo CSV.
+    :return: Generador de diccionarios (una fila por ítem, valores como texto).
+    """
+    with open(ruta, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def leer_registros_jsonl(ruta: str):
+    """
+    Lee un archivo JSON Lines (un objeto JSON por línea) y devuelve los
+    objetos uno a uno. Las líneas vacías se ignoran; las que no son JSON
+    válido se devuelven como texto para que la validación las rechace.
+    
+    :param ruta: Ruta del archivo JSONL.
+    :return: Generador de diccionarios (o cadenas, si la línea no es JSON válido).
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                yield linea
+
+
+# =================================================================
+# Exportación en streaming (CSV / JSONL) de listados e informes
+# =================================================================
+
+FORMATO_EXPORTACION_CSV = 'csv'
+FORMATO_EXPORTACION_JSONL = 'jsonl'
+
+# Extensión del archivo -> formato de exportación
+EXTENSIONES_EXPORTACION = {
+    '.csv': FORMATO_EXPORTACION_CSV,
+    '.jsonl': FORMATO_EXPORTACION_JSONL,
+    '.ndjson': FORMATO_EXPORTACION_JSONL,
+}
+
+# Filas que se formatean y escriben de una vez (la memoria usada no depende del total)
+FILAS_POR_BLOQUE_EXPORTACION = 4096
+
+
+def formato_exportacion(ruta: str) -> str | None:
+    """
+    Deduce el formato de exportación por la extensión del archivo.
+
+    :param ruta: Ruta del archivo de destino.
+    :return: FORMATO_EXPORTACION_CSV, FORMATO_EXPORTACION_JSONL o None si la extensión no es válida.
+    """
+    return EXTENSIONES_EXPORTACION.get(os.path.splitext(ruta)[1].lower())
+
+def exportar_filas(filas, campos: list[str], ruta: str, formato: str) -> int | None:
+    """
+    Escribe las filas en CSV (con cabecera) o en JSON Lines según van llegando
+    del iterable, por bloques de FILAS_POR_BLOQUE_EXPORTACION: no se necesita
+    la lista entera. El archivo se escribe de forma atómica (o queda el
+    anterior, o el nuevo completo).
+
+    :param filas: Iterable de tuplas con los valores de cada fila, en el orden de 'campos'.
+    :param campos: Nombres de las columnas (cabecera del CSV, claves del JSONL).
+    :param ruta: Ruta del archivo de destino.
+    :param formato: FORMATO_EXPORTACION_CSV o FORMATO_EXPORTACION_JSONL.
+    :return: Número de filas escritas, o None si hubo un error de E/S.
+    :raises ValueError: Si el formato no es uno de los de exportación.
+    """
+    if formato not in (FORMATO_EXPORTACION_CSV, FORMATO_EXPORTACION_JSONL):
+        raise ValueError(f"Formato de exportación '{formato}' no soportado.")
+
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    filas = iter(filas)
+    escritas = 0
+
+    try:
+        with _abrir_escritura_atomica(ruta) as f:
+            if formato == FORMATO_EXPORTACION_CSV:
+                # El salto de línea lo traduce el modo texto del archivo
+                escritor = csv.writer(f, lineterminator='\n')
+                escritor.writerow(campos)
+
+            bloque = list(itertools.islice(filas, FILAS_POR_BLOQUE_EXPORTACION))
+            while bloque:
+                if formato == FORMATO_EXPORTACION_CSV:
+                    escritor.writerows(bloque)
+                else:
+                    f.write(''.join([codificar(dict(zip(campos, valores))) + '\n' for valores in bloque]))
+                escritas += len(bloque)
+                bloque = list(itertools.islice(filas, FILAS_POR_BLOQUE_EXPORTACION))
+        return escritas
+    except IOError as e:
+        print(f" Error de E/S al exportar a '{ruta}': {e}")
+        return None
+
+
+# =================================================================
+# Carga en streaming (ítem a ítem) de la agenda
+# =================================================================
+
+# Tamaño de cada bloque leído del disco por el lector incremental
+TAMANO_BLOQUE_LECTURA = 64 * 1024
+
+# Cabecera de la primera línea del formato JSON Lines de la agenda
+FORMATO_JSONL = 'agenda-jsonl'
+
+# Formatos del archivo de datos (ver detectar_formato)
+FORMATO_ARCHIVO_JSON = 'json'
+FORMATO_ARCHIVO_JSONL = 'jsonl'
+FORMATO_ARCHIVO_BINARIO = 'binario'
+FORMATO_ARCHIVO_SQLITE = 'sqlite'
+FORMATO_ARCHIVO_REGISTROS = 'registros'
+
+# Firma de los primeros bytes de una base de datos SQLite (ver almacenes.AlmacenSQLite)
+FIRMA_SQLITE = b'SQLite format 3\x00'
+
+# Firma y extensión del archivo de registros de ancho fijo (ver almacenes.AlmacenRegistros)
+MAGIA_REGISTROS = b'AGDR'
+EXTENSION_REGISTROS = '.agdr'
+
+# Extensión con la que se crean los archivos nuevos en formato binario
+EXTENSION_BINARIO = '.agdb'
+
+
+def existe_archivo_datos() -> bool:
+    """Indica si existe el archivo de datos de la agenda."""
+    return os.path.exists(NOMBRE_ARCHIVO_DATOS)
+
+
+def detectar_formato(ruta: str | None = None) -> str:
+    """
+    Indica el formato de un archivo de datos: si existe, por su contenido
+    (firma del formato binario o cabecera JSON Lines); si no, por su extensión.
+    
+    :param ruta: Ruta a comprobar o None para NOMBRE_ARCHIVO_DATOS.
+    :return: FORMATO_ARCHIVO_JSON, FORMATO_ARCHIVO_JSONL, FORMATO_ARCHIVO_BINARIO,
+             FORMATO_ARCHIVO_SQLITE o FORMATO_ARCHIVO_REGISTROS.
+    """
+    ruta = ruta or NOMBRE_ARCHIVO_DATOS
+    
+    if not os.path.exists(ruta):
+        if ruta.lower().endswith(EXTENSION_BINARIO):
+            return FORMATO_ARCHIVO_BINARIO
+        if ruta.lower().endswith(('.sqlite', '.db')):
+            return FORMATO_ARCHIVO_SQLITE
+        if ruta.lower().endswith(EXTENSION_REGISTROS):
+            return FORMATO_ARCHIVO_REGISTROS
+        if ruta.lower().endswith('.jsonl'):
+            return FORMATO_ARCHIVO_JSONL
+        return FORMATO_ARCHIVO_JSON
+    
+    with open(ruta, 'rb') as f:
+        firma = f.read(len(FIRMA_SQLITE))
+        if firma.startswith(MAGIA_BINARIO):
+            return FORMATO_ARCHIVO_BINARIO
+        if firma.startswith(MAGIA_REGISTROS):
+            return FORMATO_ARCHIVO_REGISTROS
+        if firma == FIRMA_SQLITE:
+            return FORMATO_ARCHIVO_SQLITE
+        f.seek(0)
+        primera_linea = f.readline(TAMANO_BLOQUE_LECTURA)
+    
+    try:
+        datos_cabecera = json.loads(primera_linea)
+    except ValueError:
+        # JSON con sangría (la primera línea es solo '{') o archivo corrupto
+        return FORMATO_ARCHIVO_JSON
+    if isinstance(datos_cabecera, dict) and datos_cabecera.get('formato') == FORMATO_JSONL:
+        return FORMATO_ARCHIVO_JSONL
+    return FORMATO_ARCHIVO_JSON
+
+
+class _LectorJSONIncremental:
+    """
+    Lector de JSON por bloques: mantiene en memoria solo el trozo de archivo
+    que se está analizando y decodifica los valores de uno en uno con
+    json.JSONDecoder.raw_decode.
+    """
+    
+    def __init__(self, f):
+        self._f = f
+        self._buffer = ''
+        self._pos = 0
+        self._fin = False
+        self._decodificador = json.JSONDecoder()
+    
+    def _leer_mas(self) -> bool:
+        """Añade un bloque al buffer (descartando lo ya consumido). False si no queda archivo."""
+        if self._fin:
+            return False
+        bloque = self._f.read(TAMANO_BLOQUE_LECTURA)
+        if not bloque:
+            self._fin = True
+            return False
+        self._buffer = self._buffer[self._pos:] + bloque
+        self._pos = 0
+        return True
+    
+    def siguiente_caracter(self) -> str:
+        """Salta los espacios y devuelve el siguiente carácter sin consumirlo ('' al final)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._leer_mas():
+                return ''
+    
+    def consumir(self, esperado: str):
+        """Consume el carácter 'esperado' (tras los espacios) o lanza un error de formato."""
+        caracter = self.siguiente_caracter()
+        if caracter != esperado:
+            raise json.JSONDecodeError(f"Se esperaba '{esperado}'", self._buffer, self._pos)
+        self._pos += 1
+    
+    def valor(self):
+        """Decodifica y devuelve el siguiente valor JSON completo."""
+        self.siguiente_caracter()
+        while True:
+            try:
+                valor, fin = self._decodificador.raw_decode(self._buffer, self._pos)
+                # Un número al final del buffer podría seguir en el siguiente bloque
+                if fin < len(self._buffer) or self._fin:
+                    self._pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self._fin:
+                    raise
+            self._leer_mas()
+
+
+def iterar_items_json(ruta: str, cabecera: dict):
+    """
+    Recorre un archivo de agenda JSON ({"datos_agenda": [...], "proximo_id": N})
+    devolviendo los ítems uno a uno, sin construir el árbol completo en memoria.
+    El resto de claves del objeto principal (p. ej. 'proximo_id') se guardan en
+    'cabecera' a medida que aparecen: estarán completas al agotar el generador.
+    
+    :param ruta: Ruta del archivo JSON.
+    :param cabecera: Diccionario donde se dejan las claves que no son ítems.
+    :return: Generador de diccionarios (ítems).
+    :raises json.JSONDecodeError: Si el archivo está corrupto.
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        lector = _LectorJSONIncremental(f)
+        lector.consumir('{')
+        
+        if lector.siguiente_caracter() == '}':
+            return
+        
+        continuar = True
+        while continuar:
+            clave = lector.valor()
+            lector.consumir(':')
+            
+            if clave == 'datos_agenda':
+                # Recorremos el array ítem a ítem
+                lector.consumir('[')
+                if lector.siguiente_caracter() == ']':
+                    lector.consumir(']')
+                else:
+                    fin_array = False
+                    while not fin_array:
+                        yield lector.valor()
+                        if lector.siguiente_caracter() == ',':
+                            lector.consumir(',')
+                        else:
+                            lector.consumir(']')
+                            fin_array = True
+            else:
+                cabecera[clave] = lector.valor()
+            
+            if lector.siguiente_caracter() == ',':
+                lector.consumir(',')
+            else:
+                lector.consumir('}')
+                continuar = False
+
+
+def iterar_items_jsonl(ruta: str, cabecera: dict):
+    """
+    Recorre un archivo de agenda en formato JSON Lines: la primera línea es la
+    cabecera ({"formato": "agenda-jsonl", "proximo_id": N}) y cada línea
+    siguiente es un ítem.
+    
+    :param ruta: Ruta del archivo JSONL.
+    :param cabecera: Diccionario donde se deja la cabecera.
+    :return: Generador de diccionarios (ítems).
+    :raises json.JSONDecodeError: Si una línea está corrupta o falta la cabecera.
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        primera_linea = f.readline()
+        datos_cabecera = json.loads(primera_linea) if primera_linea.strip() else {}
+        if not isinstance(datos_cabecera, dict) or datos_cabecera.get('formato') != FORMATO_JSONL:
+            raise json.JSONDecodeError("Falta la cabecera del formato JSON Lines", primera_linea, 0)
+        cabecera.update(datos_cabecera)
+        
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def iterar_items_archivo(ruta: str, cabecera: dict):
+    """
+    Recorre un archivo de agenda en cualquiera de los formatos (se detecta
+    automáticamente) devolviendo los ítems uno a uno.
+    
+    :param ruta: Ruta del archivo.
+    :param cabecera: Diccionario donde se deja 'proximo_id' (completo al agotar el generador).
+    :return: Generador de diccionarios (ítems).
+    :raises ValueError: Si el archivo es un almacén (SQLite o registros de ancho fijo).
+    """
+    formato = detectar_formato(ruta)
+    if formato in (FORMATO_ARCHIVO_SQLITE, FORMATO_ARCHIVO_REGISTROS):
+        raise ValueError(f"'{ruta}' es un almacén ({formato}): se abre con almacenes, no se lee ítem a ítem")
+    if formato == FORMATO_ARCHIVO_BINARIO:
+        return iterar_items_binario(ruta, cabecera)
+    if formato == FORMATO_ARCHIVO_JSONL:
+        return iterar_items_jsonl(ruta, cabecera)
+    return iterar_items_json(ruta, cabecera)
+
+
+def iterar_datos_agenda(cabecera: dict):
+    """
+    Recorre el archivo de datos (JSON, JSON Lines o binario) devolviendo los
+    ítems uno a uno.
+    
+    :param cabecera: Diccionario donde se deja 'proximo_id' (completo al agotar el generador).
+    :return: Generador de diccionarios (ítems).
+    """
+    return iterar_items_archivo(NOMBRE_ARCHIVO_DATOS, cabecera)
+
+
+def guardar_datos_a_jsonl(items, cabecera: dict, ruta: str | None = None) -> bool:
+    """
+    Guarda la agenda en formato JSON Lines escribiendo los ítems de uno en uno.
+    
+    :param items: Iterable de diccionarios (ítems).
+    :param cabecera: Datos de la primera línea (proximo_id, secuencia_diario...).
+    :param ruta: Ruta del archivo o None para NOMBRE_ARCHIVO_DATOS.
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    try:
+        with _abrir_escritura_atomica(ruta or NOMBRE_ARCHIVO_DATOS) as f:
+            f.write(json.dumps({'formato': FORMATO_JSONL, **cabecera}) + '\n')
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        return True
+    except IOError as e:
+        print(f" Error de E/S al guardar el archivo: {e}")
+        return False
+
+
+# =================================================================
+# Formato binario versionado (instantánea de arranque rápido)
+# =================================================================
+#
+# Estructura del archivo (little-endian):
+#   1. Cabecera fija: firma, versión, proximo_id, secuencia_diario,
+#      número de cadenas y número de ítems.
+#   2. Tabla de cadenas: longitudes en bytes (uint32) y después todas las
+#      cadenas UTF-8 seguidas. Cada nombre, DNI, asignatura, tipo y
+#      descripción distinto se guarda una sola vez.
+#   3. Registros de ancho fijo, uno por ítem: id, índices en la tabla de
+#      cadenas (dni, nombre, asignatura, tipo, desc) y nota (NaN = sin nota).
+
+MAGIA_BINARIO = b'AGDB'
+VERSION_BINARIO = 1
+
+# firma, versión, proximo_id, secuencia_diario, num_cadenas, num_items
+_CABECERA_BINARIO = struct.Struct('<4sHqqII')
+# id, dni, nombre, asignatura, tipo, desc, nota
+_REGISTRO_BINARIO = struct.Struct('<qIIIIId')
+
+# Registros que se leen del disco de una vez al cargar
+REGISTROS_POR_BLOQUE = 4096
+
+
+def guardar_datos_a_binario(items, cabecera: dict, ruta: str | None = None) -> bool:
+    """
+    Guarda la agenda en el formato binario versionado.
+    
+    :param items: Iterable de ítems (diccionarios o cualquier Mapping con los mismos campos).
+    :param cabecera: Debe incluir 'proximo_id'; 'secuencia_diario' es opcional.
+    :param ruta: Ruta del archivo o None para NOMBRE_ARCHIVO_DATOS.
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    # 1. Registros y tabla de cadenas (cadena -> índice, en orden de aparición)
+    cadenas = {}
+    registros = bytearray()
+    empaquetar = _REGISTRO_BINARIO.pack
+    num_items = 0
+    
+    for item in items:
+        nota = item['nota']
+        registros += empaquetar(
+            item['id'],
+            cadenas.setdefault(item['dni'], len(cadenas)),
+            cadenas.setdefault(item['nombre'], len(cadenas)),
+            cadenas.setdefault(item['asignatura'], len(cadenas)),
+            cadenas.setdefault(item['tipo'], len(cadenas)),
+            cadenas.setdefault(item['desc'], len(cadenas)),
+            math.nan if nota is None else nota
+        )
+        num_items += 1
+    
+    cadenas_utf8 = [cadena.encode('utf-8') for cadena in cadenas]
+    longitudes = struct.pack(f'<{len(cadenas_utf8)}I', *(len(cadena) for cadena in cadenas_utf8))
+    
+    # 2. Escritura: cabecera, tabla de cadenas y registros
+    try:
+        with _abrir_escritura_atomica(ruta or NOMBRE_ARCHIVO_DATOS, binario=True) as f:
+            f.write(_CABECERA_BINARIO.pack(MAGIA_BINARIO, VERSION_BINARIO,
+                                           cabecera['proximo_id'], cabecera.get('secuencia_diario', 0),
+                                           len(cadenas_utf8), num_items))
+            f.write(longitudes)
+            f.write(b''.join(cadenas_utf8))
+            f.write(registros)
+        return True
+    except IOError as e:
+        print(f" Error de E/S al guardar el archivo: {e}")
+        return False
+
+
+def _leer_exacto(f, num_bytes: int) -> bytes:
+    """Lee exactamente 'num_bytes' o lanza ValueError si el archivo está truncado."""
+    datos = f.read(num_bytes)
+    if len(datos) != num_bytes:
+        raise ValueError("El archivo binario está truncado")
+    return datos
+
+
+def iterar_items_binario(ruta: str, cabecera: dict):
+    """
+    Recorre un archivo de agenda en formato binario devolviendo los ítems uno
+    a uno. La tabla de cadenas se lee completa; los registros, por bloques.
+    
+    :param ruta: Ruta del archivo binario.
+    :param cabecera: Diccionario donde se dejan 'proximo_id' y 'secuencia_diario'.
+    :return: Generador de diccionarios (ítems).
+    :raises ValueError: Si el archivo no es válido, está truncado o su versión no está soportada.
+    """
+    with open(ruta, 'rb') as f:
+        # 1. Cabecera
+        magia, version, proximo_id, secuencia_diario, num_cadenas, num_items = \
+            _CABECERA_BINARIO.unpack(_leer_exacto(f, _CABECERA_BINARIO.size))
+        if magia != MAGIA_BINARIO:
+            raise ValueError("El archivo no tiene el formato binario de la agenda")
+        if version > VERSION_BINARIO:
+            raise ValueError(f"Versión {version} del formato binario no soportada (máximo {VERSION_BINARIO})")
+        cabecera['proximo_id'] = proximo_id
+        cabecera['secuencia_diario'] = secuencia_diario
+        
+        # 2. Tabla de cadenas
+        longitudes = struct.unpack(f'<{num_cadenas}I', _leer_exacto(f, 4 * num_cadenas))
+        bloque_cadenas = _leer_exacto(f, sum(longitudes))
+        cadenas = []
+        inicio = 0
+        for longitud in longitudes:
+            cadenas.append(bloque_cadenas[inicio:inicio + longitud].decode('utf-8'))
+            inicio += longitud
+        del bloque_cadenas
+        
+        # 3. Registros, por bloques
+        pendientes = num_items
+        while pendientes > 0:
+            en_bloque = min(pendientes, REGISTROS_POR_BLOQUE)
+            bloque = _leer_exacto(f, en_bloque * _REGISTRO_BINARIO.size)
+            for item_id, dni, nombre, asignatura, tipo, desc, nota in _REGISTRO_BINARIO.iter_unpack(bloque):
+                yield {
+                    'id': item_id,
+                    'dni': cadenas[dni],
+                    'nombre': cadenas[nombre],
+                    'asignatura': cadenas[asignatura],
+                    'tipo': cadenas[tipo],
+                    'desc': cadenas[desc],
+                    # NaN != NaN: así se distingue "sin nota"
+                    'nota': nota if nota == nota else None
+                }
+            pendientes -= en_bloque
+
+
+def convertir_archivo_datos(ruta_origen: str, ruta_destino: str, formato: str) -> int:
+    """
+    Convierte un archivo de agenda (formato de origen detectado automáticamente)
+    a otro formato, ítem a ítem. El origen y el destino pueden ser el mismo
+    archivo: el destino solo se sustituye al terminar. El diario no se incluye.
+    
+    :param ruta_origen: Archivo a convertir.
+    :param ruta_destino: Archivo a escribir.
+    :param formato: FORMATO_ARCHIVO_JSON, FORMATO_ARCHIVO_JSONL o FORMATO_ARCHIVO_BINARIO.
+    :return: Número de ítems convertidos.
+    :raises ValueError: Si el formato no existe o el origen está corrupto.
+    :raises OSError: Si no se pudo leer el origen o escribir el destino.
+    """
+    cabecera = {}
+    items = iterar_items_archivo(ruta_origen, cabecera)
+    
+    if formato == FORMATO_ARCHIVO_BINARIO:
+        # El formato binario escribe la cabecera al final: los ítems pasan en streaming
+        contador = [0]
+        def contar(items):
+            for item in items:
+                contador[0] += 1
+                yield item
+        guardado = guardar_datos_a_binario(contar(items), cabecera, ruta_destino)
+        num_items = contador[0]
+    elif formato in (FORMATO_ARCHIVO_JSON, FORMATO_ARCHIVO_JSONL):
+        # En JSON 'proximo_id' puede ir detrás de los ítems: hay que leerlos todos antes
+        lista_items = list(items)
+        num_items = len(lista_items)
+        cabecera.pop('formato', None)
+        if formato == FORMATO_ARCHIVO_JSONL:
+            guardado = guardar_datos_a_jsonl(lista_items, cabecera, ruta_destino)
+        else:
+            guardado = _guardar_json_en(ruta_destino, {'datos_agenda': lista_items, **cabecera})
+    else:
+        raise ValueError(f"Formato desconocido: {formato}")
+    
+    if not guardado:
+        raise OSError(f"No se pudo escribir '{ruta_destino}'")
+    return num_items
+
+
+# =================================================================
+# Diario de cambios (journal) de solo anexado
+# =================================================================
+
+# Extensión que se añade al archivo de datos para formar el nombre del diario
+EXTENSION_DIARIO = '.diario'
+
+
+def ruta_diario() -> str:
+    """Devuelve la ruta del diario asociado al archivo de datos actual."""
+    return NOMBRE_ARCHIVO_DATOS + EXTENSION_DIARIO
+
+
+def existe_diario() -> bool:
+    """Indica si existe el diario de cambios."""
+    return os.path.exists(ruta_diario())
+
+
+def tamano_diario() -> int:
+    """Devuelve el tamaño del diario en bytes (0 si no existe)."""
+    try:
+        return os.path.getsize(ruta_diario())
+    except OSError:
+        return 0
+
+
+def anexar_al_diario(registros: list[dict]) -> bool:
+    """
+    Añade registros al final del diario, uno por línea en JSON compacto, y
+    fuerza su escritura en disco antes de volver. Si el diario no termina en
+    salto de línea, se empieza en una línea nueva para no pegar el primer
+    registro a la línea anterior.
+    
+    :param registros: Lista de diccionarios (cambios) a anexar.
+    :return: True si se escribieron con éxito, False en caso de error.
+    """
+    try:
+        with open(ruta_diario(), 'ab+') as f:
+            separador = b''
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    separador = b'\n'
+            f.write(separador + b''.join(
+                json.dumps(registro, separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+                for registro in registros))
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    except IOError as e:
+        print(f" Error de E/S al escribir el diario: {e}")
+        return False
+
+
+def iterar_diario():
+    """
+    Recorre los registros del diario en orden. Si la última línea quedó a
+    medias (el programa se interrumpió mientras la escribía: no termina en
+    salto de línea), se descarta y el diario se recorta hasta la última línea
+    completa, para que los cambios que se anexen después no queden pegados a
+    ella y se pierdan. Una línea completa que no se puede leer es otra cosa
+    (archivo dañado o editado a mano): el diario no se toca y se lanza un error.
+    
+    :return: Generador de diccionarios (cambios).
+    :raises ValueError: Si una línea completa del diario no es válida.
+    """
+    if not existe_diario():
+        return
+    
+    ruta = ruta_diario()
+    corte = None
+    with open(ruta, 'rb') as f:
+        posicion = 0
+        for numero_linea, linea in enumerate(f, start=1):
+            if linea.strip():
+                try:
+                    registro = json.loads(linea)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Solo la última línea puede no terminar en salto de línea
+                    if linea.endswith(b'\n'):
+                        raise ValueError(f"La línea {numero_linea} del diario '{ruta}' no es válida.")
+                    corte = posicion
+                    break
+                yield registro
+            posicion += len(linea)
+    
+    if corte is not None:
+        descartados = os.path.getsize(ruta) - corte
+        print(f" Aviso: Se descarta una línea incompleta al final del diario '{ruta}' ({descartados} bytes).")
+        try:
+            os.truncate(ruta, corte)
+        except OSError as e:
+            print(f" Error de E/S al recortar el diario: {e}")
+
+
+def borrar_diario():
+    """Elimina el diario (tras escribir una instantánea completa)."""
+    try:
+        os.remove(ruta_diario())
+    except FileNotFoundError:
+        pass
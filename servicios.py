@@ -1,6 +1,21 @@
 
+from array import array
+import functools
+import heapq
+import itertools
+import math
+import operator
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+import almacenes
 import colores
+import estadisticas
+import informes_paralelos
 import persistencia
+from cerrojos import CerrojoLecturaEscritura
+from columnas import AlmacenColumnar
 from persistencia import NOMBRE_ARCHIVO_DATOS
 
 # =================================================================
@@ -10,10 +25,19 @@ from persistencia import NOMBRE_ARCHIVO_DATOS
 # Variable para generar IDs únicos y secuenciales
 _PROXIMO_ID = 1
 
-# Una LISTA de diccionarios 
+# Una LISTA de ítems (registros ItemAgenda, ver más abajo)
 # Esta es nuestra "Base de Datos" principal.
+# Los ítems eliminados se marcan con None ("lápida") para no desplazar el
+# resto de la lista; los huecos se eliminan al compactar.
 DATOS_AGENDA = []
 
+# Número de lápidas (None) que hay ahora mismo en DATOS_AGENDA
+_HUECOS_AGENDA = 0
+
+# Proporción de huecos en DATOS_AGENDA a partir de la cual se compacta la lista
+# (0.25 = cuando más de un 25% de las posiciones son lápidas)
+UMBRAL_COMPACTACION = 0.25
+
 # Un DICCIONARIO índice 
 # Mapea el ID (único) a la POSICIÓN (índice) en la lista DATOS_AGENDA
 # { id_item: posicion_en_lista }
@@ -25,16 +49,247 @@ ASIGNATURAS_PERMITIDAS = ('PYTHON', 'ACCESO A DATOS', 'SISTEMAS', 'INTERFACES',
 TIPOS_VALIDOS = ('TAREA', 'EXAMEN')
 RANGOS_NOTA = (0.0, 10.0)
 
+# Patrones de validación del DNI y del nombre (los usan el menú, la API y el modo por lotes)
+PATRON_DNI = r"^\d{8}[A-Za-z]$"
+PATRON_NOMBRE = r"^[A-Za-zÁÉÍÓÚáéíóúñÑ ]+$"
+_REGEX_DNI = re.compile(PATRON_DNI)
+_REGEX_NOMBRE = re.compile(PATRON_NOMBRE)
+
+# DICCIONARIOS de códigos: posición de cada asignatura/tipo en su tupla.
+# Los ítems guardan ese número pequeño en lugar de una copia del texto.
+CODIGOS_ASIGNATURA = {asignatura: codigo for codigo, asignatura in enumerate(ASIGNATURAS_PERMITIDAS)}
+CODIGOS_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_VALIDOS)}
+
+
+class ItemAgenda(Mapping):
+    """
+    Registro compacto de un ítem (tarea o examen).
+    
+    Usa __slots__ (sin diccionario interno por objeto) y guarda la asignatura y
+    el tipo como códigos de ASIGNATURAS_PERMITIDAS y TIPOS_VALIDOS.
+    Se comporta como un diccionario de solo lectura (item['nota'], item.get(...),
+    dict(item)), así que utilidades.imprimir_tabla y el resto del código que
+    trabajaba con diccionarios lo siguen usando igual.
+    """
+    __slots__ = ('id', 'dni', 'nombre', 'cod_asignatura', 'cod_tipo', 'desc', 'nota')
+    
+    # Claves de la vista diccionario, en el mismo orden que el formato JSON
+    CAMPOS = ('id', 'dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota')
+    
+    def __init__(self, item_id: int, dni: str, nombre: str, cod_asignatura: int, cod_tipo: int, desc: str, nota: float | None):
+        self.id = item_id
+        self.dni = dni
+        self.nombre = nombre
+        self.cod_asignatura = cod_asignatura
+        self.cod_tipo = cod_tipo
+        self.desc = desc
+        self.nota = nota
+    
+    @property
+    def asignatura(self) -> str:
+        return ASIGNATURAS_PERMITIDAS[self.cod_asignatura]
+    
+    @property
+    def tipo(self) -> str:
+        return TIPOS_VALIDOS[self.cod_tipo]
+    
+    # --- Vista diccionario (Mapping) ---
+    def __getitem__(self, clave: str):
+        if clave not in ItemAgenda.CAMPOS:
+            raise KeyError(clave)
+        return getattr(self, clave)
+    
+    def __iter__(self):
+        return iter(ItemAgenda.CAMPOS)
+    
+    def __len__(self) -> int:
+        return len(ItemAgenda.CAMPOS)
+    
+    def a_dict(self) -> dict:
+        """Devuelve una copia como diccionario normal (p. ej. para guardar en JSON)."""
+        return {clave: getattr(self, clave) for clave in ItemAgenda.CAMPOS}
+    
+    def __repr__(self) -> str:
+        return f"ItemAgenda({self.a_dict()})"
+
 # Un CONJUNTO para evitar duplicados
 # Almacena las asignaturas que SÍ tienen datos registrados.
 # Se actualiza automáticamente para saber qué asignaturas están en uso.
 ASIGNATURAS_ACTIVAS = set()
 
+# Un DICCIONARIO índice secundario por alumno
+# { DNI_EN_MAYUSCULAS: {'nombre': nombre_alumno, 'ids': {id_item: None, ...}} }
+# 'ids' es un diccionario usado como conjunto ordenado: mantiene el orden de
+# inserción (el mismo que DATOS_AGENDA) y permite borrar un id en O(1).
+INDICE_DNI = {}
+
+# DICCIONARIOS índice invertidos ("listas de ocurrencias")
+# { ASIGNATURA: {id_item: None, ...} } y { TIPO: {id_item: None, ...} }
+# Igual que en INDICE_DNI, los ids se guardan en el orden de DATOS_AGENDA.
+# El tamaño de cada lista hace además de contador: una asignatura deja de
+# estar activa cuando su lista se queda vacía.
+INDICE_ASIGNATURA = {}
+INDICE_TIPO = {}
+
+# DICCIONARIOS de agregados para las medias
+# { ASIGNATURA: [suma_notas, numero_notas] }
+# { (DNI, ASIGNATURA): [suma_notas, numero_notas] }
+# { DNI: [suma_notas, numero_notas] }  (media global del alumno)
+# Solo cuentan los ítems con nota (las notas None no suman ni cuentan).
+_AGREGADOS_ASIGNATURA = {}
+_AGREGADOS_ALUMNO_ASIGNATURA = {}
+_AGREGADOS_ALUMNO = {}
+
+# Almacén columnar OPCIONAL (ver columnas.py)
+# Si está activo, guarda notas y códigos en arrays contiguos alineados con
+# DATOS_AGENDA para las estadísticas que recorren toda la agenda.
+# Se activa con configurar_almacen_columnar(True).
+_COLUMNAS = None
+
+# Almacén en disco activo (almacenes.AlmacenAgenda) o None.
+# Con None (por defecto) la agenda vive en DATOS_AGENDA y se guarda en JSON;
+# con un almacén, las operaciones se delegan en él (ver configurar_almacen).
+_ALMACEN = None
+
+# Formatos del archivo de datos que se abren como almacén en lugar de cargarse
+# en memoria: función que abre el archivo y función que lo crea desde filas
+FORMATOS_ALMACEN = {
+    persistencia.FORMATO_ARCHIVO_SQLITE: (almacenes.abrir_almacen_sqlite, almacenes.crear_base_sqlite),
+    persistencia.FORMATO_ARCHIVO_REGISTROS: (almacenes.abrir_almacen_registros, almacenes.crear_archivo_registros),
+}
+
+# Una LISTA de cambios pendientes de escribir en el diario (journal)
+# Cada cambio es una tupla: ('alta', item), ('baja', id_item) o ('nota', id_item, nota)
+# Al guardar, solo se escriben estos cambios (ver guardar_datos_logica).
+_CAMBIOS_PENDIENTES = []
+
+# Número de secuencia del último cambio escrito en el diario.
+# Las instantáneas guardan este número para saber qué parte del diario ya incluyen.
+_SECUENCIA_DIARIO = 0
+
+# Generación de la agenda: aumenta con cada alta, baja, edición o carga.
+# Si coincide con la generación guardada, no hay nada nuevo que escribir en disco.
+_GENERACION = 0
+_GENERACION_GUARDADA = 0
+
+# Tamaño del diario (en bytes) a partir del cual, al guardar, se escribe una
+# instantánea completa de la agenda y el diario se vacía
+UMBRAL_DIARIO_BYTES = 1024 * 1024
+
+# Cerrojo de lectura/escritura de la agenda: las funciones públicas que leen
+# las estructuras globales lo retienen para leer (varias a la vez, ver _lectura)
+# y las que las cambian, para escribir (de una en una, ver _escritura). Así se
+# pueden llamar desde varios hilos (p. ej. el menú y el guardado automático).
+_CERROJO_AGENDA = CerrojoLecturaEscritura()
+
+# Cerrojo de guardado: solo un guardado, carga o cambio de formato a la vez.
+# Siempre se toma ANTES que _CERROJO_AGENDA para no bloquearse entre hilos.
+_CERROJO_GUARDADO = threading.RLock()
+
+# Función sin argumentos a la que se avisa tras cada cambio de la agenda
+# (la usa el guardado automático, ver configurar_aviso_cambios), o None.
+_AVISO_CAMBIO = None
+
+# Caché de consultas (ver _cacheada): {(consulta, argumentos normalizados): resultado},
+# en orden de uso (LRU). Solo vale para la generación _GENERACION_CACHE: en
+# cuanto la agenda cambia, se vacía entera.
+TAMANO_CACHE_CONSULTAS = 256
+_CACHE_CONSULTAS = OrderedDict()
+_GENERACION_CACHE = None
+
+# Resultados más largos que esto no se guardan en la caché (ocuparían mucha
+# memoria y su coste está en recorrerlos, no en obtenerlos del índice)
+MAX_ELEMENTOS_RESULTADO_CACHE = 10_000
+
+# Aciertos y fallos de la caché desde el arranque (o desde vaciar_cache_consultas)
+_ACIERTOS_CACHE = 0
+_FALLOS_CACHE = 0
+
+# La caché la tocan a la vez varios lectores: se protege con su propio cerrojo
+_CERROJO_CACHE = threading.Lock()
+
 
 # =================================================================
 # 2. FUNCIONES AUXILIARES INTERNAS 
 # =================================================================
 
+def _lectura(funcion):
+    """
+    Decorador: ejecuta la función reteniendo el cerrojo de la agenda para leer.
+    Los almacenes en disco no admiten varios hilos a la vez: con uno activo,
+    la función se ejecuta en exclusiva.
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with _CERROJO_AGENDA.lectura():
+            if _ALMACEN is None:
+                return funcion(*args, **kwargs)
+        with _CERROJO_AGENDA.escritura():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+def _escritura(funcion):
+    """Decorador: ejecuta la función reteniendo el cerrojo de la agenda para escribir."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with _CERROJO_AGENDA.escritura():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+def _cacheada(normalizar):
+    """
+    Decorador: memoriza el resultado de una consulta mientras la agenda no
+    cambie (misma _GENERACION), con expulsión LRU a partir de
+    TAMANO_CACHE_CONSULTAS entradas. Debe ir DEBAJO de @_lectura: así la
+    generación no cambia entre mirar la caché y calcular el resultado.
+    Las listas se devuelven copiadas (sus elementos no deben modificarse).
+
+    :param normalizar: Función con los mismos argumentos que la consulta que
+                       devuelve la clave (hashable): p. ej. DNI en mayúsculas.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            global _GENERACION_CACHE, _ACIERTOS_CACHE, _FALLOS_CACHE
+
+            clave = (funcion.__name__, normalizar(*args, **kwargs))
+            with _CERROJO_CACHE:
+                if _GENERACION_CACHE != _GENERACION:
+                    _CACHE_CONSULTAS.clear()
+                    _GENERACION_CACHE = _GENERACION
+                encontrado = clave in _CACHE_CONSULTAS
+                if encontrado:
+                    _ACIERTOS_CACHE += 1
+                    _CACHE_CONSULTAS.move_to_end(clave)
+                    resultado = _CACHE_CONSULTAS[clave]
+                else:
+                    _FALLOS_CACHE += 1
+
+            if not encontrado:
+                resultado = funcion(*args, **kwargs)
+                if TAMANO_CACHE_CONSULTAS > 0 and not (isinstance(resultado, list)
+                                                       and len(resultado) > MAX_ELEMENTOS_RESULTADO_CACHE):
+                    with _CERROJO_CACHE:
+                        _CACHE_CONSULTAS[clave] = resultado
+                        while len(_CACHE_CONSULTAS) > TAMANO_CACHE_CONSULTAS:
+                            _CACHE_CONSULTAS.popitem(last=False)
+
+            return list(resultado) if isinstance(resultado, list) else resultado
+        return envoltura
+    return decorador
+
+def _normalizar_texto(texto: str | None) -> str | None:
+    """Clave de caché de un filtro de texto: sin espacios en los extremos y en mayúsculas (None si está vacío)."""
+    return texto.strip().upper() if texto else None
+
+def _escritura_guardado(funcion):
+    """Decorador: como _escritura, pero retiene antes el cerrojo de guardado (cargas, cambios de formato)."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with _CERROJO_GUARDADO, _CERROJO_AGENDA.escritura():
+            return funcion(*args, **kwargs)
+    return envoltura
+
 def _obtener_proximo_id() -> int:
     """
     Devuelve el siguiente ID único y lo incrementa para el próximo uso.
@@ -47,34 +302,251 @@ def _obtener_proximo_id() -> int:
 
     return current_id
 
+def _crear_item(item_id: int, dni: str, nombre: str, asignatura: str, tipo: str, desc: str, nota: float | None) -> ItemAgenda:
+    """
+    Construye un ItemAgenda normalizando los textos y traduciendo la asignatura
+    y el tipo a sus códigos. El DNI y el nombre se comparten con los demás
+    ítems del mismo alumno (INDICE_DNI) para no guardar una copia por ítem.
+    
+    :return: El registro creado (todavía sin añadir a DATOS_AGENDA).
+    :raises ValueError: Si la asignatura o el tipo no están permitidos.
+    """
+    cod_asignatura = CODIGOS_ASIGNATURA.get(asignatura.strip().upper())
+    cod_tipo = CODIGOS_TIPO.get(tipo.strip().upper())
+    
+    if cod_asignatura is None:
+        raise ValueError(f"Asignatura '{asignatura}' no permitida.")
+    if cod_tipo is None:
+        raise ValueError(f"Tipo '{tipo}' no permitido.")
+    
+    dni = dni.strip()
+    nombre = nombre.strip()
+    
+    # Internado por DNI: si el alumno ya existe reutilizamos sus cadenas
+    entrada_dni = INDICE_DNI.get(dni.upper())
+    if entrada_dni is not None:
+        if entrada_dni['nombre'] == nombre:
+            nombre = entrada_dni['nombre']
+        if entrada_dni['ids']:
+            primer_item = DATOS_AGENDA[INDICE_AGENDA[next(iter(entrada_dni['ids']))]]
+            if primer_item.dni == dni:
+                dni = primer_item.dni
+    
+    return ItemAgenda(item_id, dni, nombre, cod_asignatura, cod_tipo, desc.strip(), nota)
+
+def _crear_item_desde_dict(datos_item: dict) -> ItemAgenda:
+    """
+    Construye un ItemAgenda a partir de un diccionario con el formato del archivo.
+    
+    :raises KeyError: Si falta algún campo.
+    :raises ValueError: Si la asignatura o el tipo no están permitidos.
+    """
+    return _crear_item(datos_item['id'], datos_item['dni'], datos_item['nombre'],
+                       datos_item['asignatura'], datos_item['tipo'],
+                       datos_item['desc'], datos_item['nota'])
+
+def _anadir_item(item: ItemAgenda):
+    """
+    Añade un registro al final de DATOS_AGENDA y lo indexa (sin recorrer la lista).
+    """
+    DATOS_AGENDA.append(item)
+    _indexar_item(item, len(DATOS_AGENDA) - 1)
+
+def _avanzar_generacion():
+    """Marca que la agenda ha cambiado (hay algo nuevo que guardar)."""
+    global _GENERACION
+    _GENERACION += 1
+    if _AVISO_CAMBIO is not None:
+        _AVISO_CAMBIO()
+
+def _registrar_cambio(cambio: tuple):
+    """
+    Apunta un cambio pendiente de guardar y avanza la generación de la agenda.
+    
+    :param cambio: Tupla ('alta', item), ('baja', id_item) o ('nota', id_item, nota).
+    """
+    _CAMBIOS_PENDIENTES.append(cambio)
+    _avanzar_generacion()
+
+def _fila_item(item: ItemAgenda) -> tuple:
+    """Convierte un ItemAgenda en la tupla que intercambian los almacenes (orden de CAMPOS)."""
+    return (item.id, item.dni, item.nombre, item.asignatura, item.tipo, item.desc, item.nota)
+
+def _motivo_rechazo_almacen(dni: str, nombre: str, asignatura: str, tipo: str, desc: str, nota: float | None) -> str | None:
+    """
+    Comprueba si el almacén activo admite un ítem nuevo (p. ej. anchos fijos).
+    
+    :return: El motivo del rechazo, o None si se admite (o no hay almacén).
+    """
+    if _ALMACEN is None:
+        return None
+    return _ALMACEN.validar_fila((None, dni.strip(), nombre.strip(), asignatura.strip().upper(),
+                                  tipo.strip().upper(), desc.strip(), nota))
+
+def _item_desde_fila(fila: tuple) -> ItemAgenda:
+    """Convierte una fila de un almacén en un ItemAgenda (copia de solo lectura)."""
+    return _crear_item(*fila)
+
+def _indexar_item(item: ItemAgenda, posicion: int):
+    """
+    Registra un ítem en las estructuras auxiliares (ÍNDICES y CONJUNTO) en O(1).
+    
+    :param item: El ítem recién añadido a DATOS_AGENDA.
+    :param posicion: Su posición en la lista DATOS_AGENDA.
+    """
+    INDICE_AGENDA[item.id] = posicion
+    
+    asignatura = item.asignatura
+    INDICE_ASIGNATURA.setdefault(asignatura, {})[item.id] = None
+    ASIGNATURAS_ACTIVAS.add(asignatura)
+    
+    INDICE_TIPO.setdefault(item.tipo, {})[item.id] = None
+    
+    # Índice por DNI: el nombre registrado es el del último ítem del alumno
+    entrada_dni = INDICE_DNI.setdefault(item.dni.upper(), {'nombre': None, 'ids': {}})
+    entrada_dni['nombre'] = item.nombre
+    entrada_dni['ids'][item.id] = None
+    
+    _acumular_nota(item, item.nota, 1)
+    
+    # Los ítems siempre se indexan justo al añadirlos al final de DATOS_AGENDA
+    if _COLUMNAS is not None:
+        _COLUMNAS.anadir(item)
+
+def _acumular_nota(item: ItemAgenda, nota: float | None, signo: int):
+    """
+    Suma (signo=1) o resta (signo=-1) una nota en los agregados de su
+    asignatura, de su par (alumno, asignatura) y de su alumno.
+    Las notas None se ignoran.
+    
+    :param item: El ítem al que pertenece la nota.
+    :param nota: La nota a acumular (puede ser None).
+    :param signo: 1 para añadirla, -1 para quitarla.
+    """
+    if nota is None:
+        return
+    
+    asignatura = item.asignatura
+    dni_upper = item.dni.upper()
+    claves = (
+        (_AGREGADOS_ASIGNATURA, asignatura),
+        (_AGREGADOS_ALUMNO_ASIGNATURA, (dni_upper, asignatura)),
+        (_AGREGADOS_ALUMNO, dni_upper),
+    )
+    
+    for agregados, clave in claves:
+        acumulado = agregados.setdefault(clave, [0.0, 0])
+        acumulado[0] += signo * nota
+        acumulado[1] += signo
+        
+        # Sin notas: borramos la entrada (y así no arrastramos errores de redondeo)
+        if acumulado[1] <= 0:
+            del agregados[clave]
+
+def _quitar_de_lista(indice_invertido: dict, clave: str, item_id: int):
+    """
+    Quita un id de una lista de ocurrencias y borra la clave si se queda vacía.
+    
+    :param indice_invertido: INDICE_ASIGNATURA o INDICE_TIPO.
+    :param clave: La asignatura o el tipo del ítem.
+    :param item_id: El id a quitar.
+    """
+    ids = indice_invertido.get(clave)
+    if ids is not None:
+        ids.pop(item_id, None)
+        if not ids:
+            del indice_invertido[clave]
+
+def _desindexar_item(item: ItemAgenda):
+    """
+    Quita un ítem de las estructuras auxiliares. La asignatura solo deja de
+    estar activa cuando su lista de ocurrencias se queda vacía.
+    Se debe llamar con el ítem todavía presente en DATOS_AGENDA e INDICE_AGENDA
+    coherentes para el resto de ítems.
+    
+    :param item: El ítem que se va a eliminar de DATOS_AGENDA.
+    """
+    INDICE_AGENDA.pop(item.id, None)
+    
+    asignatura = item.asignatura
+    _quitar_de_lista(INDICE_ASIGNATURA, asignatura, item.id)
+    if asignatura not in INDICE_ASIGNATURA:
+        ASIGNATURAS_ACTIVAS.discard(asignatura)
+    
+    _quitar_de_lista(INDICE_TIPO, item.tipo, item.id)
+    _acumular_nota(item, item.nota, -1)
+    
+    dni_upper = item.dni.upper()
+    entrada_dni = INDICE_DNI.get(dni_upper)
+    if entrada_dni is not None:
+        entrada_dni['ids'].pop(item.id, None)
+        if not entrada_dni['ids']:
+            # El alumno ya no tiene ítems
+            del INDICE_DNI[dni_upper]
+        else:
+            # El nombre vuelve a ser el del último ítem que le queda
+            ultimo_id = next(reversed(entrada_dni['ids']))
+            entrada_dni['nombre'] = DATOS_AGENDA[INDICE_AGENDA[ultimo_id]].nombre
+
+def _compactar_agenda():
+    """
+    Elimina las lápidas (None) de DATOS_AGENDA y reescribe INDICE_AGENDA de una
+    sola pasada. Las listas de ocurrencias guardan ids, no posiciones, así que
+    no hace falta tocarlas.
+    """
+    global _HUECOS_AGENDA
+    
+    # Modificamos la lista "in situ" para que el resto de módulos siga viendo el mismo objeto
+    DATOS_AGENDA[:] = [item for item in DATOS_AGENDA if item is not None]
+    
+    for posicion, item in enumerate(DATOS_AGENDA):
+        INDICE_AGENDA[item.id] = posicion
+    
+    if _COLUMNAS is not None:
+        _COLUMNAS.compactar()
+    
+    _HUECOS_AGENDA = 0
+
+def _compactar_si_procede():
+    """
+    Compacta DATOS_AGENDA si la proporción de lápidas supera UMBRAL_COMPACTACION.
+    """
+    if DATOS_AGENDA and _HUECOS_AGENDA > UMBRAL_COMPACTACION * len(DATOS_AGENDA):
+        _compactar_agenda()
+
 def _actualizar_estructuras_auxiliares():
     """
-    Recalcula el DICCIONARIO ÍNDICE y el CONJUNTO de asignaturas activas.
+    Recalcula desde cero el DICCIONARIO ÍNDICE y el CONJUNTO de asignaturas activas.
     
-    Esta función se debe llamar SIEMPRE después de un ALTA o una BAJA
-    para mantener la integridad de los datos.
+    Es una reconstrucción completa (recorre toda la lista), así que solo se usa
+    al CARGAR los datos. Las altas y bajas mantienen las estructuras de forma
+    incremental con _indexar_item y _desindexar_item.
     """
     global INDICE_AGENDA, ASIGNATURAS_ACTIVAS
     
     # Limpiamos las estructuras para regenerarlas desde cero
     INDICE_AGENDA.clear()
     ASIGNATURAS_ACTIVAS.clear()
+    INDICE_DNI.clear()
+    INDICE_ASIGNATURA.clear()
+    INDICE_TIPO.clear()
+    _AGREGADOS_ASIGNATURA.clear()
+    _AGREGADOS_ALUMNO_ASIGNATURA.clear()
+    _AGREGADOS_ALUMNO.clear()
+    if _COLUMNAS is not None:
+        _COLUMNAS.vaciar()
     
     # Recorremos la lista de datos principal para construir los auxiliares
     for indice, item in enumerate(DATOS_AGENDA):
-        
-        # 1. Poblamos el DICCIONARIO ÍNDICE
-        item_id = item['id']
-        INDICE_AGENDA[item_id] = indice
-        
-        # 2. Poblamos el CONJUNTO de asignaturas activas
-        ASIGNATURAS_ACTIVAS.add(item['asignatura'].upper())
+        if item is not None:
+            _indexar_item(item, indice)
 
 
 # =================================================================
 # 3. LÓGICA DE NEGOCIO PURA (CRUD)
 # =================================================================
 
+@_escritura
 def alta_item_logica(dni: str, nombre: str, asignatura: str, tipo: str, desc: str, nota: float | None) -> bool:
     """
     Registra un nuevo ítem (tarea o examen) en la base de datos (DATOS_AGENDA).
@@ -101,47 +573,202 @@ def alta_item_logica(dni: str, nombre: str, asignatura: str, tipo: str, desc: st
     if tipo.upper() not in TIPOS_VALIDOS:
         print(f"{colores.C_ROJO}Error Lógico: Tipo '{tipo}' no permitido.{colores.C_FIN}")
         es_valido = False
+    
+    if es_valido:
+        motivo = _motivo_rechazo_almacen(dni, nombre, asignatura, tipo, desc, nota)
+        if motivo is not None:
+            print(f"{colores.C_ROJO}Error Lógico: {motivo}{colores.C_FIN}")
+            es_valido = False
 
     # 2. Ejecución que solo ocurre si es válido
     if es_valido:
         # 2.1. Generar ID único
         nuevo_id = _obtener_proximo_id()
         
-        # 2.2. Crear el diccionario (el "paquete" de datos o "ítem")
-        nuevo_item = {
-            'id': nuevo_id,
-            'dni': dni.strip(),
-            'nombre': nombre.strip(),
-            'asignatura': asignatura.upper(),
-            'tipo': tipo.upper(),
-            'desc': desc.strip(),
-            'nota': nota
-        }
+        # 2.2. Crear el registro (el "paquete" de datos o "ítem")
+        nuevo_item = _crear_item(nuevo_id, dni, nombre, asignatura, tipo, desc, nota)
         
-        # 2.3. Guardar y Actualizar
-        DATOS_AGENDA.append(nuevo_item)
-        _actualizar_estructuras_auxiliares()
+        # 2.3. Guardar y Actualizar (solo el nuevo ítem, sin recorrer la lista)
+        if _ALMACEN is not None:
+            _ALMACEN.insertar([_fila_item(nuevo_item)], _PROXIMO_ID)
+            _avanzar_generacion()
+        else:
+            _anadir_item(nuevo_item)
+            _registrar_cambio(('alta', nuevo_item))
         
     return es_valido # Retorno 
 
+def motivo_dni_nombre_no_valido(dni, nombre) -> str | None:
+    """
+    Valida el DNI y el nombre de un alta que no se pide por teclado (API,
+    modo por lotes, importación) con los mismos patrones que el menú
+    (PATRON_DNI, PATRON_NOMBRE).
+
+    :return: El motivo del error, o None si ambos son válidos.
+    """
+    if not isinstance(dni, str) or not _REGEX_DNI.fullmatch(dni.strip()):
+        return "Formato DNI incorrecto. Debe ser 8 números y 1 letra."
+    if not isinstance(nombre, str) or not _REGEX_NOMBRE.fullmatch(nombre.strip()):
+        return "El nombre solo puede contener letras y espacios."
+    return None
+
+def _validar_registro_importado(registro) -> tuple[dict | None, str | None]:
+    """
+    Valida y normaliza un registro externo (fila de CSV, línea de JSONL...).
+    No imprime nada: devuelve el motivo del error para el informe.
+    
+    :param registro: Diccionario con las claves dni, nombre, asignatura, tipo, desc y nota (opcional).
+    :return: Tupla (datos normalizados o None, motivo del error o None).
+    """
+    if not isinstance(registro, Mapping):
+        return None, f"Registro no válido (se esperaba un objeto): {str(registro)[:60]!r}"
+    
+    datos = {}
+    for campo in ('dni', 'nombre', 'asignatura', 'tipo', 'desc'):
+        valor = registro.get(campo)
+        if not isinstance(valor, str) or not valor.strip():
+            return None, f"Falta el campo '{campo}' o está vacío."
+        datos[campo] = valor.strip()
+    
+    motivo = motivo_dni_nombre_no_valido(datos['dni'], datos['nombre'])
+    if motivo is not None:
+        return None, motivo
+    
+    if datos['asignatura'].upper() not in CODIGOS_ASIGNATURA:
+        return None, f"Asignatura '{datos['asignatura']}' no permitida."
+    if datos['tipo'].upper() not in CODIGOS_TIPO:
+        return None, f"Tipo '{datos['tipo']}' no permitido."
+    
+    # La nota es opcional; en CSV llega como texto y la cadena vacía significa "sin nota"
+    nota = registro.get('nota')
+    if isinstance(nota, str):
+        nota = nota.strip() or None
+    if isinstance(nota, bool):
+        # float(True) sería 1.0: un booleano no es una nota (igual que en PATCH /items/<id>)
+        return None, f"Nota '{nota}' no numérica."
+    if nota is not None:
+        try:
+            nota = float(nota)
+        except (TypeError, ValueError):
+            return None, f"Nota '{nota}' no numérica."
+        if not RANGOS_NOTA[0] <= nota <= RANGOS_NOTA[1]:
+            return None, f"Nota {nota} fuera del rango {RANGOS_NOTA[0]}-{RANGOS_NOTA[1]}."
+    datos['nota'] = nota
+    
+    return datos, None
+
+def alta_items_bulk(registros) -> dict:
+    """
+    Da de alta muchos ítems de una vez (importación de inicio de semestre).
+    
+    1. Valida todos los registros y separa los erróneos (sin imprimir nada).
+       Se hace SIN el cerrojo: 'registros' puede ser un generador que va
+       leyendo el archivo, y mientras tanto el resto de hilos sigue trabajando.
+    2. Con el cerrojo de escritura (_alta_items_validados): reserva un bloque
+       de IDs consecutivos y añade e indexa los ítems en una sola pasada.
+    
+    :param registros: Iterable de diccionarios (por ejemplo persistencia.leer_registros_csv(...)).
+    :return: Informe {'insertados': n, 'primer_id': id o None, 'ultimo_id': id o None,
+             'errores': [{'posicion': n, 'motivo': texto}, ...]} (posición empezando en 1).
+    """
+    validos = []
+    errores = []
+    for posicion, registro in enumerate(registros, start=1):
+        datos, motivo = _validar_registro_importado(registro)
+        if datos is None:
+            errores.append({'posicion': posicion, 'motivo': motivo})
+        else:
+            validos.append((posicion, datos))
+    
+    return _alta_items_validados(validos, errores)
+
+@_escritura
+def _alta_items_validados(validos: list[tuple[int, dict]], errores: list[dict]) -> dict:
+    """
+    Parte de alta_items_bulk que retiene el cerrojo de escritura.
+    
+    :param validos: Lista de (posición, datos normalizados) ya validados.
+    :param errores: Errores de la validación; se le añaden los del almacén activo.
+    :return: El informe de alta_items_bulk.
+    """
+    global _PROXIMO_ID
+    
+    # 1. Límites del almacén activo (puede cambiar, por eso se mira con el cerrojo)
+    if _ALMACEN is not None:
+        admitidos = []
+        for posicion, datos in validos:
+            motivo = _motivo_rechazo_almacen(**datos)
+            if motivo is None:
+                admitidos.append((posicion, datos))
+            else:
+                errores.append({'posicion': posicion, 'motivo': motivo})
+        if len(admitidos) < len(validos):
+            errores.sort(key=lambda error: error['posicion'])
+        validos = admitidos
+    
+    # 2. Bloque de IDs: se reservan todos de una vez
+    primer_id = _PROXIMO_ID
+    _PROXIMO_ID += len(validos)
+    
+    # 3. Alta e indexado en una sola pasada (sin reconstrucciones)
+    if _ALMACEN is not None:
+        # Un solo lote dentro de la transacción abierta del almacén
+        filas = [_fila_item(_crear_item(item_id, **datos))
+                 for item_id, (_, datos) in enumerate(validos, start=primer_id)]
+        _ALMACEN.insertar(filas, _PROXIMO_ID)
+        _avanzar_generacion()
+    else:
+        for item_id, (_, datos) in enumerate(validos, start=primer_id):
+            nuevo_item = _crear_item(item_id, **datos)
+            _anadir_item(nuevo_item)
+            _registrar_cambio(('alta', nuevo_item))
+    
+    return {
+        'insertados': len(validos),
+        'primer_id': primer_id if validos else None,
+        'ultimo_id': primer_id + len(validos) - 1 if validos else None,
+        'errores': errores
+    }
+
+@_lectura
 def listar_todos_los_items() -> list[dict]:
     """
     Devuelve la lista completa de todos los ítems de la agenda.
     (Cumple el requisito de recorrido simple para Listas de diccionarios).
     
-    :return: Una copia de DATOS_AGENDA para evitar modificaciones externas directas.
+    :return: Una copia de DATOS_AGENDA (sin lápidas) para evitar modificaciones externas directas.
     """
-    # Recorrido simple sobre DATOS_AGENDA. Devolvemos una copia
-    return list(DATOS_AGENDA)
+    if _ALMACEN is not None:
+        return [_item_desde_fila(fila) for fila in _ALMACEN.filtrar()]
+    
+    # Recorrido simple sobre DATOS_AGENDA saltando los huecos. Devolvemos una copia
+    return [item for item in DATOS_AGENDA if item is not None]
+
+@_lectura
+def contar_items() -> int:
+    """
+    Devuelve el número de ítems vivos de la agenda (sin contar lápidas).
+    
+    :return: Número de ítems registrados.
+    """
+    if _ALMACEN is not None:
+        return _ALMACEN.contar()
+    return len(INDICE_AGENDA)
 
 
+@_lectura
 def buscar_por_id(item_id: int) -> tuple[dict | None, int | None]:
     """
     Busca un ítem por su ID usando el índice para eficiencia.
     
     :param item_id: ID único del ítem a buscar.
     :return: Una tupla con (el ítem encontrado o None, su índice en DATOS_AGENDA o None).
+             Con un almacén activo el índice es siempre None.
     """
+    if _ALMACEN is not None:
+        fila = _ALMACEN.obtener(item_id)
+        return (_item_desde_fila(fila), None) if fila is not None else (None, None)
+    
     # Búsqueda eficiente usando el DICCIONARIO ÍNDICE
     indice = INDICE_AGENDA.get(item_id) 
     if indice is not None:
@@ -149,44 +776,116 @@ def buscar_por_id(item_id: int) -> tuple[dict | None, int | None]:
         return DATOS_AGENDA[indice], indice
     return None, None
 
+@_lectura
 def buscar_nombre_por_dni(dni: str) -> str | None:
     """
-    Busca en DATOS_AGENDA si un DNI ya existe y devuelve el nombre asociado.
+    Busca en el índice por DNI si un alumno ya existe y devuelve el nombre asociado.
     
     :param dni: El DNI a buscar.
     :return: El nombre (str) si se encuentra, o None si no existe.
     """
-    dni_upper = dni.upper()
-    nombre_encontrado = None
+    if _ALMACEN is not None:
+        return _ALMACEN.nombre_por_dni(dni.strip())
     
-    # Recorremos la lista buscando la primera coincidencia
-    for item in DATOS_AGENDA:
-        if item['dni'].upper() == dni_upper:
-            nombre_encontrado = item['nombre']
-            # Encontramos uno, asumimos que el nombre es correcto y salimos
+    # Búsqueda directa en el DICCIONARIO ÍNDICE por DNI (sin recorrer la lista)
+    entrada_dni = INDICE_DNI.get(dni.strip().upper())
     
-    # Devolvemos el último nombre encontrado que coincida con ese DNI
-    return nombre_encontrado
+    if entrada_dni is None:
+        return None
+    
+    # Nombre del último ítem registrado con ese DNI
+    return entrada_dni['nombre']
 
 
-def eliminar_item_logica(item_id: int) -> bool:
+def _eliminar_sin_compactar(item_id: int) -> bool:
     """
-    Elimina un ítem de la agenda.
+    Marca con una lápida la posición del ítem y lo quita de los índices en O(1).
+    No compacta: eso lo deciden eliminar_item_logica y las bajas masivas.
     
     :param item_id: ID del ítem a eliminar.
     :return: True si se eliminó, False si el ID no se encontró.
     """
+    global _HUECOS_AGENDA
+    
     pudo_eliminar = False
     item, indice = buscar_por_id(item_id) 
 
     if item is not None:
-        # Eliminación
-        DATOS_AGENDA.pop(indice)
-        _actualizar_estructuras_auxiliares()
+        # Eliminación: la lista no se desplaza, solo se deja un hueco
+        _desindexar_item(item)
+        DATOS_AGENDA[indice] = None
+        _HUECOS_AGENDA += 1
+        if _COLUMNAS is not None:
+            _COLUMNAS.marcar_hueco(indice)
         pudo_eliminar = True
         
+    return pudo_eliminar
+
+@_escritura
+def eliminar_item_logica(item_id: int) -> bool:
+    """
+    Elimina un ítem de la agenda.
+    
+    :param item_id: ID del ítem a eliminar.
+    :return: True si se eliminó, False si el ID no se encontró.
+    """
+    if _ALMACEN is not None:
+        pudo_eliminar = _ALMACEN.eliminar(item_id)
+        if pudo_eliminar:
+            _avanzar_generacion()
+        return pudo_eliminar
+    
+    pudo_eliminar = _eliminar_sin_compactar(item_id)
+    
+    if pudo_eliminar:
+        _registrar_cambio(('baja', item_id))
+        _compactar_si_procede()
+        
     return pudo_eliminar 
 
+@_escritura
+def eliminar_items_asignatura(asignatura: str) -> int:
+    """
+    Elimina de una vez todos los ítems de una asignatura (baja de un curso).
+    Cada baja es O(1) y la compactación, si hace falta, se hace una sola vez al final.
+    
+    :param asignatura: Nombre de la asignatura (case-insensitive).
+    :return: Número de ítems eliminados.
+    """
+    if _ALMACEN is not None:
+        num_eliminados = _ALMACEN.eliminar_asignatura(asignatura.strip().upper())
+        if num_eliminados:
+            _avanzar_generacion()
+        return num_eliminados
+    
+    # Copiamos los ids porque la lista de ocurrencias se vacía mientras borramos
+    ids_asignatura = list(INDICE_ASIGNATURA.get(asignatura.strip().upper(), {}))
+    
+    for item_id in ids_asignatura:
+        _eliminar_sin_compactar(item_id)
+        _registrar_cambio(('baja', item_id))
+    
+    _compactar_si_procede()
+    
+    return len(ids_asignatura)
+
+def _editar_nota(item: ItemAgenda, indice: int, nueva_puntuacion: float | None):
+    """
+    Cambia la nota de un ítem manteniendo los agregados y las columnas.
+    
+    :param item: El ítem a modificar.
+    :param indice: Su posición en DATOS_AGENDA.
+    :param nueva_puntuacion: La nueva nota (puede ser None).
+    """
+    # Actualización segura: sacamos la nota antigua de los agregados y
+    # metemos la nueva (cualquiera de las dos puede ser None)
+    _acumular_nota(item, item.nota, -1)
+    item.nota = nueva_puntuacion
+    _acumular_nota(item, nueva_puntuacion, 1)
+    if _COLUMNAS is not None:
+        _COLUMNAS.editar_nota(indice, nueva_puntuacion)
+
+@_escritura
 def editar_puntuacion_logica(item_id: int, nueva_puntuacion: float | None) -> bool:
     """
     Actualiza la puntuación de un ítem existente.
@@ -195,16 +894,23 @@ def editar_puntuacion_logica(item_id: int, nueva_puntuacion: float | None) -> bo
     :param nueva_puntuacion: La nueva nota (puede ser None si se quita la nota).
     :return: True si se modificó, False si el ID no se encontró.
     """
+    if _ALMACEN is not None:
+        pudo_editar = _ALMACEN.editar_nota(item_id, nueva_puntuacion)
+        if pudo_editar:
+            _avanzar_generacion()
+        return pudo_editar
+    
     pudo_editar = False
     item, indice = buscar_por_id(item_id)
 
     if item is not None:
-        # Actualización segura
-        DATOS_AGENDA[indice]['nota'] = nueva_puntuacion
+        _editar_nota(item, indice, nueva_puntuacion)
+        _registrar_cambio(('nota', item_id, nueva_puntuacion))
         pudo_editar = True
         
     return pudo_editar
 
+@_lectura
 def buscar_items_por_dni(dni: str) -> list[dict]:
     """
     Busca todos los ítems (tareas/exámenes) asociados a un DNI específico.
@@ -212,139 +918,276 @@ def buscar_items_por_dni(dni: str) -> list[dict]:
     :param dni: El DNI del alumno a buscar (case-insensitive).
     :return: Una lista de diccionarios con todos los ítems encontrados.
     """
-    dni_upper = dni.upper()
+    if _ALMACEN is not None:
+        return [_item_desde_fila(fila) for fila in _ALMACEN.filtrar(dni=dni.strip())]
+    
+    entrada_dni = INDICE_DNI.get(dni.strip().upper())
+    
+    if entrada_dni is None:
+        return []
     
-    # Comprensión de listas: encuentra todos los ítems del alumno
+    # Comprensión de listas: solo visitamos los ítems del alumno
     items_encontrados = [
-        item
-        for item in DATOS_AGENDA
-        if item['dni'].upper() == dni_upper
+        DATOS_AGENDA[INDICE_AGENDA[item_id]]
+        for item_id in entrada_dni['ids']
     ]
     
     return items_encontrados
 
+def _iterar_items_filtrados(dni: str | None, asignatura: str | None, tipo: str | None):
+    """
+    Generador de los ítems que cumplen todos los filtros, en orden de alta.
+    No retiene el cerrojo: quien lo recorre debe retenerlo hasta terminar.
+    No recorre la lista: cruza las listas de ocurrencias de INDICE_DNI,
+    INDICE_ASIGNATURA e INDICE_TIPO.
+
+    :param dni: El DNI a filtrar (o None para no filtrar por DNI).
+    :param asignatura: La Asignatura a filtrar (o None para no filtrar).
+    :param tipo: El Tipo (TAREA/EXAMEN) a filtrar (o None para no filtrar).
+    """
+    # Preparamos los filtros para que no sean sensibles a mayúsculas
+    dni_f = dni.strip().upper() if dni else None
+    asig_f = asignatura.strip().upper() if asignatura else None
+    tipo_f = tipo.strip().upper() if tipo else None
+
+    # Con un almacén, el filtro se resuelve en él (p. ej. una consulta SQL con índices)
+    if _ALMACEN is not None:
+        yield from map(_item_desde_fila, _ALMACEN.filtrar(dni_f, asig_f, tipo_f))
+        return
+
+    # 1. Reunimos la lista de ocurrencias de cada filtro activo
+    listas = []
+    if dni_f is not None:
+        listas.append(INDICE_DNI[dni_f]['ids'] if dni_f in INDICE_DNI else {})
+    if asig_f is not None:
+        listas.append(INDICE_ASIGNATURA.get(asig_f, {}))
+    if tipo_f is not None:
+        listas.append(INDICE_TIPO.get(tipo_f, {}))
+
+    # Sin filtros: todos los ítems (saltando los huecos)
+    if not listas:
+        yield from (item for item in DATOS_AGENDA if item is not None)
+        return
+
+    # 2. Intersección empezando por la lista más pequeña: solo recorremos esa
+    # y comprobamos la pertenencia a las demás en O(1).
+    # Todas las listas están en el orden de DATOS_AGENDA, así que el resultado
+    # conserva el orden de inserción.
+    listas.sort(key=len)
+    menor, resto = listas[0], listas[1:]
+
+    for item_id in menor:
+        if all(item_id in otra for otra in resto):
+            yield DATOS_AGENDA[INDICE_AGENDA[item_id]]
+
+@_lectura
+@_cacheada(lambda dni, asignatura, tipo: (_normalizar_texto(dni), _normalizar_texto(asignatura), _normalizar_texto(tipo)))
 def filtrar_items_logica(dni: str | None, asignatura: str | None, tipo: str | None) -> list[dict]:
     """
-    Filtra la lista principal de ítems (DATOS_AGENDA) basado en múltiples criterios.
+    Filtra la lista principal de ítems (DATOS_AGENDA) basado en múltiples criterios
+    (ver _iterar_items_filtrados).
     
     :param dni: El DNI a filtrar (o None para no filtrar por DNI).
     :param asignatura: La Asignatura a filtrar (o None para no filtrar).
     :param tipo: El Tipo (TAREA/EXAMEN) a filtrar (o None para no filtrar).
     :return: Una lista de diccionarios que coinciden con TODOS los filtros.
     """
-    
-    # Preparamos los filtros para que no sean sensibles a mayúsculas
-    dni_f = dni.upper() if dni else None
-    asig_f = asignatura.upper() if asignatura else None
-    tipo_f = tipo.upper() if tipo else None
-
-    # Comprensión de listas: Recorremos DATOS_AGENDA una sola vez
-    resultados = [
-        item for item in DATOS_AGENDA
-        # Condición 1: El filtro DNI es None O el DNI del ítem coincide
-        if (dni_f is None or item['dni'].upper() == dni_f)
-        # Condición 2: El filtro Asignatura es None O la Asignatura coincide
-        and (asig_f is None or item['asignatura'].upper() == asig_f)
-        # Condición 3: El filtro Tipo es None O el Tipo coincide
-        and (tipo_f is None or item['tipo'].upper() == tipo_f)
-    ]
-    
-    return resultados
+    return list(_iterar_items_filtrados(dni, asignatura, tipo))
+
+# Ítems que iterar_items_por_bloques lee cada vez que retiene el cerrojo
+FILAS_POR_BLOQUE_LISTADO = 5000
+
+def iterar_items_por_bloques(dni: str | None = None, asignatura: str | None = None, tipo: str | None = None,
+                             filas_por_bloque: int = FILAS_POR_BLOQUE_LISTADO):
+    """
+    Generador de los ítems que cumplen los filtros (sin filtros, todos), en
+    orden de ID, para listados que se van mostrando según llegan (p. ej.
+    utilidades.imprimir_tabla_paginada). No construye la lista entera: lee
+    bloques de 'filas_por_bloque' ítems reteniendo el cerrojo de lectura y lo
+    suelta entre bloque y bloque, así que mientras se espera al usuario (una
+    página) el resto de hilos puede escribir. Si la agenda cambió desde el
+    bloque anterior, el recorrido se reanuda tras el último ID entregado.
+
+    :param dni: El DNI a filtrar (o None para no filtrar por DNI).
+    :param asignatura: La Asignatura a filtrar (o None para no filtrar).
+    :param tipo: El Tipo (TAREA/EXAMEN) a filtrar (o None para no filtrar).
+    :param filas_por_bloque: Ítems leídos cada vez que se retiene el cerrojo.
+    :return: Generador de ItemAgenda.
+    """
+    ultimo_id = 0
+    recorrido = None
+    generacion = None
+    bloque = True
+    while bloque:
+        with _CERROJO_AGENDA.lectura():
+            # Un recorrido a medias solo sirve si nada ha cambiado desde el bloque anterior
+            if recorrido is None or generacion != _GENERACION:
+                desde = ultimo_id
+                recorrido = itertools.dropwhile(lambda item: item.id <= desde,
+                                                _iterar_items_filtrados(dni, asignatura, tipo))
+                generacion = _GENERACION
+            bloque = list(itertools.islice(recorrido, filas_por_bloque))
+        if bloque:
+            ultimo_id = bloque[-1].id
+            yield from bloque
 
+@_lectura
+@_cacheada(lambda dni, asignatura: (_normalizar_texto(dni), _normalizar_texto(asignatura)))
 def calcular_media_alumno_asignatura(dni: str, asignatura: str) -> float | None:
     """
     Calcula la media de un alumno específico en una asignatura específica.
     (Cálculo de Media Granular)
+    Se lee de los agregados mantenidos en cada alta, baja y edición: O(1).
 
     :param dni: DNI del alumno (case-insensitive).
     :param asignatura: Nombre de la asignatura (case-insensitive).
     :return: La media de notas o None si no hay notas válidas.
     """
-    dni_upper = dni.upper()
-    asig_upper = asignatura.upper()
+    clave = (dni.strip().upper(), asignatura.strip().upper())
+    if _ALMACEN is not None:
+        acumulado = _ALMACEN.agregado_alumno_asignatura(*clave)
+    else:
+        acumulado = _AGREGADOS_ALUMNO_ASIGNATURA.get(clave)
     
-    notas = [
-        item['nota']
-        for item in DATOS_AGENDA
-        if item['dni'].upper() == dni_upper
-        and item['asignatura'] == asig_upper
-        and item['nota'] is not None
-    ]
-    
-    if not notas:
+    if acumulado is None:
         return None
         
-    return sum(notas) / len(notas)
+    return acumulado[0] / acumulado[1]
 
+@_lectura
+@_cacheada(_normalizar_texto)
 def calcular_media_general_asignatura(asignatura: str) -> float | None:
     """
     Calcula la media general de una asignatura (todos los alumnos).
     (Cálculo de Media General)
+    Se lee de los agregados mantenidos en cada alta, baja y edición: O(1).
     
     :param asignatura: Nombre de la asignatura (case-insensitive).
     :return: La media de notas o None si no hay notas válidas.
     """
-    asig_upper = asignatura.upper()
-    
-    notas = [
-        item['nota'] 
-        for item in DATOS_AGENDA 
-        if item['asignatura'] == asig_upper and item['nota'] is not None
-    ]
+    acumulado = _agregados_asignatura().get(asignatura.strip().upper())
             
-    if not notas:
+    if acumulado is None:
         return None
     
-    return sum(notas) / len(notas)
+    return acumulado[0] / acumulado[1]
+
+def _agregados_asignatura() -> dict:
+    """Devuelve {asignatura: [suma, cuenta]} de la memoria o del almacén activo."""
+    if _ALMACEN is not None:
+        return _ALMACEN.agregados_asignatura()
+    return _AGREGADOS_ASIGNATURA
+
+def _agregados_alumno() -> dict:
+    """Devuelve {dni: [suma, cuenta]} de la memoria o del almacén activo."""
+    if _ALMACEN is not None:
+        return _ALMACEN.agregados_alumno()
+    return _AGREGADOS_ALUMNO
+
+def _ordenar_ranking(agregados: dict, limite: int | None, ascendente: bool) -> list[tuple]:
+    """
+    Convierte un diccionario de agregados {clave: [suma, cuenta]} en una lista
+    de tuplas (clave, media) ordenada por media.
+    
+    :param agregados: Uno de los diccionarios _AGREGADOS_*.
+    :param limite: Número máximo de posiciones a devolver (None = todas).
+    :param ascendente: False para empezar por la mejor media, True por la peor.
+    :return: Lista de tuplas (clave, media).
+    """
+    medias = ((clave, suma / cuenta) for clave, (suma, cuenta) in agregados.items())
+    
+    # Usamos 'key=lambda item: item[1]' para comparar por la media
+    if limite is None:
+        return sorted(medias, key=lambda item: item[1], reverse=not ascendente)
+    
+    # Top-N / Bottom-N: heapq evita ordenar la lista completa
+    if ascendente:
+        return heapq.nsmallest(limite, medias, key=lambda item: item[1])
+    return heapq.nlargest(limite, medias, key=lambda item: item[1])
 
+@_lectura
+def obtener_ranking_asignaturas(limite: int | None = None, ascendente: bool = False) -> list[tuple[str, float]]:
+    """
+    Devuelve las asignaturas ordenadas por su media general.
+    Se lee de los agregados mantenidos, sin recorrer DATOS_AGENDA.
+    
+    :param limite: Número de asignaturas a devolver (top-N / bottom-N) o None para todas.
+    :param ascendente: False = de mejor a peor media, True = de peor a mejor.
+    :return: Lista de tuplas (asignatura, media).
+    """
+    return _ordenar_ranking(_agregados_asignatura(), limite, ascendente)
+
+@_lectura
+def obtener_ranking_alumnos(limite: int | None = None, ascendente: bool = False) -> list[tuple[str, str, float]]:
+    """
+    Devuelve los alumnos ordenados por su media global (todas sus asignaturas).
+    Se lee de los agregados mantenidos, sin recorrer DATOS_AGENDA.
+    
+    :param limite: Número de alumnos a devolver (top-N / bottom-N) o None para todos.
+    :param ascendente: False = de mejor a peor media, True = de peor a mejor.
+    :return: Lista de tuplas (dni, nombre, media).
+    """
+    ranking = _ordenar_ranking(_agregados_alumno(), limite, ascendente)
+    
+    return [(dni, buscar_nombre_por_dni(dni), media) for dni, media in ranking]
+
+@_lectura
 def obtener_mejor_peor_asignatura() -> dict | None:
     """
-    Calcula la media de CADA asignatura y devuelve la mejor y la peor.
+    Devuelve la asignatura con mejor y con peor media.
     (Cálculo de Máximo/Mínimo de Medias)
     
     :return: Un diccionario {'mejor': (nombre, media), 'peor': (nombre, media)} o None.
     """
-    # Usamos el CONJUNTO de asignaturas activas que ya mantenemos
-    if not ASIGNATURAS_ACTIVAS:
-        return None
+    ranking = obtener_ranking_asignaturas()
 
-    medias_asignaturas = []
-    
-    # 1. Calculamos la media de cada asignatura activa
-    for asignatura in ASIGNATURAS_ACTIVAS:
-        media = calcular_media_general_asignatura(asignatura)
-        if media is not None:
-            medias_asignaturas.append((asignatura, media)) # Lista de tuplas (Nombre, Media)
-
-    if not medias_asignaturas:
+    if not ranking:
         return None
-        
-    # 2. Encontramos el máximo y el mínimo
-    # Usamos 'key=lambda item: item[1]' para que max/min comparen por el segundo
-    # elemento de la tupla (la media)
-    mejor = max(medias_asignaturas, key=lambda item: item[1])
-    peor = min(medias_asignaturas, key=lambda item: item[1])
     
-    return {'mejor': mejor, 'peor': peor}
+    # El ranking está ordenado de mejor a peor media
+    return {'mejor': ranking[0], 'peor': ranking[-1]}
 
+@_lectura
+@_cacheada(lambda: ())
 def obtener_estadistica_agregada_asignaturas() -> list[dict]:
     """
     Genera una estadística agregada: cuenta de tareas y exámenes por asignatura.
     (Estadística Agregada)
+    Si el almacén columnar está activo, se cuenta en una pasada sobre sus columnas;
+    con un almacén en disco, con una consulta agrupada.
     
     :return: Lista de diccionarios para imprimir en tabla.
     """
     stats = {} 
-    for asig_nombre in ASIGNATURAS_ACTIVAS:
-        stats[asig_nombre] = {'Tareas': 0, 'Exámenes': 0}
+    
+    if _ALMACEN is not None:
+        # Las asignaturas activas son las que aparecen en el resultado
+        for (asig, tipo), numero in _ALMACEN.conteo_por_asignatura_y_tipo().items():
+            data = stats.setdefault(asig, {'Tareas': 0, 'Exámenes': 0})
+            if tipo == 'TAREA':
+                data['Tareas'] = numero
+            elif tipo == 'EXAMEN':
+                data['Exámenes'] = numero
+    else:
+        for asig_nombre in ASIGNATURAS_ACTIVAS:
+            stats[asig_nombre] = {'Tareas': 0, 'Exámenes': 0}
 
-    for item in DATOS_AGENDA:
-        asig = item['asignatura']
-        if asig in stats: 
-            if item['tipo'] == 'TAREA':
-                stats[asig]['Tareas'] += 1
-            elif item['tipo'] == 'EXAMEN':
-                stats[asig]['Exámenes'] += 1
+    if _ALMACEN is None and _COLUMNAS is not None:
+        conteos = _COLUMNAS.conteo_por_asignatura_y_tipo(len(ASIGNATURAS_PERMITIDAS), len(TIPOS_VALIDOS))
+        for asig in stats:
+            fila = conteos[CODIGOS_ASIGNATURA[asig]]
+            stats[asig]['Tareas'] = fila[CODIGOS_TIPO['TAREA']]
+            stats[asig]['Exámenes'] = fila[CODIGOS_TIPO['EXAMEN']]
+    elif _ALMACEN is None:
+        for item in DATOS_AGENDA:
+            if item is None:
+                continue
+            asig = item.asignatura
+            if asig in stats: 
+                if item.tipo == 'TAREA':
+                    stats[asig]['Tareas'] += 1
+                elif item.tipo == 'EXAMEN':
+                    stats[asig]['Exámenes'] += 1
 
     informe = []
     for asig, data in stats.items():
@@ -356,47 +1199,681 @@ def obtener_estadistica_agregada_asignaturas() -> list[dict]:
     
     return informe
 
-def guardar_datos_logica() -> bool:
+def _columnas_agenda() -> tuple[dict, list]:
+    """
+    Columnas de la agenda en arrays paralelos (una posición por ítem), para
+    los cálculos por lotes (estadisticas, informes_paralelos). Con el almacén
+    columnar activo se devuelven sus propias columnas, sin copiarlas (pueden
+    tener lápidas: asignatura CODIGO_HUECO y nota NaN).
+
+    :return: Tupla (columnas, dnis): columnas = {'notas': array('d') (NaN = sin nota),
+             'asignaturas': array('B'), 'tipos': array('B'), 'alumnos': array('I')}
+             con los códigos de CODIGOS_ASIGNATURA, CODIGOS_TIPO y dnis[codigo_alumno].
+    """
+    if _ALMACEN is None and _COLUMNAS is not None:
+        return ({'notas': _COLUMNAS.notas, 'asignaturas': _COLUMNAS.asignaturas,
+                 'tipos': _COLUMNAS.tipos, 'alumnos': _COLUMNAS.alumnos}, _COLUMNAS.dnis)
+
+    columnas = {'notas': array('d'), 'asignaturas': array('B'), 'tipos': array('B'), 'alumnos': array('I')}
+    codigos_dni = {}
+    if _ALMACEN is not None:
+        # Filas del almacén: (id, dni, nombre, asignatura, tipo, desc, nota)
+        filas = ((fila[1], CODIGOS_ASIGNATURA[fila[3]], CODIGOS_TIPO[fila[4]], fila[6])
+                 for fila in _ALMACEN.filtrar())
+    else:
+        filas = ((item.dni, item.cod_asignatura, item.cod_tipo, item.nota)
+                 for item in DATOS_AGENDA if item is not None)
+
+    for dni, cod_asignatura, cod_tipo, nota in filas:
+        columnas['notas'].append(math.nan if nota is None else nota)
+        columnas['asignaturas'].append(cod_asignatura)
+        columnas['tipos'].append(cod_tipo)
+        columnas['alumnos'].append(codigos_dni.setdefault(dni.upper(), len(codigos_dni)))
+
+    return columnas, list(codigos_dni)
+
+@_lectura
+def obtener_estadisticas_notas(por: str = 'asignatura') -> list[dict]:
+    """
+    Estadística descriptiva de las notas por asignatura o por alumno: número
+    de notas, media, mediana, desviación típica, mínima, máxima, percentiles,
+    proporción de aprobados e histograma (ver estadisticas.estadisticas_por_grupo).
+    Todos los grupos se calculan en una sola pasada por lotes.
+
+    :param por: 'asignatura' o 'alumno'.
+    :return: Lista de diccionarios (solo grupos con alguna nota), ordenada por
+             asignatura o DNI: {'asignatura'} o {'dni', 'nombre'} más las estadísticas.
+    :raises ValueError: Si 'por' no es 'asignatura' ni 'alumno'.
     """
-    Empaqueta los datos globales y llama al módulo de persistencia para guardarlos.
+    if por not in ('asignatura', 'alumno'):
+        raise ValueError(f"No se puede agrupar por '{por}' (usa 'asignatura' o 'alumno').")
+
+    columnas, dnis = _columnas_agenda()
+    if por == 'asignatura':
+        grupos, etiquetas = columnas['asignaturas'], ASIGNATURAS_PERMITIDAS
+    else:
+        grupos, etiquetas = columnas['alumnos'], dnis
+    resultados = estadisticas.estadisticas_por_grupo(grupos, columnas['notas'], len(etiquetas), RANGOS_NOTA[1])
+
+    informe = []
+    for etiqueta, resultado in zip(etiquetas, resultados):
+        if resultado is None:
+            continue
+        if por == 'asignatura':
+            informe.append({'asignatura': etiqueta, **resultado})
+        else:
+            informe.append({'dni': etiqueta, 'nombre': buscar_nombre_por_dni(etiqueta), **resultado})
+
+    informe.sort(key=lambda fila: fila['asignatura' if por == 'asignatura' else 'dni'])
+    return informe
+
+@_lectura
+def generar_informe_global(procesos: int | None = None) -> dict:
+    """
+    Recalcula desde las notas el informe completo (conteo por asignatura y
+    tipo, medias y rankings) en una pasada por tramos repartida entre varios
+    procesos (ver informes_paralelos); con pocos ítems se usa un solo proceso.
+    Las medias salen de sumas exactas, así que el resultado no depende del
+    número de procesos, pero puede diferir en las últimas cifras de
+    obtener_ranking_asignaturas/obtener_ranking_alumnos, que usan los
+    agregados mantenidos al vuelo (sumas en coma flotante). Recorre toda la
+    agenda: los informes del menú siguen usando esos agregados, que no
+    recorren nada; esto sirve para auditarlos o para exportar un informe exacto.
+
+    :param procesos: Máximo de procesos (None = uno por CPU; 1 = sin repartir).
+    :return: {'estadistica': filas como obtener_estadistica_agregada_asignaturas,
+              'ranking_asignaturas': [(asignatura, media)], 'ranking_alumnos': [(dni, media)]
+              (de mejor a peor media), 'procesos': procesos usados}.
+    """
+    columnas, dnis = _columnas_agenda()
+    agregados = informes_paralelos.calcular_agregados(columnas, len(TIPOS_VALIDOS), procesos)
+
+    estadistica = []
+    for cod_asignatura, asignatura in enumerate(ASIGNATURAS_PERMITIDAS):
+        tareas = agregados['conteos'].get((cod_asignatura, CODIGOS_TIPO['TAREA']), 0)
+        examenes = agregados['conteos'].get((cod_asignatura, CODIGOS_TIPO['EXAMEN']), 0)
+        if tareas or examenes:
+            estadistica.append({'Asignatura': asignatura.capitalize(), 'Tareas': tareas, 'Exámenes': examenes})
+
+    # sorted es estable: a igual media, se conserva el orden de los códigos
+    ranking_asignaturas = sorted(((ASIGNATURAS_PERMITIDAS[codigo], media)
+                                  for codigo, media in agregados['medias_asignatura'].items()),
+                                 key=lambda item: item[1], reverse=True)
+    ranking_alumnos = sorted(((dnis[codigo], media) for codigo, media in agregados['medias_alumno'].items()),
+                             key=lambda item: item[1], reverse=True)
+
+    return {'estadistica': estadistica, 'ranking_asignaturas': ranking_asignaturas,
+            'ranking_alumnos': ranking_alumnos, 'procesos': agregados['procesos']}
+
+# Columnas de los archivos exportados
+CAMPOS_EXPORTACION_ITEMS = ['id', 'dni', 'nombre', 'asignatura', 'tipo', 'desc', 'nota']
+CAMPOS_EXPORTACION_ESTADISTICA = ['Asignatura', 'Tareas', 'Exámenes']
+
+@_lectura
+def exportar_items_logica(ruta: str, formato: str, dni: str | None = None,
+                          asignatura: str | None = None, tipo: str | None = None) -> int | None:
+    """
+    Exporta a CSV o JSONL los ítems que cumplen los filtros (sin filtros, el
+    listado completo). Los ítems pasan del índice al archivo uno a uno, sin
+    construir la lista de resultados; mientras dura se retiene el cerrojo de
+    lectura, así que el archivo es una foto coherente de la agenda.
+
+    :param ruta: Ruta del archivo de destino.
+    :param formato: persistencia.FORMATO_EXPORTACION_CSV o FORMATO_EXPORTACION_JSONL.
+    :param dni: DNI a filtrar (o None).
+    :param asignatura: Asignatura a filtrar (o None).
+    :param tipo: Tipo a filtrar (o None).
+    :return: Número de ítems exportados, o None si hubo un error al escribir.
+    """
+    # Los atributos de ItemAgenda se leen directamente (más rápido que item['campo'])
+    valores = operator.attrgetter(*CAMPOS_EXPORTACION_ITEMS)
+    return persistencia.exportar_filas(map(valores, _iterar_items_filtrados(dni, asignatura, tipo)),
+                                       CAMPOS_EXPORTACION_ITEMS, ruta, formato)
+
+@_lectura
+def exportar_estadistica_asignaturas(ruta: str, formato: str) -> int | None:
+    """
+    Exporta a CSV o JSONL la estadística agregada por asignatura
+    (obtener_estadistica_agregada_asignaturas).
+
+    :param ruta: Ruta del archivo de destino.
+    :param formato: persistencia.FORMATO_EXPORTACION_CSV o FORMATO_EXPORTACION_JSONL.
+    :return: Número de filas exportadas, o None si hubo un error al escribir.
+    """
+    valores = operator.itemgetter(*CAMPOS_EXPORTACION_ESTADISTICA)
+    return persistencia.exportar_filas(map(valores, obtener_estadistica_agregada_asignaturas()),
+                                       CAMPOS_EXPORTACION_ESTADISTICA, ruta, formato)
+
+@_escritura
+def configurar_almacen_columnar(activar: bool):
+    """
+    Activa o desactiva el almacén columnar opcional. Al activarlo se construye
+    una vez desde DATOS_AGENDA; a partir de ahí se mantiene en cada alta,
+    baja, edición, compactación y carga.
     
-    :return: True si se guardó con éxito, False en caso de error.
+    :param activar: True para activarlo, False para liberarlo.
+    """
+    global _COLUMNAS
+    
+    if not activar:
+        _COLUMNAS = None
+        return
+    
+    # Construimos las columnas ya compactadas para que queden alineadas con la lista
+    if _HUECOS_AGENDA:
+        _compactar_agenda()
+    
+    _COLUMNAS = AlmacenColumnar()
+    for item in DATOS_AGENDA:
+        _COLUMNAS.anadir(item)
+
+def _registro_diario(cambio: tuple, secuencia: int) -> dict:
+    """
+    Convierte un cambio pendiente en el registro compacto que se escribe en el diario.
+    
+    :param cambio: Tupla ('alta', item), ('baja', id_item) o ('nota', id_item, nota).
+    :param secuencia: Número de secuencia del registro.
+    :return: Diccionario serializable a JSON.
+    """
+    operacion = cambio[0]
+    
+    if operacion == 'alta':
+        return {'n': secuencia, 'op': 'alta', 'item': cambio[1].a_dict()}
+    if operacion == 'baja':
+        return {'n': secuencia, 'op': 'baja', 'id': cambio[1]}
+    return {'n': secuencia, 'op': 'nota', 'id': cambio[1], 'nota': cambio[2]}
+
+def _aplicar_registro_diario(registro: dict):
+    """
+    Reproduce un registro del diario sobre la agenda en memoria (al cargar).
+    Es idempotente: un alta de un ID que ya existe o una baja de un ID que no
+    existe se ignoran.
+    
+    :param registro: Registro leído del diario.
     """
     global _PROXIMO_ID
     
-    # Empaquetar los datos globales necesarios
+    operacion = registro['op']
+    
+    if operacion == 'alta':
+        item = _crear_item_desde_dict(registro['item'])
+        if item.id not in INDICE_AGENDA:
+            _anadir_item(item)
+            _PROXIMO_ID = max(_PROXIMO_ID, item.id + 1)
+    elif operacion == 'baja':
+        _eliminar_sin_compactar(registro['id'])
+    elif operacion == 'nota':
+        item, indice = buscar_por_id(registro['id'])
+        if item is not None:
+            _editar_nota(item, indice, registro['nota'])
+
+def obtener_generacion() -> int:
+    """Devuelve la generación actual de la agenda (cambia con cada modificación o carga)."""
+    return _GENERACION
+
+def obtener_estadisticas_cache() -> dict:
+    """
+    Devuelve los contadores de la caché de consultas, para ver si compensa.
+
+    :return: {'aciertos', 'fallos', 'tasa_aciertos' (0-1, None sin consultas), 'entradas', 'capacidad'}.
+    """
+    with _CERROJO_CACHE:
+        consultas = _ACIERTOS_CACHE + _FALLOS_CACHE
+        return {
+            'aciertos': _ACIERTOS_CACHE,
+            'fallos': _FALLOS_CACHE,
+            'tasa_aciertos': _ACIERTOS_CACHE / consultas if consultas else None,
+            # Las entradas de una generación anterior ya no valen (se borran en la próxima consulta)
+            'entradas': len(_CACHE_CONSULTAS) if _GENERACION_CACHE == _GENERACION else 0,
+            'capacidad': TAMANO_CACHE_CONSULTAS,
+        }
+
+def vaciar_cache_consultas():
+    """Vacía la caché de consultas y pone a cero sus contadores."""
+    global _ACIERTOS_CACHE, _FALLOS_CACHE, _GENERACION_CACHE
+
+    with _CERROJO_CACHE:
+        _CACHE_CONSULTAS.clear()
+        _GENERACION_CACHE = None
+        _ACIERTOS_CACHE = 0
+        _FALLOS_CACHE = 0
+
+def hay_cambios_sin_guardar() -> bool:
+    """Indica si la agenda en memoria ha cambiado desde el último guardado o carga."""
+    return _GENERACION != _GENERACION_GUARDADA
+
+def es_carga_diferida() -> bool:
+    """
+    Indica si la agenda está abierta en modo diferido: los ítems siguen en el
+    almacén en disco y solo se leen cuando se consultan (no hay copia en memoria).
+    """
+    return _ALMACEN is not None
+
+def configurar_aviso_cambios(funcion):
+    """
+    Registra la función a la que se avisa tras cada cambio de la agenda.
+    Se llama con el cerrojo de la agenda retenido, así que debe volver enseguida.
+    
+    :param funcion: Función sin argumentos, o None para dejar de avisar.
+    """
+    global _AVISO_CAMBIO
+    _AVISO_CAMBIO = funcion
+
+def _marcar_guardado():
+    """Da por guardados los cambios pendientes (la memoria coincide con el disco)."""
+    global _GENERACION_GUARDADA
+    _CAMBIOS_PENDIENTES.clear()
+    _GENERACION_GUARDADA = _GENERACION
+
+def _confirmar_guardado(generacion: int, num_cambios: int):
+    """
+    Da por guardado lo que había cuando se copiaron los datos a escribir: los
+    primeros 'num_cambios' cambios pendientes y la generación 'generacion'.
+    Los cambios hechos durante la escritura siguen pendientes.
+    """
+    global _GENERACION_GUARDADA
+    del _CAMBIOS_PENDIENTES[:num_cambios]
+    _GENERACION_GUARDADA = generacion
+
+def _items_guardados() -> int:
+    """
+    Número de ítems que había en el último guardado: los de ahora sin las
+    altas pendientes y con las bajas pendientes (recorre solo los cambios).
+    """
+    altas = bajas = 0
+    for cambio in _CAMBIOS_PENDIENTES:
+        if cambio[0] == 'alta':
+            altas += 1
+        elif cambio[0] == 'baja':
+            bajas += 1
+    return contar_items() - altas + bajas
+
+def _copiar_items() -> list[ItemAgenda]:
+    """Copia los ítems vivos (para escribirlos en disco mientras la agenda sigue cambiando)."""
+    return [ItemAgenda(item.id, item.dni, item.nombre, item.cod_asignatura, item.cod_tipo, item.desc, item.nota)
+            for item in DATOS_AGENDA if item is not None]
+
+def _escribir_instantanea(formato: str, items, cabecera: dict) -> bool:
+    """
+    Escribe una instantánea con los ítems dados en el archivo de datos, sin
+    tocar el estado de la agenda.
+    
+    :param formato: Formato del archivo (persistencia.FORMATO_ARCHIVO_*).
+    :param items: Iterable de ItemAgenda vivos, en orden de ID.
+    :param cabecera: proximo_id y secuencia_diario.
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    # Almacén en disco: se crea completo (quien llama lo abre después)
+    if formato in FORMATOS_ALMACEN:
+        crear_almacen = FORMATOS_ALMACEN[formato][1]
+        filas = (_fila_item(item) for item in items)
+        return crear_almacen(persistencia.NOMBRE_ARCHIVO_DATOS, filas, cabecera['proximo_id'])
+    # Formato binario: los registros ItemAgenda se empaquetan directamente
+    if formato == persistencia.FORMATO_ARCHIVO_BINARIO:
+        return persistencia.guardar_datos_a_binario(items, cabecera)
+    # Formato JSON Lines: los ítems se escriben de uno en uno, sin lista intermedia
+    if formato == persistencia.FORMATO_ARCHIVO_JSONL:
+        return persistencia.guardar_datos_a_jsonl((item.a_dict() for item in items), cabecera)
+    
+    # Empaquetar los datos necesarios
     datos_a_guardar = {
-        'datos_agenda': DATOS_AGENDA,
-        'proximo_id': _PROXIMO_ID
+        'datos_agenda': [item.a_dict() for item in items],
+        'proximo_id': cabecera['proximo_id'],
+        'secuencia_diario': cabecera['secuencia_diario']
     }
-    
     # Llamada al módulo externo
     return persistencia.guardar_datos_a_json(datos_a_guardar)
+
+def _guardar_instantanea(formato: str | None = None) -> bool:
+    """
+    Escribe la agenda completa (instantánea) y vacía el diario.
+    La instantánea guarda _SECUENCIA_DIARIO: si el programa se interrumpe antes
+    de vaciar el diario, al cargar se ignoran los registros ya incluidos.
+    
+    :param formato: Formato del archivo (persistencia.FORMATO_ARCHIVO_*) o None
+                    para conservar el del archivo de datos actual.
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    formato = formato or persistencia.detectar_formato()
+    
+    if _ALMACEN is not None:
+        # En el mismo archivo y formato del almacén, guardar es confirmar sus cambios
+        if _ALMACEN.ruta == persistencia.NOMBRE_ARCHIVO_DATOS and formato == persistencia.detectar_formato():
+            return _guardar_almacen()
+        # Para cualquier otro formato la agenda vuelve a memoria y se escribe desde ahí
+        if not _pasar_almacen_a_memoria():
+            return False
+    
+    cabecera = {'proximo_id': _PROXIMO_ID, 'secuencia_diario': _SECUENCIA_DIARIO}
+    guardado = _escribir_instantanea(formato, (item for item in DATOS_AGENDA if item is not None), cabecera)
+    
+    if guardado:
+        _marcar_guardado()
+        persistencia.borrar_diario()
+        # Almacén en disco: a partir de ahora se trabaja sobre él
+        if formato in FORMATOS_ALMACEN:
+            guardado = _abrir_almacen(formato)
+    
+    return guardado
+
+def _guardar_copia_instantanea() -> bool:
+    """
+    Escribe una instantánea en el formato actual a partir de una copia de la
+    agenda: el cerrojo solo se retiene para copiarla y para dar por guardados
+    los cambios, no durante la escritura en disco.
+    
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    with _CERROJO_AGENDA.lectura():
+        generacion = _GENERACION
+        num_cambios = len(_CAMBIOS_PENDIENTES)
+        items = _copiar_items()
+        cabecera = {'proximo_id': _PROXIMO_ID, 'secuencia_diario': _SECUENCIA_DIARIO}
+    
+    if not _escribir_instantanea(persistencia.detectar_formato(), items, cabecera):
+        return False
+    
+    with _CERROJO_AGENDA.escritura():
+        _confirmar_guardado(generacion, num_cambios)
+    persistencia.borrar_diario()
+    return True
+
+@_escritura_guardado
+def configurar_almacen(almacen: almacenes.AlmacenAgenda | None):
+    """
+    Activa un almacén en disco (o vuelve a la agenda en memoria con None).
+    El almacén anterior, si lo había, se cierra descartando lo no guardado,
+    y la agenda en memoria se vacía en ambos casos.
+    
+    :param almacen: El almacén a usar desde ahora, o None.
+    """
+    global _ALMACEN, _PROXIMO_ID, _HUECOS_AGENDA
+    
+    if _ALMACEN is not None:
+        _ALMACEN.cerrar()
+    _ALMACEN = almacen
+    
+    DATOS_AGENDA.clear()
+    _HUECOS_AGENDA = 0
+    _actualizar_estructuras_auxiliares()
+    _PROXIMO_ID = almacen.proximo_id() if almacen is not None else 1
+    
+    # La agenda cambia por completo (nueva generación), pero coincide con el disco
+    _avanzar_generacion()
+    _marcar_guardado()
+
+def _abrir_almacen(formato: str) -> bool:
+    """
+    Abre el archivo de datos como almacén (uno de FORMATOS_ALMACEN) y lo activa.
+    
+    :param formato: Formato del archivo de datos.
+    :return: True si se abrió, False si el archivo no es válido.
+    """
+    abrir_almacen = FORMATOS_ALMACEN[formato][0]
+    almacen = abrir_almacen(persistencia.NOMBRE_ARCHIVO_DATOS)
+    if almacen is None:
+        return False
+    configurar_almacen(almacen)
+    return True
+
+def _guardar_almacen() -> bool:
+    """Confirma los cambios pendientes del almacén activo."""
+    guardado = _ALMACEN.guardar()
+    if guardado:
+        _marcar_guardado()
+    return guardado
+
+def _pasar_almacen_a_memoria() -> bool:
+    """
+    Confirma los cambios del almacén activo, copia todos sus ítems a
+    DATOS_AGENDA y lo cierra (para escribir la agenda en otro formato).
+    
+    :return: True si se pudo, False si falló la confirmación.
+    """
+    global _PROXIMO_ID
+    
+    if not _guardar_almacen():
+        return False
+    
+    filas = list(_ALMACEN.filtrar())
+    proximo_id = _PROXIMO_ID
+    ruta_almacen = _ALMACEN.ruta
+    configurar_almacen(None)
+    # Si el archivo de datos va a dejar de ser un almacén, sobran su índice y su WAL
+    if ruta_almacen == persistencia.NOMBRE_ARCHIVO_DATOS:
+        almacenes.borrar_archivos_auxiliares(ruta_almacen)
+    
+    for fila in filas:
+        _anadir_item(_item_desde_fila(fila))
+    _PROXIMO_ID = proximo_id
+    return True
+
+@_escritura_guardado
+def convertir_formato_datos(formato: str) -> bool:
+    """
+    Guarda la agenda completa en otro formato sobre el mismo archivo de datos
+    (los guardados siguientes conservan ese formato, que se detecta al cargar).
+    Los cambios pendientes quedan guardados también.
+    
+    :param formato: persistencia.FORMATO_ARCHIVO_JSON, _JSONL, _BINARIO, _SQLITE o _REGISTROS.
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    return _guardar_instantanea(formato)
+
+def guardar_datos_logica() -> bool:
+    """
+    Guarda los cambios hechos desde la última vez.
+    
+    Los cambios pendientes (altas, bajas y ediciones) se añaden al final del
+    diario, así que el coste depende del tamaño del cambio y no del de la agenda.
+    Solo se escribe la agenda completa (instantánea) si todavía no existe el
+    archivo de datos, si hay al menos tantos cambios como ítems había en el
+    último guardado (p. ej. una importación que multiplica la agenda), o si el
+    diario supera UMBRAL_DIARIO_BYTES.
+    
+    Se puede llamar desde otro hilo (guardado automático): lo que hay que
+    escribir se copia con el cerrojo de la agenda, pero la escritura en disco
+    se hace sin él, así que mientras tanto se pueden seguir haciendo altas,
+    ediciones y consultas (quedan pendientes para el siguiente guardado).
+    
+    :return: True si se guardó con éxito, False en caso de error.
+    """
+    global _SECUENCIA_DIARIO
+    
+    with _CERROJO_GUARDADO:
+        with _CERROJO_AGENDA.escritura():
+            # Con un almacén en disco los cambios ya están escritos: solo falta confirmarlos
+            if _ALMACEN is not None:
+                return _guardar_almacen()
+            
+            instantanea = (not persistencia.existe_archivo_datos()
+                           or (_CAMBIOS_PENDIENTES and len(_CAMBIOS_PENDIENTES) >= _items_guardados()))
+            # Si el archivo nuevo va a ser un almacén, se crea y se abre en el momento
+            if instantanea and persistencia.detectar_formato() in FORMATOS_ALMACEN:
+                return _guardar_instantanea()
+            
+            generacion = _GENERACION
+            num_cambios = len(_CAMBIOS_PENDIENTES)
+            registros = [] if instantanea else [
+                _registro_diario(cambio, secuencia)
+                for secuencia, cambio in enumerate(_CAMBIOS_PENDIENTES, start=_SECUENCIA_DIARIO + 1)
+            ]
+        
+        if instantanea:
+            return _guardar_copia_instantanea()
+        
+        if registros:
+            if not persistencia.anexar_al_diario(registros):
+                return False
+            with _CERROJO_AGENDA.escritura():
+                _SECUENCIA_DIARIO += len(registros)
+                _confirmar_guardado(generacion, num_cambios)
+        
+        if persistencia.tamano_diario() > UMBRAL_DIARIO_BYTES:
+            return _guardar_copia_instantanea()
+        
+        return True
         
 
+@_escritura_guardado
 def cargar_datos_logica() -> bool:
     """
     Carga los datos desde el disco usando el módulo de persistencia y actualiza
-    las estructuras globales.
+    las estructuras globales: primero la última instantánea y después los
+    cambios del diario que no incluya.
+    
+    Los ítems se leen del archivo de uno en uno (streaming) y se convierten e
+    indexan directamente, sin construir antes el árbol JSON completo.
+    Si el archivo está corrupto, la agenda queda vacía.
     
     :return: True si se cargó con éxito, False si el archivo no existe o hay un error.
     """
-    global DATOS_AGENDA, _PROXIMO_ID
+    global DATOS_AGENDA, _PROXIMO_ID, _HUECOS_AGENDA, _SECUENCIA_DIARIO, _GENERACION
     
-    # Llamada al módulo externo
-    datos_cargados = persistencia.cargar_datos_desde_json()
-
-    if datos_cargados is not None:
+    # Si no hay nada guardado no se toca la agenda en memoria
+    if not persistencia.existe_archivo_datos() and not persistencia.existe_diario():
+        return False
+    
+    # Un almacén (SQLite, registros) no se carga: se abre (descartando lo no guardado)
+    formato = persistencia.detectar_formato()
+    if formato in FORMATOS_ALMACEN:
+        return _abrir_almacen(formato)
+    
+    # El resto de formatos se cargan en memoria: se cierra el almacén que hubiera
+    if _ALMACEN is not None:
+        configurar_almacen(None)
+    
+    # 1. Vaciar la agenda y sus estructuras auxiliares (ÍNDICES y CONJUNTO)
+    DATOS_AGENDA.clear() 
+    _HUECOS_AGENDA = 0
+    _actualizar_estructuras_auxiliares()
+    # La agenda cambia por completo (nueva generación), pero coincide con el disco
+    _GENERACION += 1
+    _marcar_guardado()
+    
+    cabecera = {}
+    try:
+        # 2. Instantánea: convertir cada ítem leído en un registro compacto e indexarlo
+        # (al indexar alumno a alumno, los nombres quedan internados)
+        if persistencia.existe_archivo_datos():
+            for datos_item in persistencia.iterar_datos_agenda(cabecera):
+                try:
+                    item = _crear_item_desde_dict(datos_item)
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"{colores.C_ROJO}Error: Ítem no válido en el archivo, se descarta ({e}).{colores.C_FIN}")
+                else:
+                    _anadir_item(item)
         
-        # 1. Actualizar las estructuras globales principales
-        DATOS_AGENDA.clear() 
-        DATOS_AGENDA.extend(datos_cargados.get('datos_agenda', []))
-        _PROXIMO_ID = datos_cargados.get('proximo_id', 1)
+        # 3. La cabecera (proximo_id) está completa al terminar de leer los ítems
+        _PROXIMO_ID = cabecera.get('proximo_id', 1)
+        _SECUENCIA_DIARIO = cabecera.get('secuencia_diario', 0)
         
-        # 2. Regenerar las estructuras auxiliares (ÍNDICE y CONJUNTO)
+        # 4. Diario: reproducir los cambios posteriores a la instantánea
+        for registro in persistencia.iterar_diario():
+            try:
+                secuencia = registro['n']
+                if secuencia > _SECUENCIA_DIARIO:
+                    # La secuencia avanza aunque el cambio no se pueda aplicar
+                    _SECUENCIA_DIARIO = secuencia
+                    _aplicar_registro_diario(registro)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"{colores.C_ROJO}Error: Cambio no válido en el diario, se descarta ({e}).{colores.C_FIN}")
+    except (ValueError, OSError) as e:
+        # JSONDecodeError es un ValueError: archivo corrupto o ilegible
+        print(f" Error: El archivo de datos está corrupto o no se pudo leer. {e}")
+        DATOS_AGENDA.clear()
         _actualizar_estructuras_auxiliares()
-        
-        return True
+        _PROXIMO_ID = 1
+        _SECUENCIA_DIARIO = 0
+        return False
+    
+    _compactar_si_procede()
     
-    return False # El archivo no existe o falló la carga
+    return True
+
 
+@_lectura
+def verificar_consistencia() -> list[str]:
+    """
+    Recalcula desde cero los índices y los agregados a partir de DATOS_AGENDA
+    y los compara con los que se mantienen de forma incremental.
+    (Pensado para pruebas y depuración: recorre toda la lista)
+    
+    :return: Lista de discrepancias encontradas (vacía si todo es coherente).
+    """
+    # Con un almacén en disco se comprueba su integridad
+    if _ALMACEN is not None:
+        return _ALMACEN.verificar()
+    
+    errores = []
+    items_vivos = listar_todos_los_items()
+    
+    # 1. Índice por ID y lápidas
+    for item_id, posicion in INDICE_AGENDA.items():
+        item = DATOS_AGENDA[posicion] if posicion < len(DATOS_AGENDA) else None
+        if item is None or item['id'] != item_id:
+            errores.append(f"INDICE_AGENDA: el id {item_id} no apunta a su ítem (posición {posicion}).")
+    if len(INDICE_AGENDA) != len(items_vivos):
+        errores.append(f"INDICE_AGENDA tiene {len(INDICE_AGENDA)} entradas para {len(items_vivos)} ítems.")
+    if len(DATOS_AGENDA) - len(items_vivos) != _HUECOS_AGENDA:
+        errores.append(f"_HUECOS_AGENDA vale {_HUECOS_AGENDA} pero hay {len(DATOS_AGENDA) - len(items_vivos)} lápidas.")
+    
+    # 2. Listas de ocurrencias y conjunto de asignaturas activas
+    esperado_dni, esperado_asig, esperado_tipo = {}, {}, {}
+    for item in items_vivos:
+        esperado_dni.setdefault(item['dni'].upper(), []).append(item['id'])
+        esperado_asig.setdefault(item['asignatura'].upper(), []).append(item['id'])
+        esperado_tipo.setdefault(item['tipo'].upper(), []).append(item['id'])
+    
+    if {dni: list(entrada['ids']) for dni, entrada in INDICE_DNI.items()} != esperado_dni:
+        errores.append("INDICE_DNI no coincide con DATOS_AGENDA.")
+    if {asig: list(ids) for asig, ids in INDICE_ASIGNATURA.items()} != esperado_asig:
+        errores.append("INDICE_ASIGNATURA no coincide con DATOS_AGENDA.")
+    if {tipo: list(ids) for tipo, ids in INDICE_TIPO.items()} != esperado_tipo:
+        errores.append("INDICE_TIPO no coincide con DATOS_AGENDA.")
+    if ASIGNATURAS_ACTIVAS != set(esperado_asig):
+        errores.append("ASIGNATURAS_ACTIVAS no coincide con DATOS_AGENDA.")
+    
+    # 3. Agregados de notas (se comparan las sumas con tolerancia de redondeo)
+    esperado_media_asig, esperado_media_alumno_asig, esperado_media_alumno = {}, {}, {}
+    for item in items_vivos:
+        if item['nota'] is not None:
+            asignatura = item['asignatura'].upper()
+            dni_upper = item['dni'].upper()
+            for agregados, clave in ((esperado_media_asig, asignatura),
+                                     (esperado_media_alumno_asig, (dni_upper, asignatura)),
+                                     (esperado_media_alumno, dni_upper)):
+                acumulado = agregados.setdefault(clave, [0.0, 0])
+                acumulado[0] += item['nota']
+                acumulado[1] += 1
+    
+    for nombre, mantenidos, esperados in (
+            ('_AGREGADOS_ASIGNATURA', _AGREGADOS_ASIGNATURA, esperado_media_asig),
+            ('_AGREGADOS_ALUMNO_ASIGNATURA', _AGREGADOS_ALUMNO_ASIGNATURA, esperado_media_alumno_asig),
+            ('_AGREGADOS_ALUMNO', _AGREGADOS_ALUMNO, esperado_media_alumno)):
+        if set(mantenidos) != set(esperados):
+            errores.append(f"{nombre}: las claves no coinciden con DATOS_AGENDA.")
+            continue
+        for clave, (suma, cuenta) in esperados.items():
+            suma_mantenida, cuenta_mantenida = mantenidos[clave]
+            if cuenta != cuenta_mantenida or not math.isclose(suma, suma_mantenida, abs_tol=1e-6):
+                errores.append(f"{nombre}[{clave}]: ({suma_mantenida}, {cuenta_mantenida}) en vez de ({suma}, {cuenta}).")
+    
+    # 4. Almacén columnar (si está activo): alineado posición a posición con DATOS_AGENDA
+    if _COLUMNAS is not None:
+        if len(_COLUMNAS) != len(DATOS_AGENDA):
+            errores.append(f"_COLUMNAS tiene {len(_COLUMNAS)} filas para {len(DATOS_AGENDA)} posiciones.")
+        else:
+            for posicion, item in enumerate(DATOS_AGENDA):
+                id_esperado = 0 if item is None else item.id
+                if _COLUMNAS.ids[posicion] != id_esperado:
+                    errores.append(f"_COLUMNAS: la posición {posicion} tiene el id {_COLUMNAS.ids[posicion]} en vez de {id_esperado}.")
+                    break
+            
+            sumas, cuentas = _COLUMNAS.sumas_por_asignatura(len(ASIGNATURAS_PERMITIDAS))
+            for asignatura, codigo in CODIGOS_ASIGNATURA.items():
+                suma, cuenta = esperado_media_asig.get(asignatura, (0.0, 0))
+                if cuentas[codigo] != cuenta or not math.isclose(sumas[codigo], suma, abs_tol=1e-6):
+                    errores.append(f"_COLUMNAS: las notas de {asignatura} no coinciden con DATOS_AGENDA.")
+    
+    return errores
@@ -0,0 +1,402 @@
+import asyncio
+import json
+import sys
+from urllib.parse import parse_qs, urlsplit
+import autoguardado
+import servicios
+
+"""Servidor HTTP/JSON local (asyncio, solo biblioteca estándar) sobre la capa de servicios
+
+Uso: python servidor.py [puerto]
+
+Rutas (todas las respuestas son JSON):
+    GET    /items                     Listado, o filtrado con ?dni=&asignatura=&tipo= (admite ?desde=&limite=)
+    POST   /items                     Alta de un ítem (objeto) o de varios (lista de objetos)
+    DELETE /items?asignatura=X        Baja de todos los ítems de una asignatura
+    GET    /items/<id>                Un ítem por ID
+    PATCH  /items/<id>                Editar la nota: {"nota": 7.5} o {"nota": null}
+    DELETE /items/<id>                Baja de un ítem
+    GET    /informes/media            ?asignatura=X (media general) o ?dni=Y&asignatura=X
+    GET    /informes/ranking-asignaturas  ?limite=&ascendente=
+    GET    /informes/ranking-alumnos      ?limite=&ascendente=
+    GET    /informes/mejor-peor
+    GET    /informes/estadisticas
+    GET    /informes/estadisticas-notas   ?por=asignatura|alumno
+    GET    /informes/cache            Aciertos y fallos de la caché de consultas
+    POST   /guardar                   Guarda los cambios pendientes
+    POST   /lote                      Varias peticiones en una: [{"metodo", "ruta", "cuerpo"}, ...]
+
+Las conexiones se mantienen abiertas entre peticiones (HTTP/1.1 keep-alive).
+"""
+
+# =================================================================
+# 1. CONFIGURACIÓN
+# =================================================================
+
+# Solo se escucha en la máquina local: la API no tiene autenticación
+HOST_SERVIDOR = '127.0.0.1'
+PUERTO_SERVIDOR = 8080
+
+# Límites de una petición (lo que se pasa se rechaza y se cierra la conexión)
+MAX_CABECERAS = 100
+MAX_CUERPO_BYTES = 16 * 1024 * 1024
+
+# Textos de los códigos de estado que devuelve el servidor
+TEXTOS_ESTADO = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+VALORES_VERDADEROS = ('1', 'true', 'si', 'sí')
+
+
+# =================================================================
+# 2. RUTAS (lógica de la API, sin nada de HTTP)
+# =================================================================
+
+def _entero_consulta(consulta: dict, clave: str) -> int | None:
+    """
+    Lee un parámetro entero opcional de la consulta.
+
+    :raises ValueError: Si no es un entero no negativo.
+    """
+    valor = consulta.get(clave)
+    if valor is None:
+        return None
+    if not valor.isdigit():
+        raise ValueError(f"El parámetro '{clave}' debe ser un entero no negativo.")
+    return int(valor)
+
+def _api_listar(consulta: dict) -> tuple[int, object]:
+    """GET /items: listado completo o filtrado, con paginación opcional."""
+    dni = consulta.get('dni')
+    asignatura = consulta.get('asignatura')
+    tipo = consulta.get('tipo')
+    if dni is None and asignatura is None and tipo is None:
+        items = servicios.listar_todos_los_items()
+    else:
+        items = servicios.filtrar_items_logica(dni, asignatura, tipo)
+
+    desde = _entero_consulta(consulta, 'desde') or 0
+    limite = _entero_consulta(consulta, 'limite')
+    pagina = items[desde:] if limite is None else items[desde:desde + limite]
+    return 200, {'total': len(items), 'items': [dict(item) for item in pagina]}
+
+def _api_alta(cuerpo) -> tuple[int, object]:
+    """
+    POST /items: alta de uno o varios ítems en bloque (alta_items_bulk, que
+    valida el DNI y el nombre con los patrones del menú). Si falta el nombre
+    y el alumno ya existe, se usa el suyo (como el auto-rellenado del menú).
+    """
+    registros = []
+    for registro in (cuerpo if isinstance(cuerpo, list) else [cuerpo]):
+        if isinstance(registro, dict) and not registro.get('nombre') and isinstance(registro.get('dni'), str):
+            registro = {**registro, 'nombre': servicios.buscar_nombre_por_dni(registro['dni'])}
+        registros.append(registro)
+
+    informe = servicios.alta_items_bulk(registros)
+    return (201 if informe['insertados'] else 400), informe
+
+def _api_eliminar_asignatura(consulta: dict) -> tuple[int, object]:
+    """DELETE /items?asignatura=X: baja de todos los ítems de una asignatura."""
+    asignatura = consulta.get('asignatura')
+    if not asignatura:
+        raise ValueError("Falta el parámetro 'asignatura'.")
+    return 200, {'eliminados': servicios.eliminar_items_asignatura(asignatura)}
+
+def _api_item(metodo: str, item_id: int, cuerpo) -> tuple[int, object]:
+    """GET, PATCH y DELETE de /items/<id>."""
+    if metodo == 'GET':
+        item, _ = servicios.buscar_por_id(item_id)
+        if item is None:
+            return 404, {'error': f"No existe el ítem {item_id}."}
+        return 200, dict(item)
+
+    if metodo == 'PATCH':
+        if not isinstance(cuerpo, dict) or 'nota' not in cuerpo:
+            raise ValueError("El cuerpo debe ser un objeto con la clave 'nota'.")
+        nota = cuerpo['nota']
+        if nota is not None:
+            if isinstance(nota, bool) or not isinstance(nota, (int, float)):
+                raise ValueError("La nota debe ser un número o null.")
+            if not servicios.RANGOS_NOTA[0] <= nota <= servicios.RANGOS_NOTA[1]:
+                raise ValueError(f"Nota fuera del rango {servicios.RANGOS_NOTA[0]}-{servicios.RANGOS_NOTA[1]}.")
+            nota = float(nota)
+        if not servicios.editar_puntuacion_logica(item_id, nota):
+            return 404, {'error': f"No existe el ítem {item_id}."}
+        return 200, {'id': item_id, 'nota': nota}
+
+    if metodo == 'DELETE':
+        if not servicios.eliminar_item_logica(item_id):
+            return 404, {'error': f"No existe el ítem {item_id}."}
+        return 200, {'eliminado': item_id}
+
+    return 405, {'error': f"Método {metodo} no permitido en /items/<id>."}
+
+def _api_media(consulta: dict) -> tuple[int, object]:
+    """GET /informes/media: media de un alumno en una asignatura, o general de la asignatura."""
+    asignatura = consulta.get('asignatura')
+    if not asignatura:
+        raise ValueError("Falta el parámetro 'asignatura'.")
+    dni = consulta.get('dni')
+    if dni is None:
+        media = servicios.calcular_media_general_asignatura(asignatura)
+    else:
+        media = servicios.calcular_media_alumno_asignatura(dni, asignatura)
+    return 200, {'media': media}
+
+def _api_ranking_asignaturas(consulta: dict) -> tuple[int, object]:
+    ranking = servicios.obtener_ranking_asignaturas(_entero_consulta(consulta, 'limite'),
+                                                    consulta.get('ascendente', '').lower() in VALORES_VERDADEROS)
+    return 200, [{'asignatura': asignatura, 'media': media} for asignatura, media in ranking]
+
+def _api_ranking_alumnos(consulta: dict) -> tuple[int, object]:
+    ranking = servicios.obtener_ranking_alumnos(_entero_consulta(consulta, 'limite'),
+                                                consulta.get('ascendente', '').lower() in VALORES_VERDADEROS)
+    return 200, [{'dni': dni, 'nombre': nombre, 'media': media} for dni, nombre, media in ranking]
+
+def _api_mejor_peor(consulta: dict) -> tuple[int, object]:
+    resultado = servicios.obtener_mejor_peor_asignatura()
+    if resultado is None:
+        return 200, None
+    return 200, {clave: {'asignatura': asignatura, 'media': media}
+                 for clave, (asignatura, media) in resultado.items()}
+
+def _api_estadisticas(consulta: dict) -> tuple[int, object]:
+    return 200, servicios.obtener_estadistica_agregada_asignaturas()
+
+def _api_estadisticas_notas(consulta: dict) -> tuple[int, object]:
+    """GET /informes/estadisticas-notas?por=asignatura|alumno: mediana, desviación, percentiles, aprobados e histograma."""
+    return 200, servicios.obtener_estadisticas_notas(consulta.get('por', 'asignatura'))
+
+def _api_cache(consulta: dict) -> tuple[int, object]:
+    return 200, servicios.obtener_estadisticas_cache()
+
+# Informes disponibles en GET /informes/<nombre>
+INFORMES = {
+    'media': _api_media,
+    'ranking-asignaturas': _api_ranking_asignaturas,
+    'ranking-alumnos': _api_ranking_alumnos,
+    'mejor-peor': _api_mejor_peor,
+    'estadisticas': _api_estadisticas,
+    'estadisticas-notas': _api_estadisticas_notas,
+    'cache': _api_cache,
+}
+
+def _api_lote(cuerpo) -> tuple[int, object]:
+    """POST /lote: ejecuta varias peticiones en orden y devuelve sus respuestas."""
+    if not isinstance(cuerpo, list):
+        raise ValueError("El cuerpo de /lote debe ser una lista de peticiones.")
+    respuestas = []
+    for peticion in cuerpo:
+        if not isinstance(peticion, dict) or not isinstance(peticion.get('metodo'), str) \
+                or not isinstance(peticion.get('ruta'), str):
+            estado, respuesta = 400, {'error': "Cada petición necesita 'metodo' y 'ruta'."}
+        elif urlsplit(peticion['ruta']).path.strip('/') == 'lote':
+            estado, respuesta = 400, {'error': "No se puede anidar /lote."}
+        else:
+            estado, respuesta = atender_peticion(peticion['metodo'].upper(), peticion['ruta'], peticion.get('cuerpo'))
+        respuestas.append({'estado': estado, 'cuerpo': respuesta})
+    return 200, respuestas
+
+def atender_peticion(metodo: str, ruta: str, cuerpo) -> tuple[int, object]:
+    """
+    Ejecuta una petición ya decodificada contra la capa de servicios.
+
+    :param metodo: Método HTTP en mayúsculas.
+    :param ruta: Ruta con su consulta (ej. '/items?dni=12345678A').
+    :param cuerpo: Cuerpo JSON ya decodificado (None si no tiene).
+    :return: Tupla (código de estado HTTP, objeto a devolver como JSON).
+    """
+    partes = urlsplit(ruta)
+    segmentos = [segmento for segmento in partes.path.split('/') if segmento]
+    consulta = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+
+    try:
+        if segmentos == ['items']:
+            if metodo == 'GET':
+                return _api_listar(consulta)
+            if metodo == 'POST':
+                return _api_alta(cuerpo)
+            if metodo == 'DELETE':
+                return _api_eliminar_asignatura(consulta)
+            return 405, {'error': f"Método {metodo} no permitido en /items."}
+
+        if len(segmentos) == 2 and segmentos[0] == 'items':
+            if not segmentos[1].isdigit():
+                raise ValueError(f"ID no válido: '{segmentos[1]}'.")
+            return _api_item(metodo, int(segmentos[1]), cuerpo)
+
+        if len(segmentos) == 2 and segmentos[0] == 'informes' and segmentos[1] in INFORMES:
+            if metodo != 'GET':
+                return 405, {'error': "Los informes solo admiten GET."}
+            return INFORMES[segmentos[1]](consulta)
+
+        if segmentos == ['guardar']:
+            if metodo != 'POST':
+                return 405, {'error': "/guardar solo admite POST."}
+            return 200, {'guardado': servicios.guardar_datos_logica()}
+
+        if segmentos == ['lote']:
+            if metodo != 'POST':
+                return 405, {'error': "/lote solo admite POST."}
+            return _api_lote(cuerpo)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    return 404, {'error': f"Ruta no encontrada: {partes.path}"}
+
+
+# =================================================================
+# 3. PROTOCOLO HTTP/1.1
+# =================================================================
+
+async def _leer_peticion(lector: asyncio.StreamReader) -> tuple | None:
+    """
+    Lee una petición HTTP completa de la conexión.
+
+    :return: (metodo, ruta, version, cabeceras, cuerpo en bytes), o None si el
+             cliente cerró la conexión entre peticiones.
+    :raises ValueError: Si la petición está mal formada (se responde 400).
+    :raises OverflowError: Si el cuerpo supera MAX_CUERPO_BYTES (se responde 413).
+    """
+    linea = await lector.readline()
+    if not linea:
+        return None
+    partes = linea.decode('latin-1').split()
+    if len(partes) != 3 or not partes[2].startswith('HTTP/'):
+        raise ValueError("Línea de petición no válida.")
+    metodo, ruta, version = partes
+
+    cabeceras = {}
+    linea = await lector.readline()
+    while linea not in (b'\r\n', b'\n', b''):
+        if len(cabeceras) >= MAX_CABECERAS:
+            raise ValueError("Demasiadas cabeceras.")
+        nombre, separador, valor = linea.decode('latin-1').partition(':')
+        if not separador:
+            raise ValueError("Cabecera no válida.")
+        cabeceras[nombre.strip().lower()] = valor.strip()
+        linea = await lector.readline()
+
+    longitud = cabeceras.get('content-length', '0')
+    if not longitud.isdigit():
+        raise ValueError("Content-Length no válido.")
+    if int(longitud) > MAX_CUERPO_BYTES:
+        raise OverflowError("El cuerpo de la petición es demasiado grande.")
+    cuerpo = await lector.readexactly(int(longitud)) if int(longitud) else b''
+    return metodo.upper(), ruta, version, cabeceras, cuerpo
+
+def _componer_respuesta(estado: int, datos, mantener_conexion: bool) -> bytes:
+    """Construye la respuesta HTTP completa (cabeceras + cuerpo JSON)."""
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+    cabeceras = (f"HTTP/1.1 {estado} {TEXTOS_ESTADO.get(estado, '')}\r\n"
+                 f"Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(cuerpo)}\r\n"
+                 f"Connection: {'keep-alive' if mantener_conexion else 'close'}\r\n\r\n")
+    return cabeceras.encode('latin-1') + cuerpo
+
+def _mantener_conexion(version: str, cabeceras: dict) -> bool:
+    """HTTP/1.1 mantiene la conexión salvo 'Connection: close'; HTTP/1.0 solo con 'keep-alive'."""
+    conexion = cabeceras.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return conexion == 'keep-alive'
+    return conexion != 'close'
+
+def _responder(metodo: str, ruta: str, cuerpo_bytes: bytes, mantener_conexion: bool) -> bytes:
+    """
+    Atiende una petición ya leída y devuelve la respuesta completa. Se ejecuta
+    en un hilo aparte (ver _atender_conexion): una petición lenta (un listado
+    enorme, un guardado que espera al automático) no detiene al resto de
+    conexiones, y las lecturas se hacen en paralelo bajo el cerrojo de servicios.
+    """
+    try:
+        cuerpo = json.loads(cuerpo_bytes) if cuerpo_bytes else None
+    except ValueError:
+        estado, datos = 400, {'error': "El cuerpo no es JSON válido."}
+    else:
+        try:
+            estado, datos = atender_peticion(metodo, ruta, cuerpo)
+        except Exception as e:
+            # Un fallo inesperado no debe tumbar el servidor: se informa y se sigue
+            estado, datos = 500, {'error': f"Error interno: {e}"}
+    return _componer_respuesta(estado, datos, mantener_conexion)
+
+async def _atender_conexion(lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+    """
+    Atiende una conexión: peticiones una tras otra hasta que el cliente la
+    cierra o pide cerrarla. El bucle de asyncio solo lee y escribe; cada
+    petición se resuelve en el grupo de hilos por defecto (_responder).
+    """
+    mantener = True
+    try:
+        while mantener:
+            try:
+                peticion = await _leer_peticion(lector)
+            except ValueError as e:
+                peticion = None
+                escritor.write(_componer_respuesta(400, {'error': str(e)}, False))
+            except OverflowError as e:
+                peticion = None
+                escritor.write(_componer_respuesta(413, {'error': str(e)}, False))
+
+            if peticion is None:
+                mantener = False
+            else:
+                metodo, ruta, version, cabeceras, cuerpo_bytes = peticion
+                mantener = _mantener_conexion(version, cabeceras)
+                escritor.write(await asyncio.to_thread(_responder, metodo, ruta, cuerpo_bytes, mantener))
+            await escritor.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        # El cliente cortó la conexión a mitad de una petición o respuesta
+        pass
+    finally:
+        escritor.close()
+
+
+# =================================================================
+# 4. ARRANQUE
+# =================================================================
+
+async def crear_servidor(host: str = HOST_SERVIDOR, puerto: int = PUERTO_SERVIDOR) -> asyncio.AbstractServer:
+    """
+    Crea el servidor (ya escuchando) en el bucle de asyncio actual.
+
+    :param puerto: Puerto TCP (0 para que el sistema elija uno libre).
+    :return: El servidor de asyncio (ver server.sockets para el puerto real).
+    """
+    return await asyncio.start_server(_atender_conexion, host, puerto)
+
+async def _servir(host: str, puerto: int):
+    """Arranca el servidor y atiende peticiones hasta que se interrumpe."""
+    servidor = await crear_servidor(host, puerto)
+    print(f"Servidor de la Agenda Académica en http://{host}:{puerto} (Ctrl+C para terminar)")
+    async with servidor:
+        await servidor.serve_forever()
+
+def main():
+    """
+    Punto de entrada: carga la agenda, activa el guardado automático y sirve
+    la API. Al terminar (Ctrl+C) se guardan los cambios pendientes.
+    """
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else PUERTO_SERVIDOR
+
+    if servicios.cargar_datos_logica():
+        print(f"Agenda cargada: {servicios.contar_items()} ítems.")
+    autoguardado.iniciar_autoguardado()
+    try:
+        asyncio.run(_servir(HOST_SERVIDOR, puerto))
+    except KeyboardInterrupt:
+        print("\nServidor detenido.")
+    finally:
+        autoguardado.detener_autoguardado()
+        if servicios.hay_cambios_sin_guardar() and not servicios.guardar_datos_logica():
+            print("Error: No se pudieron guardar los cambios pendientes.")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
 from datetime import datetime
+import itertools
+import operator
 import re
+import shutil
+import sys
 import colores
 
 """Módulo encargado de la Entrada/Salida y validaciones de los datos introducidos por el usuario"""
@@ -221,46 +225,118 @@ def imprimir_tabla(datos: list[dict], encabezados: list[str]):
     """
     Imprime una lista de diccionarios en un formato de tabla legible en consola.
     (Requisito: Informes en consola con formato tabular legible [cite: 27])
+    Las columnas se ajustan al valor más largo de toda la lista, sin recortes.
     
     :param datos: La lista de diccionarios a imprimir.
     :param encabezados: Lista de las claves (columnas) a mostrar.
     """
-    if not datos:
+    imprimir_tabla_paginada(datos, encabezados, muestra=len(datos), ancho_maximo=None, paginar=False)
+
+
+# Filas del principio que se miran para calcular el ancho de las columnas
+MUESTRA_ANCHOS_TABLA = 1000
+
+# Ancho máximo de una columna: los valores más largos se recortan
+ANCHO_MAXIMO_COLUMNA = 40
+
+# Filas que se escriben de una vez cuando no se pagina
+FILAS_POR_BLOQUE = 5000
+
+
+def _pedir_siguiente_pagina() -> bool:
+    """
+    Pausa entre páginas del listado.
+
+    :return: True para seguir con la página siguiente, False para terminar.
+    """
+    try:
+        respuesta = input(f"{colores.C_MORADO}-- ENTER: siguiente página, q: terminar -- {colores.C_FIN}")
+    except EOFError:
+        respuesta = 'q'
+    return respuesta.strip().lower() != 'q'
+
+def imprimir_tabla_paginada(filas, encabezados: list[str], anchos: dict | None = None,
+                            muestra: int = MUESTRA_ANCHOS_TABLA,
+                            ancho_maximo: int | None = ANCHO_MAXIMO_COLUMNA,
+                            paginar: bool | None = None) -> int:
+    """
+    Imprime una tabla a partir de cualquier iterable de diccionarios sin
+    necesitar la lista entera: las columnas se dimensionan con las primeras
+    'muestra' filas (o con 'anchos', si se conocen) y el resto se va
+    escribiendo según llega.
+
+    - Cada fila se formatea una sola vez con un patrón precalculado; los valores
+      más anchos que su columna se recortan para no descuadrar la tabla.
+    - En una terminal se pagina (ENTER sigue, 'q' termina); si no, la salida
+      se escribe en bloques de FILAS_POR_BLOQUE filas.
+
+    :param filas: Iterable de diccionarios (o ItemAgenda).
+    :param encabezados: Lista de las claves (columnas) a mostrar.
+    :param anchos: Ancho fijo de cada columna {encabezado: ancho}; si falta, se calcula con la muestra.
+    :param muestra: Número de filas que se miran para calcular los anchos.
+    :param ancho_maximo: Tope del ancho calculado de una columna (None = sin tope).
+    :param paginar: True/False para forzarlo; None = paginar solo si la entrada y la salida son una terminal.
+    :return: Número de filas impresas.
+    """
+    filas = iter(filas)
+
+    # 1. Muestra inicial (se imprime igualmente, no se vuelve a leer)
+    primeras = list(itertools.islice(filas, muestra))
+    if not primeras:
         print(f"{colores.C_AMARILLO}No hay datos para mostrar.{colores.C_FIN}")
-        return
+        return 0
 
-    # 1. Calcular el ancho máximo para cada columna
-    anchos = {h: len(h) for h in encabezados}
-    for fila in datos:
+    # 2. Ancho de cada columna
+    if anchos is not None:
+        anchos_columnas = [anchos.get(h, len(h)) for h in encabezados]
+    else:
+        anchos_columnas = []
         for h in encabezados:
-            valor_str = str(fila.get(h, ''))
-            anchos[h] = max(anchos[h], len(valor_str))
+            ancho = max(len(h), max(len(str(fila.get(h, ''))) for fila in primeras))
+            if ancho_maximo is not None:
+                ancho = min(ancho, max(ancho_maximo, len(h)))
+            anchos_columnas.append(ancho)
 
-    # 2. Imprimir la cabecera y separador
-    def dibujar_separador():
-        linea_sep = "+"
-        for h in encabezados:
-            linea_sep += "-" * (anchos[h] + 2) + "+"
-        print(linea_sep)
+    # 3. Patrones de línea: '!s' convierte cada valor con str() y '.N' lo recorta al ancho
+    separador = "+" + "+".join("-" * (ancho + 2) for ancho in anchos_columnas) + "+"
+    cabecera = "|" + "|".join(h.center(ancho + 2) for h, ancho in zip(encabezados, anchos_columnas)) + "|"
+    formato_fila = "| " + " | ".join(f"{{!s:<{ancho}.{ancho}}}" for ancho in anchos_columnas) + " |"
+    formatear = formato_fila.format
 
-    dibujar_separador()
-    
-    linea_cabecera = "|"
-    for h in encabezados:
-        ancho = anchos[h] + 2
-        linea_cabecera += h.center(ancho) + "|"
-    print(linea_cabecera)
-    
-    dibujar_separador()
+    if paginar is None:
+        paginar = sys.stdin.isatty() and sys.stdout.isatty()
+    # En pantalla caben las filas del terminal menos la cabecera y la pausa
+    filas_bloque = max(shutil.get_terminal_size().lines - 5, 5) if paginar else FILAS_POR_BLOQUE
 
-    # 3. Imprimir los datos
-    for fila in datos:
-        linea_datos = "|"
-        for h in encabezados:
-            ancho = anchos[h] + 2
-            valor_str = str(fila.get(h, '')).ljust(ancho - 2)
-            linea_datos += " " + valor_str + " |"
-        
-        print(linea_datos[:-1] + "|") 
-        
-    dibujar_separador()    
\ No newline at end of file
+    sys.stdout.write(f"{separador}\n{cabecera}\n{separador}\n")
+
+    # 4. Filas, por bloques (o páginas)
+    impresas = 0
+    seguir = True
+    todas = itertools.chain(primeras, filas)
+    # itemgetter con una sola clave no devuelve una tupla: se envuelve
+    extraer = operator.itemgetter(*encabezados) if len(encabezados) > 1 else (lambda fila: (fila[encabezados[0]],))
+
+    def formatear_bloque() -> list[str]:
+        lineas = []
+        for fila in itertools.islice(todas, filas_bloque):
+            try:
+                valores = extraer(fila)
+            except KeyError:
+                # Fila sin alguna de las columnas: se deja la celda vacía
+                valores = [fila.get(h, '') for h in encabezados]
+            lineas.append(formatear(*valores))
+        return lineas
+
+    bloque = formatear_bloque()
+    while bloque and seguir:
+        sys.stdout.write("\n".join(bloque) + "\n")
+        impresas += len(bloque)
+        bloque = formatear_bloque()
+        if bloque and paginar:
+            sys.stdout.flush()
+            seguir = _pedir_siguiente_pagina()
+
+    sys.stdout.write(separador + "\n")
+    sys.stdout.flush()
+    return impresas